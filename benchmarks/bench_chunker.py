@@ -0,0 +1,89 @@
+"""Micro-benchmark: token-aware chunker vs. the former `handle_chunk` re-tokenization loop.
+
+    python -m benchmarks.bench_chunker [--pdf URL] [--sentences N] [--repeat R]
+"""
+import argparse
+import random
+import time
+from typing import List
+
+from transformers import AutoTokenizer
+
+from src.app.features.research_assistant.processing.chunker import TokenChunker
+
+WORDS = ("quantum qubit entanglement superposition decoherence hamiltonian circuit gate error correction "
+         "surface code annealing variational eigensolver fidelity topological photonic lattice measurement").split()
+
+
+def synthetic_sentences(n: int, seed: int = 0) -> List[str]:
+    """Generate `n` pseudo-scientific sentences of 8 to 40 words."""
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 40))).capitalize() + "." for _ in range(n)]
+
+
+def pdf_sentences(url: str) -> List[str]:
+    """Extract the sentences of a PDF the way the former `DocumentProcessor.process_loaded_pdf` did."""
+    import spacy
+    from langchain_community.document_loaders import PyPDFLoader
+
+    nlp = spacy.load("en_core_web_sm")
+    text = " ".join(doc.page_content for doc in PyPDFLoader(url).load())
+    return [para for sent in nlp(text).sents for para in sent.text.split("\n\n")]
+
+
+def legacy_split(tokenizer, segments: List[str], chunk_size: int = 512) -> List[str]:
+    """Former `process_loaded_pdf` chunking loop: the growing chunk is re-tokenized for every segment."""
+    chunks, current_chunk = [], ""
+    for chunk in segments:
+        token_count_current = len(tokenizer.tokenize(current_chunk))
+        token_count_chunk = len(tokenizer.tokenize(chunk))
+        if token_count_current + token_count_chunk <= chunk_size:
+            current_chunk = f"{current_chunk} {chunk}".strip()
+        else:
+            if current_chunk:
+                chunks.append(current_chunk)
+            if token_count_chunk > chunk_size:
+                tokens = chunk.split()
+                chunks.extend(' '.join(tokens[i:i + chunk_size]) for i in range(0, len(tokens), chunk_size))
+            else:
+                current_chunk = chunk.strip()
+    if current_chunk:
+        chunks.append(current_chunk)
+    return chunks
+
+
+def measure(name: str, split, segments: List[str], total_tokens: int, repeat: int) -> float:
+    """Run a chunking function `repeat` times and print its best throughput."""
+    best, chunks = float("inf"), []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        chunks = split(segments)
+        best = min(best, time.perf_counter() - start)
+    rate = total_tokens / best
+    print(f"{name:<12} {best * 1000:>10.1f} ms {rate:>14,.0f} tokens/s {len(chunks):>8} chunks")
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pdf", help="PDF URL or path to chunk instead of synthetic text")
+    parser.add_argument("--sentences", type=int, default=2000, help="number of synthetic sentences")
+    parser.add_argument("--chunk-size", type=int, default=512)
+    parser.add_argument("--chunk-overlap", type=int, default=206)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    tokenizer = AutoTokenizer.from_pretrained("distilbert-base-uncased")
+    segments = pdf_sentences(args.pdf) if args.pdf else synthetic_sentences(args.sentences)
+    total_tokens = sum(len(tokenizer.tokenize(segment)) for segment in segments)
+    chunker = TokenChunker(tokenizer, chunk_size=args.chunk_size, chunk_overlap=args.chunk_overlap)
+
+    print(f"{len(segments)} segments, {total_tokens:,} tokens\n")
+    legacy = measure("legacy", lambda s: legacy_split(tokenizer, s, args.chunk_size), segments, total_tokens,
+                     args.repeat)
+    linear = measure("linear", chunker.split, segments, total_tokens, args.repeat)
+    print(f"\nspeedup: x{linear / legacy:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Quantized FAISS indexes: recall vs. memory of float32, float16, int8 and binary codes, with and without rescoring.
+
+    python -m benchmarks.bench_quantization [--scale 100000] [--index-types flat hnsw ivf] [--factors 2 4 10 20]
+
+The synthetic collection of `bench_vector_store` is written through the store API once per index type and
+quantization, each in a fresh interpreter. `index_mb` is the size of the index file, which read-only stores load
+in memory (IVF lists are memory-mapped), and `bytes_per_vector` its share per chunk; the float32 vectors kept in
+the sidecar for rescoring stay on disk. Recall@10 is measured against an exact search without rescoring
+(`x0`, the compact distances) and for each rescoring factor (`xN`: N candidates per result rescored in float32),
+with the p50 latency of single queries.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.bench_vector_store import TOP_K, build, exact_top_k, open_store, vectors
+
+QUANTIZATIONS = ["none", "float16", "int8", "binary"]
+
+
+def serve(path: str, index_type: str, size: int, n_queries: int, factors: list) -> dict:
+    """Recall@10 and p50 latency of single queries for each rescoring factor (0: none)."""
+    queries = vectors(0, n_queries, seed=1)
+    truth = exact_top_k(size, queries)
+    store = open_store(path, index_type, read_only=True)
+    store.query(queries[:1], n_results=TOP_K)                          # Warm-up (index loading)
+    metrics = {}
+    for factor in [0, *factors] if store.quantized else [0]:
+        store.rescore_factor = factor
+        latencies, found = [], []
+        for query in queries:
+            start = time.perf_counter()
+            found.append(store.query(query[None], n_results=TOP_K, include=["distances"])["ids"][0])
+            latencies.append((time.perf_counter() - start) * 1000)
+        metrics[f"recall_x{factor}"] = statistics.mean(
+            len({f"{i // 20}_chunk_{i % 20}" for i in expected} & set(ids)) / TOP_K
+            for expected, ids in zip(truth, found))
+        metrics[f"p50_ms_x{factor}"] = statistics.median(latencies)
+    return metrics
+
+
+def probe(*args: str) -> dict:
+    """Run a step of the benchmark in a fresh interpreter and return its JSON output."""
+    output = subprocess.run([sys.executable, "-m", "benchmarks.bench_quantization", *args], capture_output=True,
+                            text=True, check=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=int, default=100000, help="number of chunks")
+    parser.add_argument("--index-types", nargs="+", default=["flat", "hnsw"], help="FAISS index types")
+    parser.add_argument("--quantizations", nargs="+", default=QUANTIZATIONS)
+    parser.add_argument("--factors", type=int, nargs="+", default=[2, 4, 10, 20], help="rescoring factors")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--step", choices=["build", "serve"], help=argparse.SUPPRESS)
+    parser.add_argument("--path", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.step == "build":
+        print(json.dumps(build(args.path, args.index_types[0], args.scale, quantization=args.quantizations[0])))
+        return
+    if args.step == "serve":
+        print(json.dumps(serve(args.path, args.index_types[0], args.scale, args.queries, args.factors)))
+        return
+
+    print(f"{args.scale} chunks, recall@{TOP_K} by rescoring factor (x0: no rescoring)")
+    for index_type in args.index_types:
+        for quantization in args.quantizations:
+            with tempfile.TemporaryDirectory() as path:
+                common = ["--index-types", index_type, "--scale", str(args.scale), "--path", path]
+                metrics = probe("--step", "build", *common, "--quantizations", quantization)
+                directory = os.path.join(path, "bench")
+                index_bytes = sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory)
+                                  if name.startswith("index"))
+                metrics = {"index_mb": index_bytes / 2 ** 20, "bytes_per_vector": index_bytes / args.scale,
+                           "build_s": metrics["build_s"]}
+                metrics.update(probe("--step", "serve", *common, "--queries", str(args.queries),
+                                     "--factors", *map(str, args.factors)))
+            print(f"{index_type:<5} {quantization:<8} " + "  ".join(f"{name}={value:.3f}"
+                                                                     for name, value in metrics.items()))
+
+
+if __name__ == "__main__":
+    main()
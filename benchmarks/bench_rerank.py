@@ -0,0 +1,68 @@
+"""Latency and quality of the cross-encoder + MMR reranking stage against plain hybrid retrieval.
+
+    python -m benchmarks.bench_rerank [--samples 100] [--candidates 20 50 100] [--batch-size 32] [--mmr-lambda 0.5]
+
+Known-item queries are sampled from the vector store (see `eval_retrieval`). For each candidate set size,
+it reports paper-level recall@5, the number of distinct papers in the top 5, and end-to-end retrieval latency
+percentiles (caches cleared, models warmed up), so that the p95 can be checked against the retrieval SLA.
+"""
+import argparse
+import statistics
+import time
+from typing import Dict, List
+
+from benchmarks.eval_retrieval import sample_queries
+from src.app.features.research_assistant.processing.collections import active_collection
+from src.app.features.research_assistant.qa_system.qa_helper import QA_helper
+from src.app.features.research_assistant.utilities.helper import VECTOR_STORE_FILE
+
+TOP_K = 5
+
+
+def run(helper: QA_helper, queries: List[Dict], rerank: bool) -> Dict:
+    """Retrieve the top 5 of every query, uncached, and collect recall, diversity and latency."""
+    hits, papers, latencies = 0, [], []
+    helper.retrieve_documents(helper.collection_name, queries[0]["query"], top_k=TOP_K, rerank=rerank)  # Warm-up
+    for item in queries:
+        helper.retrieval_cache.clear()
+        start = time.perf_counter()
+        results = helper.retrieve_documents(helper.collection_name, item["query"], top_k=TOP_K, rerank=rerank)
+        latencies.append((time.perf_counter() - start) * 1000)
+        links = [metadata.get("pdf_link") for metadata in results["metadatas"][0]]
+        hits += any(link in item["relevant"] for link in links)
+        papers.append(len(set(links)))
+
+    latencies.sort()
+    return {
+        f"recall@{TOP_K}": hits / len(queries),
+        "papers": statistics.mean(papers),
+        "p50_ms": statistics.median(latencies),
+        "p95_ms": latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--samples", type=int, default=100, help="number of sampled known-item queries")
+    parser.add_argument("--candidates", type=int, nargs="+", default=[20, 50, 100])
+    parser.add_argument("--batch-size", type=int, default=32, help="cross-encoder batch size")
+    parser.add_argument("--mmr-lambda", type=float, default=0.5)
+    args = parser.parse_args()
+
+    active = active_collection()
+    helper = QA_helper(embedding_model=active["embedding_model"], vector_store_file=VECTOR_STORE_FILE,
+                       collection_name=active["name"],
+                       rerank_batch_size=args.batch_size, mmr_lambda=args.mmr_lambda)
+    queries = sample_queries(helper, args.samples)
+    print(f"{len(queries)} queries, {helper.collection.count()} chunks\n")
+
+    metrics = run(helper, queries, rerank=False)
+    print(f"{'hybrid':<16} " + "  ".join(f"{name}={value:.3f}" for name, value in metrics.items()))
+    for candidates in args.candidates:
+        helper.rerank_candidates = candidates
+        metrics = run(helper, queries, rerank=True)
+        print(f"{f'rerank@{candidates}':<16} " + "  ".join(f"{name}={value:.3f}" for name, value in metrics.items()))
+
+
+if __name__ == "__main__":
+    main()
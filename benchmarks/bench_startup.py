@@ -0,0 +1,58 @@
+"""Startup benchmark: cold import time, heavy modules loaded at import, and time to first paint.
+
+    python -m benchmarks.bench_startup [--runs 3]
+
+Each measure runs in a fresh interpreter so nothing is warm. First paint renders the Overview page
+headlessly with Streamlit's `AppTest` (a dummy `HG_API_KEY` is used when none is set).
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+HEAVY_MODULES = ["torch", "transformers", "sentence_transformers", "spacy", "chromadb", "langchain_community"]
+
+IMPORT_PROBE = f"""
+import json, sys, time
+start = time.perf_counter()
+import src.app.streamlit_app
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "heavy": [m for m in {HEAVY_MODULES!r} if m in sys.modules]}}))
+"""
+
+FIRST_PAINT_PROBE = """
+import json, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file("app.py", default_timeout=300)
+app.run()
+print(json.dumps({"seconds": time.perf_counter() - start, "exceptions": [str(e.value) for e in app.exception]}))
+"""
+
+
+def probe(code: str) -> dict:
+    """Run a probe in a fresh interpreter from the repository root and return its JSON output."""
+    env = {**os.environ, "HG_API_KEY": os.environ.get("HG_API_KEY", "hf_dummy")}
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=env, check=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    imports = [probe(IMPORT_PROBE) for _ in range(args.runs)]
+    paints = [probe(FIRST_PAINT_PROBE) for _ in range(args.runs)]
+
+    print(f"import src.app.streamlit_app  median {statistics.median(r['seconds'] for r in imports):.2f}s")
+    print(f"heavy modules at import       {imports[0]['heavy'] or 'none'}")
+    print(f"cold start to first paint     median {statistics.median(r['seconds'] for r in paints):.2f}s")
+    if paints[0]["exceptions"]:
+        print(f"page exceptions               {paints[0]['exceptions']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""Vector store backends: build time, query latency, recall and memory of Chroma vs. FAISS flat / IVF / HNSW.
+
+    python -m benchmarks.bench_vector_store [--scales 10000 100000 1000000] [--backends chroma flat ivf hnsw]
+
+Synthetic clustered unit vectors (MiniLM's 384 dimensions, with chunk-like metadata and documents) are written
+through the store API in batches, as the ingestion does. Each build and each serving run happens in a fresh
+interpreter in a temporary directory, so that memory is attributable: `build_peak_mb` is the peak RSS of the
+build, `serve_mb` the RSS added by opening the collection read-only and answering the queries (what the app
+pays) and `serve_anon_mb` its part that is not memory-mapped index pages, which the kernel can evict. Latency
+is measured on single queries (p50/p95) and on batches of `--batch` queries (per query), and recall@10 against
+an exact search. Chroma at 1M chunks takes a long time to build; use `--scales` to skip it.
+"""
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+DIM = 384
+CLUSTERS = 256
+RANK = 32               # Intrinsic dimension of the variation around the clusters, as in sentence embeddings
+PAGE = 10000
+TOP_K = 10
+
+
+def memory_mb() -> dict:
+    """Resident set size of the process, and its anonymous part (memory-mapped index files are not anonymous)."""
+    with open("/proc/self/status") as f:
+        status = dict(line.split(":", 1) for line in f)
+    return {"rss": int(status["VmRSS"].split()[0]) / 1024, "anon": int(status["RssAnon"].split()[0]) / 1024}
+
+
+def vectors(start: int, count: int, seed: int = 0) -> np.ndarray:
+    """Deterministic clustered unit vectors `start` to `start + count` (generated page by page)."""
+    rng = np.random.default_rng(0)
+    centers, basis = rng.normal(size=(CLUSTERS, DIM)), rng.normal(size=(RANK, DIM)) / np.sqrt(RANK)
+    pages = []
+    for page in range(start // PAGE, (start + count - 1) // PAGE + 1):
+        rng = np.random.default_rng((seed, page))
+        data = (centers[rng.integers(CLUSTERS, size=PAGE)] + 3 * rng.normal(size=(PAGE, RANK)) @ basis
+                + 0.3 * rng.normal(size=(PAGE, DIM)))
+        pages.append(data / np.linalg.norm(data, axis=1, keepdims=True))
+    data = np.vstack(pages)[start % PAGE:][:count]
+    return np.ascontiguousarray(data, dtype=np.float32)
+
+
+def open_store(path: str, backend: str, read_only: bool = False, quantization: str = "none"):
+    from src.app.features.research_assistant.vector_store import ChromaStore
+    from src.app.features.research_assistant.vector_store.faiss_store import FaissStore
+
+    if backend == "chroma":
+        return ChromaStore.open(path, "bench")
+    return FaissStore(path, "bench", index_type=backend, quantization=quantization, read_only=read_only)
+
+
+def build(path: str, backend: str, size: int, quantization: str = "none") -> dict:
+    """Write `size` chunks through the store API and persist them."""
+    store = open_store(path, backend, quantization=quantization)
+    start = time.perf_counter()
+    batch = min(store.max_batch_size, 5000)
+    for offset in range(0, size, batch):
+        count = min(batch, size - offset)
+        store.upsert(ids=[f"{(offset + i) // 20}_chunk_{(offset + i) % 20}" for i in range(count)],
+                     embeddings=vectors(offset, count),
+                     metadatas=[{"arxiv_id": str((offset + i) // 20), "chunk_index": (offset + i) % 20,
+                                 "pdf_link": f"http://arxiv.org/pdf/{(offset + i) // 20}v1"} for i in range(count)],
+                     documents=[f"chunk {offset + i} " + "lorem ipsum " * 16 for i in range(count)])
+    store.persist()
+    return {"build_s": time.perf_counter() - start,
+            "build_peak_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}
+
+
+def exact_top_k(size: int, queries: np.ndarray) -> np.ndarray:
+    """Exact nearest neighbours (L2 on unit vectors), scanning the vectors page by page."""
+    best = np.full((len(queries), TOP_K), np.inf), np.zeros((len(queries), TOP_K), dtype=np.int64)
+    for offset in range(0, size, PAGE):
+        page = vectors(offset, min(PAGE, size - offset))
+        distances = np.concatenate([best[0], 2 - 2 * queries @ page.T], axis=1)
+        page_ids = np.broadcast_to(np.arange(offset, offset + len(page)), (len(queries), len(page)))
+        ids = np.concatenate([best[1], page_ids], axis=1)
+        order = np.argsort(distances, axis=1)[:, :TOP_K]
+        best = np.take_along_axis(distances, order, axis=1), np.take_along_axis(ids, order, axis=1)
+    return best[1]
+
+
+def serve(path: str, backend: str, size: int, n_queries: int, batch: int) -> dict:
+    """Open the collection read-only, then time single and batched queries and measure their recall."""
+    queries = vectors(0, n_queries, seed=1)
+    before = memory_mb()
+    store = open_store(path, backend, read_only=True)
+    store.query(queries[:1], n_results=TOP_K)                          # Warm-up (index loading)
+    latencies, found = [], []
+    for query in queries:
+        start = time.perf_counter()
+        result = store.query(query[None], n_results=TOP_K, include=["distances"])
+        latencies.append((time.perf_counter() - start) * 1000)
+        found.append(result["ids"][0])
+    start = time.perf_counter()
+    for offset in range(0, n_queries, batch):
+        store.query(queries[offset:offset + batch], n_results=TOP_K, include=["distances"])
+    batched_ms = (time.perf_counter() - start) * 1000 / n_queries
+    after = memory_mb()
+
+    truth = exact_top_k(size, queries)
+    recall = statistics.mean(
+        len({f"{i // 20}_chunk_{i % 20}" for i in expected} & set(ids)) / TOP_K for expected, ids in zip(truth, found))
+    latencies.sort()
+    return {"p50_ms": statistics.median(latencies), "p95_ms": latencies[int(0.95 * (len(latencies) - 1))],
+            "batched_ms": batched_ms, f"recall@{TOP_K}": recall, "serve_mb": after["rss"] - before["rss"],
+            "serve_anon_mb": after["anon"] - before["anon"]}
+
+
+def disk_mb(path: str) -> float:
+    sizes = [os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names]
+    return sum(sizes) / 2 ** 20
+
+
+def probe(*args: str) -> dict:
+    """Run a step of the benchmark in a fresh interpreter and return its JSON output."""
+    output = subprocess.run([sys.executable, "-m", "benchmarks.bench_vector_store", *args], capture_output=True,
+                            text=True, check=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=int, nargs="+", default=[10000, 100000, 1000000], help="numbers of chunks")
+    parser.add_argument("--backends", nargs="+", default=["chroma", "flat", "ivf", "hnsw"],
+                        help="chroma and/or FAISS index types")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--batch", type=int, default=64, help="queries per batched search")
+    parser.add_argument("--step", choices=["build", "serve"], help=argparse.SUPPRESS)
+    parser.add_argument("--path", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.step == "build":
+        print(json.dumps(build(args.path, args.backends[0], args.scales[0])))
+        return
+    if args.step == "serve":
+        print(json.dumps(serve(args.path, args.backends[0], args.scales[0], args.queries, args.batch)))
+        return
+
+    for size in args.scales:
+        print(f"\n{size} chunks, {DIM} dimensions")
+        for backend in args.backends:
+            with tempfile.TemporaryDirectory() as path:
+                common = ["--backends", backend, "--scales", str(size), "--path", path]
+                metrics = probe("--step", "build", *common)
+                metrics.update(probe("--step", "serve", *common, "--queries", str(args.queries),
+                                     "--batch", str(args.batch)))
+                metrics["disk_mb"] = disk_mb(path)
+            print(f"{backend:<8} " + "  ".join(f"{name}={value:.3f}" for name, value in metrics.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Offline evaluation of dense vs. hybrid (BM25 + dense) retrieval: paper-level recall@k and query latency.
+
+    python -m benchmarks.eval_retrieval [--queries queries.json] [--samples 200] [--k 1 5 10]
+
+Without `--queries`, known-item queries are sampled from the vector store: a sentence of a stored chunk is
+the query and the chunk's paper is the relevant document. A queries file is a JSON list of
+`{"query": "...", "relevant": ["<pdf_link>", ...]}`.
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+from typing import Dict, List
+
+from src.app.features.research_assistant.processing.collections import active_collection
+from src.app.features.research_assistant.qa_system.qa_helper import QA_helper
+from src.app.features.research_assistant.utilities.helper import VECTOR_STORE_FILE
+
+
+def sample_queries(helper: QA_helper, samples: int, seed: int = 0) -> List[Dict]:
+    """Build known-item queries from random sentences of stored chunks."""
+    rng = random.Random(seed)
+    count = helper.collection.count()
+    queries = []
+    for offset in rng.sample(range(count), min(samples, count)):
+        chunk = helper.collection.get(limit=1, offset=offset, include=["metadatas", "documents"])
+        metadata = chunk["metadatas"][0]
+        text = helper.chunk_texts(chunk["documents"], chunk["metadatas"])[0]
+        sentences = [s.strip() for s in text.split(". ") if len(s.split()) >= 8]
+        if sentences:
+            queries.append({"query": rng.choice(sentences), "relevant": [metadata["pdf_link"]]})
+    return queries
+
+
+def evaluate(helper: QA_helper, queries: List[Dict], mode: str, ks: List[int]) -> Dict:
+    """Run all queries in one retrieval mode and compute recall@k and latency percentiles."""
+    hits = {k: 0 for k in ks}
+    latencies = []
+    for item in queries:
+        start = time.perf_counter()
+        results = helper.retrieve_documents(helper.collection_name, item["query"], top_k=max(ks), mode=mode)
+        latencies.append((time.perf_counter() - start) * 1000)
+        links = [metadata.get("pdf_link") for metadata in results["metadatas"][0]]
+        for k in ks:
+            hits[k] += any(link in item["relevant"] for link in links[:k])
+
+    latencies.sort()
+    return {
+        **{f"recall@{k}": hits[k] / len(queries) for k in ks},
+        "p50_ms": statistics.median(latencies),
+        "p95_ms": latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", help="JSON file of {query, relevant} items")
+    parser.add_argument("--samples", type=int, default=200, help="number of sampled known-item queries")
+    parser.add_argument("--k", type=int, nargs="+", default=[1, 5, 10])
+    args = parser.parse_args()
+
+    active = active_collection()
+    helper = QA_helper(embedding_model=active["embedding_model"], vector_store_file=VECTOR_STORE_FILE,
+                       collection_name=active["name"])
+    if args.queries:
+        with open(args.queries) as f:
+            queries = json.load(f)
+    else:
+        queries = sample_queries(helper, args.samples)
+    print(f"{len(queries)} queries, {helper.collection.count()} chunks\n")
+
+    for mode in ("dense", "hybrid"):
+        evaluate(helper, queries[:5], mode, args.k)                 # Warm-up (models, index loading)
+        metrics = evaluate(helper, queries, mode, args.k)
+        print(f"{mode:<8} " + "  ".join(f"{name}={value:.3f}" for name, value in metrics.items()))
+
+
+if __name__ == "__main__":
+    main()
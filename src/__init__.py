@@ -1,3 +1,10 @@
-from .app import streamlit_app
+import importlib
 
 __all__ = ["streamlit_app"]
+
+
+def __getattr__(name):
+    """Import the app on first use: the worker processes of the ingestion pipeline only import their modules."""
+    if name == "streamlit_app":
+        return importlib.import_module(".app.streamlit_app", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
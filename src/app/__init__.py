@@ -1,9 +1,20 @@
-from .components import github_button
-from .layout import page_0, page_1, page_2, page_3
-from .streamlit_app import main_layout
+import importlib
+
+_EXPORTS = {
+    "main_layout": ".streamlit_app",
+    "page_0": ".layout", "page_1": ".layout", "page_2": ".layout", "page_3": ".layout",
+    "github_button": ".components",
+}
 
 __all__ = [
             'main_layout',
             'page_0', 'page_1', 'page_2', 'page_3',
             'github_button'
-           ]
\ No newline at end of file
+           ]
+
+
+def __getattr__(name):
+    """Import the exported names on first use, so that importing a feature module does not load the app."""
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
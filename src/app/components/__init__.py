@@ -1,4 +1,4 @@
 from .repo_button import github_button
-from .utils import load_data, get_secret, initialize_hg_api_key
+from .utils import load_data, get_secret, initialize_hg_api_key, check_hg_api_key
 
-__all__ = ['github_button', 'load_data','get_secret', 'initialize_hg_api_key']
\ No newline at end of file
+__all__ = ['github_button', 'load_data','get_secret', 'initialize_hg_api_key', 'check_hg_api_key']
\ No newline at end of file
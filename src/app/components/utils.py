@@ -2,10 +2,8 @@ import json
 import os
 import sqlite3
 
-import boto3
 import pandas as pd
 import streamlit as st
-from botocore.exceptions import ClientError
 from environs import Env, ErrorMapping
 
 
@@ -20,6 +18,9 @@ def load_data(db_path="./database/arxiv_data.db"):
 
 def get_secret():
     """Retrieve the secret API key from AWS Secrets Manager."""
+    import boto3
+    from botocore.exceptions import ClientError
+
     secret_name = "HG_API_KEY_PRO_2"
     region_name = "eu-west-3"
     session = boto3.session.Session() # Create a Secrets Manager client
@@ -36,6 +37,17 @@ def get_secret():
     secret_dict = json.loads(get_secret_value_response['SecretString'])
     return secret_dict['HG_API_KEY_PRO_2']
 
+@st.cache_data(ttl=600, show_spinner=False)
+def check_hg_api_key(hg_api_key):
+    """Check the Hugging Face API key with `whoami`, cached for 10 minutes instead of every rerun.
+    Returns an error message, or None if the key is valid."""
+    from huggingface_hub import HfApi
+
+    try:
+        return None if HfApi().whoami(hg_api_key) is not None else "Invalid API key"
+    except Exception as e:
+        return f"Error: {e}"
+
 def initialize_hg_api_key():
     """Initialize and return the Hugging Face API key."""
     env = Env()
@@ -1,3 +1,10 @@
-from .arxiv_data_manager import search_and_update
+import importlib
 
-__all__ = ["search_and_update"]
\ No newline at end of file
+__all__ = ["search_and_update"]
+
+
+def __getattr__(name):
+    """Import the exported names on first use, so that importing a feature module does not load the others."""
+    if name == "search_and_update":
+        return getattr(importlib.import_module(".arxiv_data_manager", __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
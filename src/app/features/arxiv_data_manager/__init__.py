@@ -1,3 +1,4 @@
+from .database_search import database_search
 from .search_and_update import search_and_update
 
-__all__ = ["search_and_update"]
+__all__ = ["search_and_update", "database_search"]
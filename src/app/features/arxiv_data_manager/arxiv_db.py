@@ -13,23 +13,97 @@ class ArxivDataLoader:
         author TEXT,
         published DATE,
         updated DATE,
-        pdf_link TEXT
+        pdf_link TEXT,
+        categories TEXT,
+        primary_category TEXT
     )
     """
 
+    CREATE_SYNC_TABLE_QUERY = """
+    CREATE TABLE IF NOT EXISTS arxiv_sync (
+        query TEXT PRIMARY KEY,
+        since TEXT,
+        newest TEXT,
+        start INTEGER NOT NULL DEFAULT 0
+    )
+    """         # Per query: all entries updated up to `since` are stored, `newest`/`start` track a sync in progress
+
+    ADDED_COLUMNS = {"categories": "TEXT", "primary_category": "TEXT"}     # Columns missing from older databases
+
+    CREATE_FTS_QUERY = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS arxiv_entries_fts USING fts5(
+        title, summary, author,
+        content='arxiv_entries', content_rowid='rowid', tokenize='porter unicode61'
+    )
+    """
+
+    CREATE_FTS_TRIGGERS_QUERIES = [
+        """
+        CREATE TRIGGER IF NOT EXISTS arxiv_entries_fts_insert AFTER INSERT ON arxiv_entries BEGIN
+            INSERT INTO arxiv_entries_fts(rowid, title, summary, author)
+            VALUES (new.rowid, new.title, new.summary, new.author);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS arxiv_entries_fts_delete AFTER DELETE ON arxiv_entries BEGIN
+            INSERT INTO arxiv_entries_fts(arxiv_entries_fts, rowid, title, summary, author)
+            VALUES ('delete', old.rowid, old.title, old.summary, old.author);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS arxiv_entries_fts_update AFTER UPDATE ON arxiv_entries BEGIN
+            INSERT INTO arxiv_entries_fts(arxiv_entries_fts, rowid, title, summary, author)
+            VALUES ('delete', old.rowid, old.title, old.summary, old.author);
+            INSERT INTO arxiv_entries_fts(rowid, title, summary, author)
+            VALUES (new.rowid, new.title, new.summary, new.author);
+        END
+        """,
+    ]
+
+    SEARCH_QUERY = """
+    SELECT e.id, e.title, e.author, e.published, e.updated, e.pdf_link,
+           snippet(arxiv_entries_fts, 1, '**', '**', '…', 24) AS snippet,
+           bm25(arxiv_entries_fts, 10.0, 1.0, 5.0) AS score
+    FROM arxiv_entries_fts
+    JOIN arxiv_entries AS e ON e.rowid = arxiv_entries_fts.rowid
+    WHERE arxiv_entries_fts MATCH ?
+    ORDER BY score
+    LIMIT ? OFFSET ?
+    """
+
+    COUNT_MATCHES_QUERY = "SELECT COUNT(*) FROM arxiv_entries_fts WHERE arxiv_entries_fts MATCH ?"
+
     INSERT_QUERY = """
-    INSERT INTO arxiv_entries (id, title, summary, author, published, updated, pdf_link)
-    VALUES (?, ?, ?, ?, ?, ?, ?)
+    INSERT INTO arxiv_entries (id, title, summary, author, published, updated, pdf_link, categories, primary_category)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
     """
 
     UPDATE_QUERY = """
     UPDATE arxiv_entries 
-    SET title = ?, summary = ?, author = ?, published = ?, updated = ?, pdf_link = ?
+    SET title = ?, summary = ?, author = ?, published = ?, updated = ?, pdf_link = ?,
+        categories = ?, primary_category = ?
     WHERE id = ?
     """
 
+    UPSERT_QUERY = """
+    INSERT INTO arxiv_entries (id, title, summary, author, published, updated, pdf_link, categories, primary_category)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(id) DO UPDATE SET
+        title = excluded.title, summary = excluded.summary, author = excluded.author,
+        published = excluded.published, updated = excluded.updated, pdf_link = excluded.pdf_link,
+        categories = excluded.categories, primary_category = excluded.primary_category
+    WHERE excluded.updated IS NOT arxiv_entries.updated
+    """
+
     SELECT_ENTRY_QUERY = "SELECT 1 FROM arxiv_entries WHERE id = ?"
     SELECT_UPDATED_QUERY = "SELECT updated FROM arxiv_entries WHERE id = ?"
+    SELECT_UPDATED_IN_QUERY = "SELECT id, updated FROM arxiv_entries WHERE id IN ({placeholders})"
+    SELECT_SYNC_QUERY = "SELECT since, newest, start FROM arxiv_sync WHERE query = ?"
+    UPSERT_SYNC_QUERY = """
+    INSERT INTO arxiv_sync (query, since, newest, start) VALUES (?, ?, ?, ?)
+    ON CONFLICT(query) DO UPDATE SET since = excluded.since, newest = excluded.newest, start = excluded.start
+    """
+    MAX_QUERY_VARIABLES = 900
 
     def __init__(self, db_name="./database/arxiv_data.db"):
         """Initialize the data loader with the specified database name."""
@@ -51,6 +125,55 @@ class ArxivDataLoader:
         """Create the arxiv_entries table in the database."""
         with self.conn:
             self.conn.execute(self.CREATE_TABLE_QUERY)
+            self.conn.execute(self.CREATE_SYNC_TABLE_QUERY)
+            columns = {row[1] for row in self.conn.execute("PRAGMA table_info(arxiv_entries)")}
+            for column, column_type in self.ADDED_COLUMNS.items():
+                if column not in columns:
+                    self.conn.execute(f"ALTER TABLE arxiv_entries ADD COLUMN {column} {column_type}")
+        self.create_fts_index()
+
+    def create_fts_index(self):
+        """Create the full-text index of titles, abstracts and authors, kept in sync by triggers."""
+        with self.conn:            # One transaction (`executescript` would commit): no triggers without the index
+            self.conn.execute("BEGIN")
+            exists = self.conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'arxiv_entries_fts'").fetchone()
+            self.conn.execute(self.CREATE_FTS_QUERY)
+            for query in self.CREATE_FTS_TRIGGERS_QUERIES:
+                self.conn.execute(query)
+            if not exists:         # Index the entries stored before the index existed
+                self.conn.execute("INSERT INTO arxiv_entries_fts(arxiv_entries_fts) VALUES ('rebuild')")
+
+    @staticmethod
+    def match_query(text):
+        """Turn free text into an FTS5 query matching all its terms (quoted, so no FTS syntax is interpreted)."""
+        terms = ['"' + term.replace('"', '""') + '"' for term in text.split()]
+        return " ".join(terms)
+
+    def search(self, text, limit=20, offset=0):
+        """Return the entries matching `text`, best bm25 score first, with a highlighted abstract snippet."""
+        query = self.match_query(text)
+        if not query:
+            return []
+        cursor = self.conn.execute(self.SEARCH_QUERY, (query, limit, offset))
+        columns = [column[0] for column in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def count_matches(self, text):
+        """Return the number of entries matching `text`."""
+        query = self.match_query(text)
+        if not query:
+            return 0
+        return self.conn.execute(self.COUNT_MATCHES_QUERY, (query,)).fetchone()[0]
+
+    @staticmethod
+    def row(entry):
+        """Return the column values of an entry, in `INSERT_QUERY` order."""
+        categories = entry.get('categories')
+        if isinstance(categories, (list, tuple)):
+            categories = ", ".join(categories)
+        return (entry['id'], entry['title'], entry['summary'], entry['author'], entry['published'],
+                entry['updated'], entry['pdf_link'], categories, entry.get('primary_category'))
 
     def entry_exists(self, arxiv_id):
         """Check if an entry with the specified ID exists in the database."""
@@ -60,21 +183,50 @@ class ArxivDataLoader:
     def update_data(self, entry):
         """Update an existing entry in the database."""
         with self.conn:
-            self.conn.execute(self.UPDATE_QUERY, (
-                entry['title'], entry['summary'], entry['author'],
-                entry['published'], entry['updated'], entry['pdf_link'], entry['id']
-            ))
+            arxiv_id, *values = self.row(entry)
+            self.conn.execute(self.UPDATE_QUERY, (*values, arxiv_id))
 
     def insert_data(self, entry):
         """Insert a new entry into the database."""
         with self.conn:
-            self.conn.execute(self.INSERT_QUERY, (
-                entry['id'], entry['title'], entry['summary'], entry['author'],
-                entry['published'], entry['updated'], entry['pdf_link']
-            ))
+            self.conn.execute(self.INSERT_QUERY, self.row(entry))
+
+    def sync_state(self, query):
+        """Return the incremental sync state of a query: its high-water mark and the progress of an unfinished sync."""
+        row = self.conn.execute(self.SELECT_SYNC_QUERY, (query,)).fetchone()
+        since, newest, start = row if row else (None, None, 0)
+        return {"since": since, "newest": newest, "start": start}
+
+    def save_sync_state(self, query, since, newest=None, start=0):
+        """Persist the incremental sync state of a query."""
+        with self.conn:
+            self.conn.execute(self.UPSERT_SYNC_QUERY, (query, since, newest, start))
+
+    def existing_updates(self, arxiv_ids):
+        """Return the stored `updated` value of each of the given IDs already in the database."""
+        existing = {}
+        for i in range(0, len(arxiv_ids), self.MAX_QUERY_VARIABLES):
+            batch = arxiv_ids[i:i + self.MAX_QUERY_VARIABLES]
+            query = self.SELECT_UPDATED_IN_QUERY.format(placeholders=", ".join("?" * len(batch)))
+            existing.update(self.conn.execute(query, batch).fetchall())
+        return existing
+
+    def bulk_upsert(self, entries):
+        """Insert or update a whole batch of entries in a single transaction."""
+        entries = {entry['id']: entry for entry in entries}        # Last occurrence wins for duplicated IDs
+        existing = self.existing_updates(list(entries))
+        new_entries = sum(1 for arxiv_id in entries if arxiv_id not in existing)
+        updated_entries = sum(1 for arxiv_id, entry in entries.items()
+                              if arxiv_id in existing and existing[arxiv_id] != entry['updated'])
+        with self.conn:
+            self.conn.executemany(self.UPSERT_QUERY, (self.row(entry) for entry in entries.values()))
+        return new_entries, updated_entries
 
-    def parse_and_insert(self, entries):
+    def parse_and_insert(self, entries, bulk=False):
         """Parse entries and insert or update them in the database."""
+        if bulk:
+            return self.bulk_upsert(entries)
+
         new_entries, updated_entries = 0, 0
         for entry in entries:
             if not self.entry_exists(entry['id']):
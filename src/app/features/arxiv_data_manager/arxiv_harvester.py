@@ -0,0 +1,217 @@
+# arxiv_harvester.py
+import json
+import os
+import queue
+import random
+import threading
+import time
+import urllib.error
+from concurrent.futures import ThreadPoolExecutor
+
+from .arxiv_client import ArxivAPIClient
+from .arxiv_parser import ArxivXMLParser
+
+HARVEST_CURSOR_FILE = "./database/.harvest_cursor.json"
+RETRYABLE_HTTP_CODES = {429, 500, 502, 503, 504}
+_PAGE_END = object()        # Marker put by a worker after the last entry of its page
+
+
+class RateLimiter:
+    """Space requests at least `interval` seconds apart, across threads."""
+
+    def __init__(self, interval=3.0):
+        """Initialize the limiter with the minimum delay between two requests."""
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.next_slot = 0.0
+
+    def wait(self):
+        """Block until the next request slot."""
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class ArxivHarvester:
+    """Concurrent, rate limited and resumable harvester of the Arxiv API.
+
+    Full harvests fetch pages concurrently and persist a resume cursor of the pages already consumed.
+    Incremental syncs walk the results by `lastUpdatedDate` down to the high-water mark of the last complete sync,
+    resuming an unfinished one where it stopped.
+    Both parse the Atom responses as they are read and yield entries one by one.
+    """
+
+    def __init__(self, client=None, parser=None, request_interval=3.0, workers=4, max_retries=4,
+                 backoff=2.0, cursor_file=HARVEST_CURSOR_FILE):
+        """Initialize the harvester with its API client, rate limit and retry policy."""
+        self.client = client or ArxivAPIClient()
+        self.parser = parser or ArxivXMLParser()
+        self.rate_limiter = RateLimiter(request_interval)
+        self.workers = workers
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.cursor_file = cursor_file
+        self.consumed = None            # (key, cursor) of the pages consumed by the running harvest
+        self.sync = None                # State of the running incremental sync, as of its pages consumed
+
+    def fetch_page(self, query, start, max_results, sort_by="relevance"):
+        """Open one page under the rate limit, retrying transient errors with jittered exponential backoff."""
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.wait()
+            try:
+                return self.client.open_page(query, start, max_results, sort_by=sort_by)
+            except urllib.error.HTTPError as e:
+                if e.code not in RETRYABLE_HTTP_CODES or attempt == self.max_retries:
+                    raise
+            except (urllib.error.URLError, TimeoutError, ConnectionError):
+                if attempt == self.max_retries:
+                    raise
+            delay = self.backoff * 2 ** attempt * random.uniform(0.5, 1.5)
+            print(f"Retrying page start={start} in {delay:.1f}s (attempt {attempt + 1}/{self.max_retries})")
+            time.sleep(delay)
+
+    def stream_page(self, query, start, max_results, outbox, stop):
+        """Parse one page straight from the response into `outbox`, then put its end marker (runs in a worker)."""
+        def put(item):
+            while not stop.is_set():
+                try:
+                    outbox.put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    continue
+            raise InterruptedError("Harvest closed")
+
+        try:
+            with self.fetch_page(query, start, max_results) as response:
+                for entry in self.parser.iter_entries(response):
+                    put(entry)
+        except InterruptedError:
+            return
+        except Exception as e:
+            put((_PAGE_END, start, e))
+            return
+        put((_PAGE_END, start, None))
+
+    def load_cursor(self, key):
+        """Load the resume cursor of a harvest, None if there is none."""
+        if not os.path.exists(self.cursor_file):
+            return None
+        try:
+            with open(self.cursor_file, "r") as f:
+                return json.load(f).get(key)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def save_cursor(self, key, cursor):
+        """Persist (or clear, with `cursor=None`) the resume cursor of a harvest."""
+        cursors = {}
+        if os.path.exists(self.cursor_file):
+            try:
+                with open(self.cursor_file, "r") as f:
+                    cursors = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                cursors = {}
+        if cursor is None:
+            cursors.pop(key, None)
+        else:
+            cursors[key] = cursor
+        tmp_file = f"{self.cursor_file}.tmp"
+        with open(tmp_file, "w") as f:
+            json.dump(cursors, f)
+        os.replace(tmp_file, self.cursor_file)
+
+    def checkpoint(self):
+        """Record the pages whose entries were all yielded by the running harvest in its resume cursor."""
+        if self.consumed is not None:
+            key, cursor = self.consumed
+            self.save_cursor(key, cursor)
+
+    def harvest(self, query="all:quantum", max_results=100, total_results_limit=250, resume=True,
+                auto_checkpoint=True):
+        """Fetch all pages of a query concurrently, yielding their entries one by one as the responses are parsed.
+
+        Pages are parsed straight from the network by the workers, through a bounded queue, so memory does not
+        grow with the harvest. A page is recorded in the resume cursor once the caller has consumed all its
+        entries, so an interrupted harvest restarts with the missing pages only. Callers buffering entries pass
+        `auto_checkpoint=False` and call `checkpoint()` once they have stored them.
+        """
+        key = f"{query}|relevance|{max_results}|{total_results_limit}"
+        cursor = (self.load_cursor(key) if resume else None) or {"total": None, "done": []}
+        done = set(cursor["done"])
+        self.consumed = None
+
+        def consumed(start):
+            done.add(start)
+            self.consumed = key, {"total": cursor["total"], "done": sorted(done)}
+            if auto_checkpoint:
+                self.checkpoint()
+
+        if cursor["total"] is None or 0 not in done:
+            feed_info = {}
+            with self.fetch_page(query, 0, max_results) as response:
+                for entry in self.parser.iter_entries(response, feed_info):
+                    if 0 not in done:
+                        yield entry
+            cursor["total"] = feed_info.get("total_results")
+            if cursor["total"] is None:
+                print("Error: Unable to find the total number of results in the XML response.")
+                return
+            consumed(0)
+
+        last = min(cursor["total"], total_results_limit)
+        starts = [start for start in range(max_results, last, max_results) if start not in done]
+        failed = []
+        outbox, stop = queue.Queue(maxsize=max_results), threading.Event()
+        executor = ThreadPoolExecutor(max_workers=self.workers)
+        try:
+            for start in starts:
+                executor.submit(self.stream_page, query, start, max_results, outbox, stop)
+            remaining = len(starts)
+            while remaining:
+                item = outbox.get()
+                if not (isinstance(item, tuple) and item[0] is _PAGE_END):
+                    yield item
+                    continue
+                _, start, error = item
+                remaining -= 1
+                if error is not None:
+                    print(f"Network error on page start={start}: {error}")
+                    failed.append(start)
+                else:
+                    consumed(start)
+        finally:
+            stop.set()                          # Unblock the workers if the caller stopped early
+            executor.shutdown(wait=True, cancel_futures=True)
+
+        if failed:
+            print(f"Harvest incomplete, {len(failed)} page(s) left for the next run.")
+        else:
+            self.consumed = None
+            self.save_cursor(key, None)
+
+    def incremental(self, since, query="all:quantum", max_results=100, total_results_limit=10000, newest=None,
+                    start=0):
+        """Yield the entries updated after `since`, newest first, stopping at the first older entry.
+
+        A sync cut short (network error, `total_results_limit` reached) keeps `since` and resumes at `start`
+        with the `newest` date seen so far; once it reaches `since` or the last result, `newest` becomes the
+        new high-water mark. `self.sync` holds this state as of the pages consumed, for the caller to persist
+        once it has stored their entries.
+        """
+        self.sync = {"since": since, "newest": newest, "start": start}
+        for page_start in range(start, start + total_results_limit, max_results):
+            count = 0
+            with self.fetch_page(query, page_start, max_results, sort_by="lastUpdatedDate") as response:
+                for entry in self.parser.iter_entries(response):
+                    if since is not None and entry['updated'] <= since:
+                        break
+                    count += 1
+                    newest = max(newest or entry['updated'], entry['updated'])
+                    yield entry
+            if count < max_results:             # Down to `since` or past the last result: the sync is complete
+                self.sync = {"since": newest or since, "newest": None, "start": 0}
+                return
+            self.sync = {"since": since, "newest": newest, "start": page_start + max_results}
@@ -1,4 +1,5 @@
 # arxiv_parser.py
+import io
 import xml.etree.ElementTree as ET
 
 
@@ -7,25 +8,55 @@ class ArxivXMLParser:
 
     def __init__(self):
         """Initialize the parser with the required namespaces."""
-        self.namespace = {'atom': 'http://www.w3.org/2005/Atom', 'arxiv': 'http://arxiv.org/schemas/atom'}
+        self.namespace = {'atom': 'http://www.w3.org/2005/Atom', 'arxiv': 'http://arxiv.org/schemas/atom',
+                          'opensearch': 'http://a9.com/-/spec/opensearch/1.1/'}
+        self.entry_tag = f"{{{self.namespace['atom']}}}entry"
+        self.total_results_tag = f"{{{self.namespace['opensearch']}}}totalResults"
+
+    def parse_entry(self, entry):
+        """Build the dictionary of one `atom:entry` element."""
+        authors = [name.text for name in entry.findall('atom:author/atom:name', self.namespace)]
+        primary_category = entry.find('arxiv:primary_category', self.namespace)
+        pdf_link = entry.find('atom:link[@title="pdf"]', self.namespace)
+        return {
+            'id': entry.find('atom:id', self.namespace).text,
+            'title': entry.find('atom:title', self.namespace).text,
+            'summary': entry.find('atom:summary', self.namespace).text,
+            'author': ", ".join(authors),
+            'authors': authors,
+            'categories': [category.attrib['term'] for category in entry.findall('atom:category', self.namespace)],
+            'primary_category': primary_category.attrib['term'] if primary_category is not None else None,
+            'published': entry.find('atom:published', self.namespace).text,
+            'updated': entry.find('atom:updated', self.namespace).text,
+            'pdf_link': pdf_link.attrib['href'] if pdf_link is not None else None
+        }
+
+    def iter_entries(self, source, feed_info=None):
+        """Stream arXiv entries one by one from an Atom feed (file-like object, bytes or str).
+
+        Entries are parsed as soon as their closing tag is read and cleared right after, so memory use
+        does not grow with the size of the feed. If given, `feed_info` receives the feed's `total_results`.
+        """
+        if isinstance(source, str):
+            source = source.encode('utf-8')
+        if isinstance(source, bytes):
+            source = io.BytesIO(source)
+
+        root = None
+        for event, element in ET.iterparse(source, events=("start", "end")):
+            if root is None:
+                root = element
+            if event == "end" and element.tag == self.total_results_tag and feed_info is not None:
+                feed_info['total_results'] = int(element.text)
+            elif event == "end" and element.tag == self.entry_tag:
+                yield self.parse_entry(element)
+                element.clear()
+                root.remove(element)        # Drop the parsed entry from the tree
 
     def parse_entries(self, xml_data):
         """Parse XML data and return a list of arXiv entries."""
         try:
-            root = ET.fromstring(xml_data)
-            entries = []
-            for entry in root.findall('atom:entry', self.namespace):
-                arxiv_entry = {
-                    'id': entry.find('atom:id', self.namespace).text,
-                    'title': entry.find('atom:title', self.namespace).text,
-                    'summary': entry.find('atom:summary', self.namespace).text,
-                    'author': entry.find('atom:author/atom:name', self.namespace).text,
-                    'published': entry.find('atom:published', self.namespace).text,
-                    'updated': entry.find('atom:updated', self.namespace).text,
-                    'pdf_link': entry.find('atom:link[@title="pdf"]', self.namespace).attrib['href']
-                }
-                entries.append(arxiv_entry)
-            return entries
+            return list(self.iter_entries(xml_data))
         except ET.ParseError as e:
             print(f"XML parsing error: {e}")
-            return []
\ No newline at end of file
+            return []
@@ -0,0 +1,27 @@
+# database_search.py
+import pandas as pd
+import streamlit as st
+
+from .arxiv_db import ArxivDataLoader
+
+
+def database_search(db_name, page_size=20):
+    """Search the Arxiv database with its full-text index and display the ranked, paginated matches."""
+    col1, col2 = st.columns([4, 1])
+
+    with col1:
+        text = st.text_input("Search titles, abstracts & authors", placeholder="e.g. surface code decoder")
+    if not text.strip():
+        return False
+
+    with ArxivDataLoader(db_name=db_name) as loader:
+        total = loader.count_matches(text)
+        pages = max(1, -(-total // page_size))
+        with col2:
+            page = st.number_input(f"Page (/{pages})", min_value=1, max_value=pages, value=1)
+        results = loader.search(text, limit=page_size, offset=(page - 1) * page_size)
+
+    st.write(f"`{total}` match(es) for *{text}*")
+    if results:
+        st.dataframe(pd.DataFrame(results).drop(columns=["score"]), use_container_width=True)
+    return True
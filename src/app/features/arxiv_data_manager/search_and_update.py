@@ -1,9 +1,25 @@
 # search_and_update.py
 import streamlit as st
 
-from .arxiv_client import ArxivAPIClient
 from .arxiv_db import ArxivDataLoader
-from .arxiv_parser import ArxivXMLParser
+from .arxiv_harvester import ArxivHarvester
+
+
+def write_batches(loader, entries, batch_size, checkpoint):
+    """Insert the harvested entries in batches as they arrive, yielding the (new, updated) counts of each batch.
+
+    `checkpoint` records the progress of the harvest after each write, and once more when it is over.
+    """
+    batch = []
+    for entry in entries:
+        batch.append(entry)
+        if len(batch) >= batch_size:
+            yield loader.parse_and_insert(batch, bulk=True)
+            checkpoint()                # The pages of the entries written so far are done
+            batch = []
+    if batch:
+        yield loader.parse_and_insert(batch, bulk=True)
+    checkpoint()
 
 
 def search_and_update(db_name, query="all:quantum", max_results=100, total_results_limit=100):
@@ -12,6 +28,8 @@ def search_and_update(db_name, query="all:quantum", max_results=100, total_resul
 
     with col1:
         search_clicked = st.button("Search release")
+        incremental = st.toggle("Incremental sync", value=True,
+                                help="Only fetch the entries updated since the last sync.")
 
     with col2:
         status_placeholder = st.empty()  # Info messages
@@ -20,35 +38,40 @@ def search_and_update(db_name, query="all:quantum", max_results=100, total_resul
         spinner_placeholder = st.empty()  # Spinner
 
     if search_clicked:
-        client = ArxivAPIClient()
-        parser = ArxivXMLParser()
+        harvester = ArxivHarvester()
 
         try:
-            with spinner_placeholder:  # Spinner during processing
-                with st.spinner(""):
-                    status_placeholder.info("Fetching Arxiv data ...")
-                    xml_data = client.fetch_arxiv_data(query=query, max_results=max_results,
-                                                       total_results_limit=total_results_limit)
-
-            if xml_data:
-                status_placeholder.info("Parsing XML data...")
-                entries = parser.parse_entries(xml_data)
-
-                status_placeholder.info("Database update...")
-                with ArxivDataLoader(db_name=db_name) as loader:
-                    new_entries, updated_entries = loader.parse_and_insert(entries)
-
-                if new_entries == 0 and updated_entries == 0:  # Status messages based on the update results
-                    status_placeholder.info("Already up to date!")
-                elif new_entries == 0:
-                    status_placeholder.success(f"{updated_entries} update(s) found!")
-                elif updated_entries == 0:
-                    status_placeholder.success(f"{new_entries} new document(s) found!")
+            with ArxivDataLoader(db_name=db_name) as loader:
+                if incremental:
+                    entries = harvester.incremental(query=query, max_results=max_results,
+                                                    total_results_limit=total_results_limit,
+                                                    **loader.sync_state(query))
+
+                    def checkpoint():
+                        loader.save_sync_state(query, **harvester.sync)
                 else:
-                    status_placeholder.success(f"{new_entries} new document(s) found & "
-                                               f"{updated_entries} document(s) updated!")
+                    entries = harvester.harvest(query=query, max_results=max_results,
+                                                total_results_limit=total_results_limit, auto_checkpoint=False)
+                    checkpoint = harvester.checkpoint
+
+                new_entries, updated_entries = 0, 0
+                with spinner_placeholder:  # Spinner during processing
+                    with st.spinner(""):
+                        status_placeholder.info("Fetching Arxiv data ...")
+                        for new, updated in write_batches(loader, entries, max_results, checkpoint):
+                            new_entries += new
+                            updated_entries += updated
+                            status_placeholder.info(f"Database update... ({new_entries + updated_entries} change(s))")
+
+            if new_entries == 0 and updated_entries == 0:  # Status messages based on the update results
+                status_placeholder.info("Already up to date!")
+            elif new_entries == 0:
+                status_placeholder.success(f"{updated_entries} update(s) found!")
+            elif updated_entries == 0:
+                status_placeholder.success(f"{new_entries} new document(s) found!")
             else:
-                status_placeholder.error("API error: No data fetched")
+                status_placeholder.success(f"{new_entries} new document(s) found & "
+                                           f"{updated_entries} document(s) updated!")
         except Exception as e:
             status_placeholder.error(f"Error occurred: {e}")
         finally:
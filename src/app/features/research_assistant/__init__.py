@@ -1,4 +1,19 @@
-from .processing.store_manager import store_management
-from .skeleton import models_loading, run_assistance
+import importlib
 
-__all__ = [ "models_loading", "store_management", "run_assistance"]
\ No newline at end of file
+_EXPORTS = {
+    "store_management": ".processing.store_manager",
+    "models_loading": ".skeleton", "get_document_processor": ".skeleton", "get_qa_system": ".skeleton",
+    "run_assistance": ".skeleton",
+    "memory_report": ".utilities.model_registry",
+}
+
+__all__ = [ "models_loading", "get_document_processor", "get_qa_system", "store_management", "run_assistance",
+            "memory_report"]
+
+
+def __getattr__(name):
+    """Import the exported names on first use: the worker processes of the ingestion pipeline only import their
+    modules."""
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
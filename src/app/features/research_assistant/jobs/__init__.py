@@ -0,0 +1,4 @@
+from .job_store import JobStore
+from .worker import INGEST_JOB, MIGRATE_JOB, ensure_worker
+
+__all__ = ["JobStore", "ensure_worker", "INGEST_JOB", "MIGRATE_JOB"]
\ No newline at end of file
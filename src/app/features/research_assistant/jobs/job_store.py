@@ -0,0 +1,155 @@
+import json
+import os
+import sqlite3
+import time
+from typing import Any, Dict, List, Optional
+
+from ..utilities.helper import JOBS_DB_FILE
+
+CREATE_TABLES_QUERY = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    collection TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    total_items INTEGER NOT NULL DEFAULT 0,
+    done_items INTEGER NOT NULL DEFAULT 0,
+    message TEXT,
+    error TEXT,
+    worker_pid INTEGER,
+    created REAL NOT NULL,
+    started REAL,
+    heartbeat REAL,
+    finished REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, collection);
+CREATE TABLE IF NOT EXISTS workers (
+    pid INTEGER PRIMARY KEY,
+    started REAL NOT NULL,
+    heartbeat REAL NOT NULL
+);
+"""
+
+ACTIVE_STATUSES = ("queued", "running", "cancelling")
+WRITING_STATUSES = ("running", "cancelling")
+
+
+class JobStore:
+    """SQLite table of background jobs, shared by the Streamlit sessions and the worker process.
+
+    A job moves from `queued` to `running` (claimed by a worker) to `done`, `failed` or `cancelled`
+    (through `cancelling` while a running job reaches its next checkpoint). At most one job runs per
+    collection, so a collection has a single writer. Running jobs send heartbeats; a job whose worker
+    stopped beating is requeued and resumes from its last checkpoint.
+    """
+
+    def __init__(self, db_path: str = JOBS_DB_FILE, stale_after: float = 120.0):
+        """Open (and create if needed) the jobs database."""
+        self.db_path = db_path
+        self.stale_after = stale_after
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(db_path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(CREATE_TABLES_QUERY)
+
+    @staticmethod
+    def to_dict(row: Optional[sqlite3.Row]) -> Optional[Dict[str, Any]]:
+        """Turn a job row into a dict, with its payload decoded and its progress as a fraction."""
+        if row is None:
+            return None
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["progress"] = job["done_items"] / job["total_items"] if job["total_items"] else 0.0
+        return job
+
+    def submit(self, kind: str, collection: str, payload: Dict[str, Any], total_items: int = 0) -> int:
+        """Queue a job and return its id."""
+        cursor = self.conn.execute(
+            "INSERT INTO jobs (kind, collection, payload, total_items, created) VALUES (?, ?, ?, ?, ?)",
+            (kind, collection, json.dumps(payload), total_items, time.time()))
+        return cursor.lastrowid
+
+    def claim(self, worker_pid: int) -> Optional[Dict[str, Any]]:
+        """Atomically take the oldest queued job whose collection has no running job."""
+        now = time.time()
+        self.conn.execute("BEGIN IMMEDIATE")        # Serializes claims between worker processes
+        try:
+            self.conn.execute(
+                "UPDATE jobs SET status = CASE status WHEN 'running' THEN 'queued' ELSE 'cancelled' END, "
+                "worker_pid = NULL, message = 'Worker lost' "
+                f"WHERE status IN {WRITING_STATUSES} AND heartbeat < ?", (now - self.stale_after,))
+            row = self.conn.execute(
+                "SELECT * FROM jobs WHERE status = 'queued' AND collection NOT IN "
+                f"(SELECT collection FROM jobs WHERE status IN {WRITING_STATUSES}) ORDER BY id LIMIT 1").fetchone()
+            if row is not None:
+                self.conn.execute(
+                    "UPDATE jobs SET status = 'running', worker_pid = ?, started = COALESCE(started, ?), "
+                    "heartbeat = ? WHERE id = ?", (worker_pid, now, now, row["id"]))
+            self.conn.execute("COMMIT")
+        except sqlite3.Error:
+            self.conn.execute("ROLLBACK")
+            raise
+        return self.get(row["id"]) if row is not None else None
+
+    def checkpoint(self, job_id: int, done_items: int, message: str = None, payload: Dict[str, Any] = None) -> None:
+        """Record the progress of a running job (and refresh its heartbeat)."""
+        self.conn.execute(
+            "UPDATE jobs SET done_items = ?, message = COALESCE(?, message), "
+            "payload = COALESCE(?, payload), heartbeat = ? WHERE id = ?",
+            (done_items, message, json.dumps(payload) if payload is not None else None, time.time(), job_id))
+
+    def beat(self, job_id: int) -> None:
+        """Refresh the heartbeat of a running job."""
+        self.conn.execute("UPDATE jobs SET heartbeat = ? WHERE id = ?", (time.time(), job_id))
+
+    def finish(self, job_id: int, status: str = "done", error: str = None, message: str = None) -> None:
+        """Close a job with its final status."""
+        self.conn.execute(
+            "UPDATE jobs SET status = ?, error = ?, message = COALESCE(?, message), finished = ? WHERE id = ?",
+            (status, error, message, time.time(), job_id))
+
+    def cancel(self, job_id: int) -> None:
+        """Cancel a queued job, or ask the worker to stop a running one at its next checkpoint."""
+        self.conn.execute("UPDATE jobs SET status = 'cancelled', finished = ? WHERE id = ? AND status = 'queued'",
+                          (time.time(), job_id))
+        self.conn.execute("UPDATE jobs SET status = 'cancelling' WHERE id = ? AND status = 'running'", (job_id,))
+
+    def is_cancelled(self, job_id: int) -> bool:
+        """Whether a running job was asked to stop."""
+        row = self.conn.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return row is not None and row["status"] == "cancelling"
+
+    def get(self, job_id: int) -> Optional[Dict[str, Any]]:
+        """Return a job by id."""
+        return self.to_dict(self.conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone())
+
+    def active(self, collection: str = None) -> List[Dict[str, Any]]:
+        """Queued and running jobs, optionally of one collection, oldest first."""
+        query = f"SELECT * FROM jobs WHERE status IN {ACTIVE_STATUSES}"
+        params = ()
+        if collection is not None:
+            query += " AND collection = ?"
+            params = (collection,)
+        return [self.to_dict(row) for row in self.conn.execute(query + " ORDER BY id", params)]
+
+    def recent(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """The latest jobs, newest first."""
+        return [self.to_dict(row) for row in
+                self.conn.execute("SELECT * FROM jobs ORDER BY id DESC LIMIT ?", (limit,))]
+
+    def worker_heartbeat(self, pid: int) -> None:
+        """Register a live worker process."""
+        now = time.time()
+        self.conn.execute("INSERT INTO workers (pid, started, heartbeat) VALUES (?, ?, ?) "
+                          "ON CONFLICT(pid) DO UPDATE SET heartbeat = excluded.heartbeat", (pid, now, now))
+
+    def worker_exit(self, pid: int) -> None:
+        """Unregister a worker process."""
+        self.conn.execute("DELETE FROM workers WHERE pid = ?", (pid,))
+
+    def live_workers(self) -> int:
+        """Number of worker processes that sent a heartbeat recently."""
+        return self.conn.execute("SELECT COUNT(*) FROM workers WHERE heartbeat >= ?",
+                                 (time.time() - self.stale_after,)).fetchone()[0]
@@ -0,0 +1,93 @@
+"""Move the vector store to another embedding model, chunker or store configuration, as a background job.
+
+    python -m src.app.features.research_assistant.jobs.migrate --embedding-model BAAI/bge-small-en-v1.5
+    python -m src.app.features.research_assistant.jobs.migrate --chunk-size 384 --chunk-overlap 96 --wait
+    python -m src.app.features.research_assistant.jobs.migrate --backend faiss --index-type ivf
+    python -m src.app.features.research_assistant.jobs.migrate --backend faiss --quantization int8
+    python -m src.app.features.research_assistant.jobs.migrate --activate arxiv_papers_collection
+
+The new collection is built next to the active one, which keeps serving queries, then becomes the active
+collection. The job is resumable: a restarted worker continues from its last checkpoint.
+"""
+import argparse
+import time
+
+from .job_store import JobStore
+from .worker import MIGRATE_JOB, ensure_worker
+from ..processing.collections import active_collection, collection_name, collection_spec, make_spec, \
+    set_active_collection
+from ..processing.manifest import IngestionManifest
+from ..vector_store import BACKENDS, open_store
+
+
+def submit_migration(spec: dict, switch: bool = True, devices: list = None, page_size: int = 1000) -> int:
+    """Queue the migration of the active collection to `spec` and return the job id."""
+    active = active_collection()
+    source = open_store(active["name"], create=False, read_only=True)
+    if active["chunker_version"] != spec["chunker_version"]:
+        mode = "rechunk"
+    elif active["embedding_model"] != spec["embedding_model"]:
+        mode = "reembed"
+    else:
+        mode = "copy"                               # Only the vector store changes: embeddings are reused
+    payload = {"source": active["name"], "spec": spec, "mode": mode, "switch": switch, "devices": devices,
+               "page_size": page_size}
+    total = source.count() if mode != "rechunk" else len(IngestionManifest(active["name"]).ingested_links())
+    store = JobStore()
+    job_id = store.submit(MIGRATE_JOB, collection_name(spec), payload, total_items=total)
+    ensure_worker(store)
+    return job_id
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--embedding-model", help="sentence-transformers model of the new collection")
+    parser.add_argument("--chunk-size", type=int, help="chunk size in tokens")
+    parser.add_argument("--chunk-overlap", type=int, help="chunk overlap in tokens")
+    parser.add_argument("--segmentation-mode", help="sentence segmentation mode")
+    parser.add_argument("--backend", choices=BACKENDS, help="vector store backend")
+    parser.add_argument("--index-type", choices=("flat", "ivf", "hnsw"), help="FAISS index type")
+    parser.add_argument("--quantization", choices=("none", "float16", "int8", "binary"),
+                        help="FAISS index codes, candidates being rescored with the float32 vectors")
+    parser.add_argument("--devices", help="comma separated encoding devices (e.g. cuda:0,cuda:1), one process each")
+    parser.add_argument("--page-size", type=int, default=1000, help="chunks read and written per page")
+    parser.add_argument("--no-switch", action="store_true", help="build the collection without activating it")
+    parser.add_argument("--activate", metavar="COLLECTION", help="make an existing collection the active one")
+    parser.add_argument("--wait", action="store_true", help="follow the job until it finishes")
+    args = parser.parse_args()
+
+    active = active_collection()
+    if args.activate:
+        spec = collection_spec(args.activate)
+        set_active_collection(args.activate, spec)
+        return
+
+    spec = make_spec(embedding_model=args.embedding_model or active["embedding_model"],      # Unset: unchanged
+                     chunk_size=args.chunk_size or active["chunk_size"],
+                     chunk_overlap=args.chunk_overlap if args.chunk_overlap is not None else active["chunk_overlap"],
+                     segmentation_mode=args.segmentation_mode or active["segmentation_mode"],
+                     backend=args.backend or active["backend"], index_type=args.index_type or active["index_type"],
+                     quantization=args.quantization or active["quantization"])
+    if spec["backend"] == "chroma" and spec["quantization"] != "none":
+        parser.error("--quantization needs the FAISS backend (--backend faiss).")
+    if collection_name(spec) == active["name"]:
+        print(f"INFO: -- '{active['name']}' already has this configuration.")
+        return
+
+    job_id = submit_migration(spec, switch=not args.no_switch, page_size=args.page_size,
+                              devices=args.devices.split(",") if args.devices else None)
+    print(f"INFO: -- Migration job {job_id}: '{active['name']}' -> '{collection_name(spec)}' "
+          f"({spec['embedding_model']}, {spec['chunker_version']}, {spec['backend']})")
+    store = JobStore()
+    while args.wait:
+        job = store.get(job_id)
+        print(f"INFO: -- {job['status']} {job['done_items']}/{job['total_items']} {job['message'] or ''}")
+        if job["status"] in ("done", "failed", "cancelled"):
+            if job["error"]:
+                print(f"ERROR: {job['error']}")
+            break
+        time.sleep(10)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+"""Background worker running the jobs queued by the Streamlit sessions (ingestion) and `jobs.migrate` (migrations).
+
+    python -m src.app.features.research_assistant.jobs.worker [--idle-timeout 300]
+
+It is started on demand by `ensure_worker` (from the repository root) and exits after `idle_timeout` seconds
+without jobs. Models are loaded on the first job and kept for the following ones of the same collection.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import traceback
+from typing import Dict, List, Optional
+
+from .job_store import JobStore
+from ..utilities.helper import JOBS_WORKER_LOG
+
+INGEST_JOB = "ingest"
+MIGRATE_JOB = "migrate"
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), *[os.pardir] * 5))
+
+
+class Heartbeat(threading.Thread):
+    """Refresh the worker's and the current job's heartbeats while a long batch runs."""
+
+    def __init__(self, pid: int, interval: float = 10.0):
+        """Initialize the heartbeat thread, with its own database connection."""
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.job_id: Optional[int] = None
+        self.stopped = threading.Event()
+
+    def run(self) -> None:
+        store = JobStore()
+        while not self.stopped.wait(self.interval):
+            store.worker_heartbeat(self.pid)
+            if self.job_id is not None:
+                store.beat(self.job_id)
+
+
+class Worker:
+    """Claim queued jobs one at a time and run them, checkpointing after every batch."""
+
+    def __init__(self, idle_timeout: float = 300.0, poll_interval: float = 2.0):
+        """Initialize the worker, models are only loaded with the first job."""
+        self.pid = os.getpid()
+        self.store = JobStore()
+        self.idle_timeout = idle_timeout
+        self.poll_interval = poll_interval
+        self.document_processor = None
+        self.pipeline = None
+        self.spec: Optional[Dict] = None
+        self.heartbeat = Heartbeat(self.pid)
+
+    def load_models(self, spec: Dict) -> None:
+        """Build the document processor and the ingestion pipeline of a collection configuration (once)."""
+        if self.spec != spec:
+            from ..processing.pipeline import IngestionPipeline
+            from ..processing.preprocessor import DocumentProcessor
+
+            if self.pipeline is not None:
+                self.pipeline.close()
+            self.document_processor = DocumentProcessor(
+                embedding_model=spec["embedding_model"], chunk_size=spec["chunk_size"],
+                chunk_overlap=spec["chunk_overlap"], segmentation_mode=spec["segmentation_mode"])
+            self.pipeline = IngestionPipeline(self.document_processor)
+            self.spec = spec
+
+    def run_ingest(self, job: Dict) -> None:
+        """Ingest the job's PDFs into the active collection (the one it was queued for, unless a migration switched)."""
+        from ..processing.collections import active_collection
+
+        active = active_collection()
+        if active["name"] != job["collection"]:
+            print(f"WARNING: Job {job['id']} was queued for '{job['collection']}', "
+                  f"ingesting into the active collection '{active['name']}'.")
+        urls = job["payload"]["urls"]
+        errors = self.ingest(job, urls, active["name"], {key: value for key, value in active.items() if key != "name"})
+        if errors is not None:
+            self.store.finish(job["id"], "done", error=json.dumps(errors) if errors else None,
+                              message=f"{len(urls) - len(errors)} PDF(s) ingested, {len(errors)} error(s)")
+
+    def ingest(self, job: Dict, urls: List[str], collection: str, spec: Dict) -> Optional[Dict[str, str]]:
+        """Ingest PDFs batch by batch, skipping those already ingested (e.g. before a restart).
+
+        Returns the errors by URL, or None if the job was cancelled.
+        """
+        from ..processing.manifest import IngestionManifest
+        from ..processing.preprocessing import ingest_batch
+        from ..processing.preprocessor import load_document_metadata
+
+        self.load_models(spec)
+        batch_size = job["payload"].get("batch_size", 20)
+        manifest = IngestionManifest(collection)
+        processed = manifest.up_to_date(urls, spec["embedding_model"], spec["chunker_version"])
+        pending = [url for url in urls if url not in processed]
+        errors: Dict[str, str] = job["payload"].get("errors", {})
+        done = len(urls) - len(pending)
+
+        metadata = load_document_metadata(pending)
+        for url in pending:
+            if url not in metadata:
+                errors[url] = "No metadata in the arXiv database"
+        self.document_processor.metadata.update(metadata)
+        pending = [url for url in pending if url in metadata]
+        self.store.checkpoint(job["id"], done, message=f"{len(pending)} PDF(s) to ingest")
+
+        for start in range(0, len(pending), batch_size):
+            if self.store.is_cancelled(job["id"]):
+                self.store.finish(job["id"], "cancelled", message=f"Cancelled after {done} PDF(s)")
+                return None
+            batch = pending[start:start + batch_size]
+            stats = ingest_batch(batch, self.document_processor, self.pipeline, collection_name=collection,
+                                 manifest=manifest)
+            errors.update(stats["errors"])
+            done += len(batch)
+            self.store.checkpoint(job["id"], done,
+                                  message=f"{stats['chunks']} chunks in {stats['seconds']:.0f}s, "
+                                          f"{stats['collection_count']} in the collection",
+                                  payload={**job["payload"], "errors": errors})
+            print(f"INFO: -- Job {job['id']}: {done}/{len(urls)} PDF(s)")
+        return errors
+
+    def run_migrate(self, job: Dict) -> None:
+        """Build the job's collection from the source one, then make it the active collection.
+
+        With the same chunker, the stored chunk texts are re-encoded page by page (`offset` is checkpointed), or
+        their embeddings copied when only the vector store (backend, index, quantization) changes; otherwise the
+        source papers are re-chunked from the PDF cache through the ingestion pipeline. Papers ingested into the
+        source during the copy are copied again before switching.
+        """
+        from ..processing.collections import get_or_create_versioned, set_active_collection
+        from ..processing.manifest import IngestionManifest
+        from ..processing.reembed import Reembedder
+        from ..retrieval import BM25Index
+        from ..utilities.helper import collection_bm25_file
+        from ..vector_store import open_store
+
+        payload = job["payload"]
+        spec, source_name = payload["spec"], payload["source"]
+        payload.setdefault("started", time.time())
+        source, target = open_store(source_name, create=False), get_or_create_versioned(spec)
+        manifest, source_manifest = IngestionManifest(target.name), IngestionManifest(source_name)
+
+        if payload["mode"] in ("reembed", "copy"):
+            reembedder = Reembedder(source, target, spec["embedding_model"] if payload["mode"] == "reembed" else None,
+                                    page_size=payload.get("page_size", 1000), devices=payload.get("devices"))
+
+            def progress(offset: int) -> bool:
+                payload["offset"] = offset
+                self.store.checkpoint(job["id"], offset, message=f"{offset} chunk(s) copied", payload=payload)
+                return not self.store.is_cancelled(job["id"])
+
+            if not reembedder.run(payload.get("offset", 0), progress):
+                target.persist()
+                self.store.finish(job["id"], "cancelled", message=f"Cancelled after {payload['offset']} chunk(s)")
+                return
+            manifest.copy_from(source_name, spec["embedding_model"], spec["chunker_version"],
+                               ingested_before=payload["started"])
+            late = source_manifest.changed_since(source_name, payload["started"])
+            if late:
+                target.delete(where={"arxiv_id": {"$in": late}})       # Their chunk count may have changed
+                reembedder.run(arxiv_ids=late)
+                manifest.copy_from(source_name, spec["embedding_model"], spec["chunker_version"], arxiv_ids=late)
+            self.store.checkpoint(job["id"], job["total_items"], message="Building the indexes")
+            target.persist()
+            BM25Index.from_collection(target).save(collection_bm25_file(target.name))
+        else:
+            errors = self.ingest(job, source_manifest.ingested_links(), target.name, spec)
+            if errors is None:
+                return
+            late = self.ingest(job, source_manifest.ingested_links(), target.name, spec)    # Ingested during the copy
+            if late is None:
+                return
+            payload["errors"] = {**errors, **late}
+
+        message = f"{target.count()} chunk(s) in '{target.name}'"
+        if payload.get("switch", True):
+            set_active_collection(target.name, spec, previous=source_name)
+            message += ", now the active collection"
+        self.store.finish(job["id"], "done", message=message,
+                          error=json.dumps(payload["errors"]) if payload.get("errors") else None)
+
+    def run_job(self, job: Dict) -> None:
+        """Run a claimed job and record its outcome."""
+        print(f"\n === Job {job['id']} ({job['kind']}, {job['collection']}) ===\n")
+        self.heartbeat.job_id = job["id"]
+        try:
+            if job["kind"] == INGEST_JOB:
+                self.run_ingest(job)
+            elif job["kind"] == MIGRATE_JOB:
+                self.run_migrate(job)
+            else:
+                self.store.finish(job["id"], "failed", error=f"Unknown job kind '{job['kind']}'")
+        except Exception as e:
+            traceback.print_exc()
+            self.store.finish(job["id"], "failed", error=f"{type(e).__name__}: {e}")
+        finally:
+            self.heartbeat.job_id = None
+
+    def run(self) -> None:
+        """Process jobs until none is queued for `idle_timeout` seconds."""
+        self.store.worker_heartbeat(self.pid)
+        self.store.worker_exit(-1)          # Drop the registration made by `ensure_worker` on our behalf
+        self.heartbeat.start()
+        idle_since = time.monotonic()
+        try:
+            while time.monotonic() - idle_since < self.idle_timeout:
+                job = self.store.claim(self.pid)
+                if job is None:
+                    time.sleep(self.poll_interval)
+                    continue
+                self.run_job(job)
+                idle_since = time.monotonic()
+        finally:
+            self.heartbeat.stopped.set()
+            if self.pipeline is not None:
+                self.pipeline.close()
+            self.store.worker_exit(self.pid)
+
+
+def ensure_worker(store: Optional[JobStore] = None) -> bool:
+    """Start a detached worker process if none is alive; return whether one was started."""
+    store = store or JobStore()
+    if store.live_workers():
+        return False
+    store.worker_heartbeat(-1)          # Placeholder registration, so that concurrent sessions do not spawn twice
+    os.makedirs(os.path.dirname(JOBS_WORKER_LOG), exist_ok=True)
+    with open(JOBS_WORKER_LOG, "a") as log:
+        subprocess.Popen([sys.executable, "-m", "src.app.features.research_assistant.jobs.worker"],
+                         cwd=PROJECT_ROOT, stdout=log, stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL,
+                         start_new_session=True)
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--idle-timeout", type=float, default=300.0, help="seconds without jobs before exiting")
+    args = parser.parse_args()
+    Worker(idle_timeout=args.idle_timeout).run()
+
+
+if __name__ == "__main__":
+    main()
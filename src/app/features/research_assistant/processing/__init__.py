@@ -1,4 +1,13 @@
-from .preprocessor import DocumentProcessor
-from .store_manager import store_management
+import importlib
 
-__all__ = ["DocumentProcessor", 'store_management']
\ No newline at end of file
+_EXPORTS = {"DocumentProcessor": ".preprocessor", "store_management": ".store_manager"}
+
+__all__ = ["DocumentProcessor", 'store_management']
+
+
+def __getattr__(name):
+    """Import the exported names on first use: the worker processes of the ingestion pipeline only import their
+    modules."""
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,102 @@
+from collections import deque
+from typing import Deque, List, Tuple
+
+TOKENIZER_NAME = "distilbert-base-uncased"
+CHUNKER_REVISION = 1            # Bump when the segmentation or packing logic changes the chunks produced
+
+
+def chunker_version(chunk_size: int = 512, chunk_overlap: int = 206, segmentation_mode: str = "senter") -> str:
+    """Fingerprint of the chunking configuration, recorded with the ingested documents."""
+    return f"v{CHUNKER_REVISION}:{TOKENIZER_NAME}:{segmentation_mode}:{chunk_size}/{chunk_overlap}"
+
+
+class TokenChunker:
+    """Pack text segments into token-limited, overlapping chunks in a single pass."""
+
+    def __init__(self, tokenizer, chunk_size: int = 512, chunk_overlap: int = 206):
+        """Initialize the chunker with a Hugging Face tokenizer and the chunk limits (in tokens)."""
+        if chunk_overlap >= chunk_size:
+            raise ValueError("chunk_overlap must be smaller than chunk_size.")
+        self.tokenizer = tokenizer
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+
+    def count_tokens(self, text: str) -> int:
+        """Count the tokens of a text (without special tokens)."""
+        return len(self.tokenizer.tokenize(text))
+
+    def split(self, segments: List[str]) -> List[str]:
+        """Split a sequence of segments (sentences, paragraphs) into chunks of at most `chunk_size` tokens.
+
+        Each segment is tokenized exactly once and the size of the current chunk is kept as a running count.
+        When a chunk is flushed, its trailing segments fitting in `chunk_overlap` tokens open the next chunk.
+        """
+        chunks = []
+        window: Deque[Tuple[str, int]] = deque()
+        window_tokens, has_new_content = 0, False
+
+        for segment in segments:
+            segment = segment.strip()
+            if not segment:
+                continue
+            token_count = self.count_tokens(segment)
+
+            if token_count > self.chunk_size:           # Oversized segment: flush, then hard split it
+                if has_new_content:
+                    chunks.append(self.join(window))
+                chunks.extend(self.split_long_segment(segment))
+                window.clear()
+                window_tokens, has_new_content = 0, False
+                continue
+
+            if window_tokens + token_count > self.chunk_size and has_new_content:
+                chunks.append(self.join(window))
+                window, window_tokens = self.overlap_tail(window)
+                has_new_content = False
+
+            while window and window_tokens + token_count > self.chunk_size:    # Shrink the overlap if needed
+                window_tokens -= window.popleft()[1]
+
+            window.append((segment, token_count))
+            window_tokens += token_count
+            has_new_content = True
+
+        if has_new_content:
+            chunks.append(self.join(window))
+        return chunks
+
+    def overlap_tail(self, window: Deque[Tuple[str, int]]) -> Tuple[Deque[Tuple[str, int]], int]:
+        """Keep the trailing segments of a flushed chunk that fit in the overlap budget."""
+        tail: Deque[Tuple[str, int]] = deque()
+        tail_tokens = 0
+        for segment, token_count in reversed(window):
+            if tail_tokens + token_count > self.chunk_overlap:
+                break
+            tail.appendleft((segment, token_count))
+            tail_tokens += token_count
+        return tail, tail_tokens
+
+    def split_long_segment(self, segment: str) -> List[str]:
+        """Split a segment longer than `chunk_size` on word boundaries, honoring the overlap."""
+        words = [(word, self.count_tokens(word)) for word in segment.split()]
+        chunks, start = [], 0
+        while start < len(words):
+            end, tokens = start, 0
+            while end < len(words) and (tokens + words[end][1] <= self.chunk_size or end == start):
+                tokens += words[end][1]
+                end += 1
+            chunks.append(" ".join(word for word, _ in words[start:end]))
+            if end >= len(words):
+                break
+
+            overlap_start, overlap_tokens = end, 0      # Step back over the words fitting in the overlap
+            while overlap_start - 1 > start and overlap_tokens + words[overlap_start - 1][1] <= self.chunk_overlap:
+                overlap_start -= 1
+                overlap_tokens += words[overlap_start][1]
+            start = overlap_start
+        return chunks
+
+    @staticmethod
+    def join(window: Deque[Tuple[str, int]]) -> str:
+        """Join the segments of a window into a chunk text."""
+        return " ".join(segment for segment, _ in window)
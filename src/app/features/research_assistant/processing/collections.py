@@ -0,0 +1,78 @@
+import hashlib
+import json
+import os
+from typing import Dict, Optional
+
+from .chunker import chunker_version
+from .preprocessor import DEFAULT_EMBEDDING_MODEL
+from ..utilities.helper import ACTIVE_COLLECTION_FILE, COLLECTION_NAME, bump_collection_version
+from ..vector_store import VectorStore, open_store
+
+DEFAULT_SPEC = {
+    "embedding_model": DEFAULT_EMBEDDING_MODEL,
+    "chunk_size": 512,
+    "chunk_overlap": 206,
+    "segmentation_mode": "senter",
+    "backend": "chroma",
+    "index_type": "hnsw",           # FAISS index (flat, ivf or hnsw), Chroma always uses HNSW
+    "quantization": "none",         # FAISS index codes (none, float16, int8 or binary), rescored in float32
+}
+
+
+def make_spec(embedding_model: str = None, chunk_size: int = None, chunk_overlap: int = None,
+              segmentation_mode: str = None, backend: str = None, index_type: str = None,
+              quantization: str = None) -> Dict:
+    """Configuration of a collection (embedding model, chunker and store), unset fields taking their default."""
+    values = {"embedding_model": embedding_model, "chunk_size": chunk_size, "chunk_overlap": chunk_overlap,
+              "segmentation_mode": segmentation_mode, "backend": backend, "index_type": index_type,
+              "quantization": quantization}
+    spec = {key: default if values[key] is None else values[key] for key, default in DEFAULT_SPEC.items()}
+    spec["chunker_version"] = chunker_version(spec["chunk_size"], spec["chunk_overlap"], spec["segmentation_mode"])
+    return spec
+
+
+def collection_name(spec: Dict) -> str:
+    """Name of the collection holding the vectors of a configuration (`arxiv_papers_<hash>`)."""
+    key = f"{spec['embedding_model']}|{spec['chunker_version']}"
+    if spec.get("backend", "chroma") != "chroma":                   # Chroma collections keep their names
+        key += f"|{spec['backend']}:{spec['index_type']}"
+    if spec.get("quantization", "none") != "none":
+        key += f"|q:{spec['quantization']}"
+    return f"arxiv_papers_{hashlib.sha1(key.encode()).hexdigest()[:12]}"
+
+
+def collection_spec(name: str) -> Dict:
+    """Configuration stored with a collection; the original, unversioned collection has the default one."""
+    metadata = open_store(name, create=False, read_only=True).metadata
+    return make_spec(**{key: metadata.get(key) for key in DEFAULT_SPEC})
+
+
+def get_or_create_versioned(spec: Dict) -> VectorStore:
+    """Get the collection of a configuration, creating it with its configuration as metadata."""
+    return open_store(collection_name(spec), backend=spec["backend"], index_type=spec["index_type"],
+                      quantization=spec["quantization"], metadata={key: spec[key] for key in DEFAULT_SPEC})
+
+
+def active_collection() -> Dict:
+    """The collection queried and ingested into: `{"name", **spec}`."""
+    try:
+        with open(ACTIVE_COLLECTION_FILE, "r") as f:
+            return {**make_spec(), **json.load(f)}          # Files written before a spec field existed
+    except (OSError, ValueError):
+        return {"name": COLLECTION_NAME, **make_spec()}
+
+
+def set_active_collection(name: str, spec: Dict, previous: Optional[str] = None) -> None:
+    """Atomically point the app (retrieval and ingestion) to another collection.
+
+    With `previous`, the switch only happens if it is still the active collection.
+    """
+    if previous is not None and active_collection()["name"] != previous:
+        raise RuntimeError(f"The active collection changed during the migration (expected '{previous}').")
+    tmp_file = f"{ACTIVE_COLLECTION_FILE}.tmp"
+    with open(tmp_file, "w") as f:
+        json.dump({"name": name, **spec}, f, indent=2)
+    os.replace(tmp_file, ACTIVE_COLLECTION_FILE)
+    bump_collection_version()
+    print(f"INFO: -- Active collection: {name} ({spec['embedding_model']}, {spec['chunker_version']}, "
+          f"{spec['backend']})")
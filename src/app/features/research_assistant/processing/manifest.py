@@ -0,0 +1,219 @@
+import os
+import re
+import sqlite3
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set
+
+from ..utilities.helper import ARXIV_DB_FILE, COLLECTION_NAME, PROCESSED_PDFS_FILE
+
+# Version-less arXiv id, as `IngestionManifest.paper`: 2410.12345v2 -> 2410.12345, 2410.12345 unchanged
+_ENTRY_ID_SQL = ("substr(rtrim(e.id, '/'), instr(rtrim(e.id, '/'), '/abs/') "
+                 "+ 5 * (instr(rtrim(e.id, '/'), '/abs/') > 0))")
+_STEM_SQL = f"rtrim({_ENTRY_ID_SQL}, '0123456789')"
+SHORT_ID_SQL = (f"CASE WHEN substr({_STEM_SQL}, -1) = 'v' AND length({_STEM_SQL}) < length({_ENTRY_ID_SQL}) "
+                f"THEN substr({_STEM_SQL}, 1, length({_STEM_SQL}) - 1) ELSE {_ENTRY_ID_SQL} END")
+
+
+class IngestionManifest:
+    """Per-paper record of what is in a collection of the vector store, kept next to the arXiv entries.
+
+    One row per collection and paper (version-less arXiv id, as in the chunk ids) holds the ingested version,
+    its chunk count, the embedding model and chunker version used, and a status. Pending documents are found
+    with a single anti-join against `arxiv_entries`: papers never ingested, failed, revised since (`updated`
+    changed) or ingested with another embedding model or chunker.
+    """
+
+    CREATE_TABLE_QUERY = """
+    CREATE TABLE IF NOT EXISTS ingestion_manifest (
+        collection TEXT NOT NULL,
+        arxiv_id TEXT NOT NULL,
+        entry_id TEXT NOT NULL,
+        version TEXT,
+        updated TEXT,
+        pdf_link TEXT,
+        chunk_count INTEGER,
+        embedding_model TEXT,
+        chunker_version TEXT,
+        status TEXT NOT NULL,
+        error TEXT,
+        created REAL NOT NULL,
+        ingested REAL,
+        PRIMARY KEY (collection, arxiv_id)
+    )
+    """
+
+    CREATE_INDEX_QUERY = """
+    CREATE INDEX IF NOT EXISTS ingestion_manifest_link ON ingestion_manifest (pdf_link, collection)
+    """
+
+    CREATE_ENTRIES_INDEX_QUERY = f"""
+    CREATE INDEX IF NOT EXISTS arxiv_entries_paper ON arxiv_entries ({SHORT_ID_SQL.replace('e.id', 'id')}, updated)
+    """         # Lets the pending query group the versions of each paper without sorting the whole table
+
+    UPSERT_QUERY = """
+    INSERT INTO ingestion_manifest (collection, arxiv_id, entry_id, version, updated, pdf_link, chunk_count,
+                                    embedding_model, chunker_version, status, error, created, ingested)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(collection, arxiv_id) DO UPDATE SET
+        entry_id = excluded.entry_id, version = excluded.version, updated = excluded.updated,
+        pdf_link = excluded.pdf_link, chunk_count = excluded.chunk_count, embedding_model = excluded.embedding_model,
+        chunker_version = excluded.chunker_version, status = excluded.status, error = excluded.error,
+        ingested = excluded.ingested
+    """
+
+    PENDING_QUERY = f"""
+    SELECT e.pdf_link,
+           CASE WHEN m.arxiv_id IS NULL THEN 'new'
+                WHEN m.status != 'done' THEN m.status
+                WHEN m.updated IS NOT e.updated THEN 'updated'
+                WHEN m.embedding_model IS NOT ? THEN 'embedding model changed'
+                ELSE 'chunker changed' END AS reason
+    FROM (SELECT *, MAX(updated) FROM arxiv_entries AS e
+          WHERE e.pdf_link IS NOT NULL GROUP BY {SHORT_ID_SQL}) AS e           -- Latest version of each paper
+    LEFT JOIN ingestion_manifest AS m ON m.collection = ? AND m.arxiv_id = {SHORT_ID_SQL}
+    WHERE m.arxiv_id IS NULL
+       OR (m.status != 'done' AND (m.status != 'failed' OR ?))
+       OR (m.status = 'done' AND (m.updated IS NOT e.updated OR m.embedding_model IS NOT ?
+                                  OR m.chunker_version IS NOT ?))
+    ORDER BY e.published DESC
+    """
+
+    def __init__(self, collection: str = COLLECTION_NAME, db_name: str = ARXIV_DB_FILE,
+                 migrate_from: str = PROCESSED_PDFS_FILE):
+        """Open the manifest of a collection (creating it if needed) and import the legacy list of processed PDFs."""
+        self.collection = collection
+        self.db_name = db_name
+        self.conn = sqlite3.connect(db_name, timeout=30, check_same_thread=False)
+        with self.conn:
+            self.conn.execute(self.CREATE_TABLE_QUERY)
+            self.conn.execute(self.CREATE_INDEX_QUERY)
+            if self.conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'arxiv_entries'").fetchone():
+                self.conn.execute(self.CREATE_ENTRIES_INDEX_QUERY)
+        if migrate_from and os.path.exists(migrate_from):
+            self.migrate(migrate_from)
+
+    @staticmethod
+    def paper(metadata: Dict) -> Dict:
+        """Manifest identity of a document from its arXiv metadata."""
+        short_id = metadata["id"].rstrip("/").split("/abs/")[-1]
+        version = re.search(r"v\d+$", short_id)
+        return {
+            "arxiv_id": short_id[:version.start()] if version else short_id,
+            "entry_id": metadata["id"],
+            "version": version.group() if version else None,
+            "updated": metadata.get("updated"),
+            "pdf_link": metadata.get("pdf_link"),
+        }
+
+    def record(self, metadatas: Iterable[Dict], status: str = "done", chunk_counts: Dict[str, int] = None,
+               embedding_model: str = None, chunker_version: str = None, errors: Dict[str, str] = None,
+               collection: str = None) -> None:
+        """Upsert the manifest rows of several documents in one transaction.
+
+        `chunk_counts` is keyed by arXiv id (missing papers have no chunks), `errors` by PDF link.
+        """
+        now = time.time()
+        rows = []
+        for metadata in metadatas:
+            paper = self.paper(metadata)
+            chunk_count = None if chunk_counts is None else chunk_counts.get(paper["arxiv_id"], 0)
+            rows.append((collection or self.collection, paper["arxiv_id"], paper["entry_id"], paper["version"],
+                         paper["updated"], paper["pdf_link"], chunk_count, embedding_model, chunker_version, status,
+                         (errors or {}).get(paper["pdf_link"]), now, now if status == "done" else None))
+        with self.conn:
+            self.conn.executemany(self.UPSERT_QUERY, rows)
+
+    def record_chunks(self, chunks: List[Dict], metadatas: Dict[str, Dict], embedding_model: str,
+                      chunker_version: str) -> None:
+        """Mark the papers of a batch of written chunks as ingested (`metadatas` is keyed by PDF link)."""
+        chunk_counts = Counter(chunk["metadata"]["arxiv_id"] for chunk in chunks)
+        links = {chunk["metadata"].get("pdf_link") for chunk in chunks}
+        self.record([metadatas[link] for link in links if link in metadatas], chunk_counts=chunk_counts,
+                    embedding_model=embedding_model, chunker_version=chunker_version)
+
+    def pending(self, embedding_model: str, chunker_version: str, retry_failed: bool = False,
+                limit: Optional[int] = None) -> List[Dict[str, str]]:
+        """PDF links to (re-)ingest with the reason why, most recently published first."""
+        query = self.PENDING_QUERY + (f" LIMIT {int(limit)}" if limit else "")
+        rows = self.conn.execute(query, (embedding_model, self.collection, retry_failed, embedding_model,
+                                         chunker_version))
+        return [{"pdf_link": pdf_link, "reason": reason} for pdf_link, reason in rows]
+
+    def up_to_date(self, pdf_links: List[str], embedding_model: str, chunker_version: str) -> Set[str]:
+        """The given PDF links already ingested in their current version with this model and chunker."""
+        done = set()
+        for start in range(0, len(pdf_links), 500):
+            batch = pdf_links[start:start + 500]
+            rows = self.conn.execute(
+                f"SELECT pdf_link FROM ingestion_manifest WHERE pdf_link IN ({', '.join('?' * len(batch))}) "
+                "AND collection = ? AND status = 'done' AND embedding_model = ? AND chunker_version = ?",
+                (*batch, self.collection, embedding_model, chunker_version))
+            done.update(row[0] for row in rows)
+        return done
+
+    def ingested_links(self, limit: Optional[int] = None) -> List[str]:
+        """PDF links of the ingested documents, in ingestion order."""
+        query = "SELECT pdf_link FROM ingestion_manifest WHERE collection = ? AND status = 'done' ORDER BY ingested"
+        return [row[0] for row in self.conn.execute(query + (f" LIMIT {int(limit)}" if limit else ""),
+                                                    (self.collection,))]
+
+    def counts(self) -> Dict[str, int]:
+        """Number of papers per status."""
+        return dict(self.conn.execute("SELECT status, COUNT(*) FROM ingestion_manifest WHERE collection = ? "
+                                      "GROUP BY status", (self.collection,)))
+
+    def flag(self, pdf_links: List[str]) -> None:
+        """Force the re-ingestion of documents."""
+        with self.conn:
+            self.conn.executemany(
+                "UPDATE ingestion_manifest SET status = 'reingest' WHERE collection = ? AND pdf_link = ?",
+                ((self.collection, link) for link in pdf_links))
+
+    def changed_since(self, source: str, since: float) -> List[str]:
+        """ArXiv ids of the papers (re-)ingested into another collection after `since`."""
+        return [row[0] for row in self.conn.execute(
+            "SELECT arxiv_id FROM ingestion_manifest WHERE collection = ? AND status = 'done' AND ingested > ?",
+            (source, since))]
+
+    def copy_from(self, source: str, embedding_model: str, chunker_version: str, arxiv_ids: List[str] = None,
+                  ingested_before: float = None) -> int:
+        """Record the papers of another collection as ingested here (their chunks were copied by a migration)."""
+        query = ("INSERT OR REPLACE INTO ingestion_manifest SELECT ?, arxiv_id, entry_id, version, updated, pdf_link, "
+                 "chunk_count, ?, ?, status, error, created, ? FROM ingestion_manifest "
+                 "WHERE collection = ? AND status = 'done'")
+        params = [self.collection, embedding_model, chunker_version, time.time(), source]
+        if ingested_before is not None:
+            query += " AND ingested <= ?"
+            params.append(ingested_before)
+        with self.conn:
+            if arxiv_ids is None:
+                return self.conn.execute(query, params).rowcount
+            return sum(self.conn.execute(query + f" AND arxiv_id IN ({', '.join('?' * len(batch))})",
+                                         params + batch).rowcount
+                       for batch in (arxiv_ids[start:start + 500] for start in range(0, len(arxiv_ids), 500)))
+
+    def migrate(self, pickle_file: str) -> None:
+        """Import the legacy `processed_pdfs.pkl` list, then rename it so that it is imported only once.
+
+        The papers are assumed to be ingested with the current embedding model and chunker (the only ones
+        used at the time), so importing does not trigger a re-ingestion.
+        """
+        from .chunker import chunker_version
+        from .preprocessor import DEFAULT_EMBEDDING_MODEL
+        from ..utilities.helper import load_processed_pdfs
+
+        links = load_processed_pdfs()
+        self.conn.row_factory = sqlite3.Row
+        try:
+            metadatas = []
+            for start in range(0, len(links), 500):
+                batch = links[start:start + 500]
+                metadatas.extend(dict(row) for row in self.conn.execute(
+                    f"SELECT * FROM arxiv_entries WHERE pdf_link IN ({', '.join('?' * len(batch))})", batch))
+        finally:
+            self.conn.row_factory = None
+        self.record(metadatas, embedding_model=DEFAULT_EMBEDDING_MODEL, chunker_version=chunker_version(),
+                    collection=COLLECTION_NAME)         # Processed PDFs were all written to the original collection
+        os.replace(pickle_file, f"{pickle_file}.migrated")
+        print(f"INFO: -- {len(metadatas)} of {len(links)} processed PDF(s) imported into the ingestion manifest.")
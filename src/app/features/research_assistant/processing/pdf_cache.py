@@ -0,0 +1,139 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from ..utilities.helper import PDF_CACHE_DIR
+
+MAX_CACHE_BYTES = 5 * 1024 ** 3
+DOWNLOAD_TIMEOUT = 60           # Seconds without data before a download is abandoned
+
+
+def arxiv_short_id(arxiv_id: str) -> str:
+    """Turn an arXiv entry id (`http://arxiv.org/abs/2410.12345v2`) into `2410.12345v2`."""
+    return arxiv_id.rstrip("/").split("/abs/")[-1]
+
+
+class PDFCache:
+    """On-disk cache of arXiv PDFs and of their extracted page text, with size-based LRU eviction.
+
+    Entries are keyed by arXiv id + version (and the `updated` timestamp), so a revised paper gets a new entry.
+    Recency is tracked with file modification times, refreshed on every hit.
+    """
+
+    def __init__(self, cache_dir: str = PDF_CACHE_DIR, max_bytes: int = MAX_CACHE_BYTES,
+                 timeout: float = DOWNLOAD_TIMEOUT):
+        """Initialize the cache directory and compute its current size."""
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.size = sum(os.path.getsize(os.path.join(self.cache_dir, name)) for name in os.listdir(self.cache_dir))
+
+    @staticmethod
+    def key(metadata: Dict) -> str:
+        """Build the cache key of a document from its `id` and `updated` fields."""
+        short_id = arxiv_short_id(metadata["id"]).replace("/", "_")
+        version = hashlib.sha1(str(metadata.get("updated", "")).encode()).hexdigest()[:10]
+        return f"{short_id}_{version}"
+
+    def pdf_path(self, metadata: Dict) -> str:
+        """Path of the cached PDF of a document."""
+        return os.path.join(self.cache_dir, f"{self.key(metadata)}.pdf")
+
+    def pages_path(self, metadata: Dict) -> str:
+        """Path of the cached page text of a document."""
+        return os.path.join(self.cache_dir, f"{self.key(metadata)}.pages.json")
+
+    def touch(self, path: str) -> bool:
+        """Mark a cached file as recently used, return False if it is not cached."""
+        try:
+            os.utime(path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def fetch(self, url: str, metadata: Dict) -> str:
+        """Return the local path of a PDF, downloading it on a cache miss."""
+        path = self.pdf_path(metadata)
+        if self.touch(path):
+            return path
+
+        tmp_path = f"{path}.{threading.get_ident()}.part"
+        try:
+            with urllib.request.urlopen(url, timeout=self.timeout) as response, open(tmp_path, "wb") as f:
+                shutil.copyfileobj(response, f)
+            os.replace(tmp_path, path)          # Atomic: readers never see a partial PDF
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        self.added(os.path.getsize(path))
+        return path
+
+    def get_pages(self, metadata: Dict) -> Optional[List[str]]:
+        """Return the cached page text of a document, or None."""
+        path = self.pages_path(metadata)
+        if not self.touch(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def put_pages(self, metadata: Dict, pages: List[str]) -> None:
+        """Store the extracted page text of a document."""
+        write_pages(self.pages_path(metadata), pages)
+        self.added(os.path.getsize(self.pages_path(metadata)))
+
+    def added(self, size: int) -> None:
+        """Account for a new file and evict the least recently used entries if the cache is full."""
+        with self.lock:
+            self.size += size
+            if self.size > self.max_bytes:
+                self.evict()
+
+    def evict(self) -> None:
+        """Remove the least recently used files until the cache fits in `max_bytes`."""
+        files = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".part"):
+                continue
+            stat = os.stat(os.path.join(self.cache_dir, name))
+            files.append((stat.st_mtime, stat.st_size, name))
+
+        self.size = sum(size for _, size, _ in files)
+        for _, size, name in sorted(files):
+            if self.size <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+                self.size -= size
+            except FileNotFoundError:
+                pass
+
+    def prefetch(self, urls: List[str], metadata: Dict[str, Dict], workers: int = 8) -> Dict[str, str]:
+        """Download the PDFs of `urls` ahead of vectorization, return the errors by URL."""
+        errors = {}
+
+        def download(url):
+            try:
+                self.fetch(url, metadata[url])
+            except Exception as e:
+                logging.error(f"Error prefetching {url}: {e}")
+                errors[url] = str(e)
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(download, urls))
+        return errors
+
+
+def write_pages(path: str, pages: List[str]) -> None:
+    """Atomically write extracted page text to `path`."""
+    tmp_path = f"{path}.{os.getpid()}.part"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(pages, f)
+    os.replace(tmp_path, path)
@@ -0,0 +1,209 @@
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Executor, FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .chunker import TOKENIZER_NAME, TokenChunker
+from .pdf_cache import PDFCache, write_pages
+from .segmenter import SentenceSegmenter
+from ..utilities.model_registry import get_tokenizer
+
+CPU_COUNT = os.cpu_count() or 1
+DOWNLOAD_WORKERS = 8
+EXTRACT_WORKERS = max(1, CPU_COUNT // 2)
+CHUNK_WORKERS = max(1, CPU_COUNT // 2)
+QUEUE_SIZE = 16
+
+_STOP = object()        # End of stream marker passed between stages
+_worker_segmenter: Optional[SentenceSegmenter] = None
+_worker_chunker: Optional[TokenChunker] = None
+
+
+def extract_pages(paths: Tuple[str, str]) -> List[str]:
+    """Extract the text of each page of a local PDF, reusing the cached text if any (runs in a worker process)."""
+    pdf_path, pages_path = paths
+    if os.path.exists(pages_path):
+        with open(pages_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    from langchain_community.document_loaders import PyPDFLoader
+
+    pages = [doc.page_content for doc in PyPDFLoader(pdf_path).load()]
+    write_pages(pages_path, pages)
+    return pages
+
+
+def init_chunk_worker(segmentation_mode: str, chunk_size: int, chunk_overlap: int) -> None:
+    """Load the sentence pipeline and the tokenizer once per chunking worker process."""
+    global _worker_segmenter, _worker_chunker
+    _worker_segmenter = SentenceSegmenter(mode=segmentation_mode)
+    _worker_chunker = TokenChunker(get_tokenizer(TOKENIZER_NAME), chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+
+
+def chunk_pages(pages: List[str]) -> List[str]:
+    """Segment pages into sentences and pack them into token-limited chunks (runs in a worker process)."""
+    return _worker_chunker.split(_worker_segmenter.split(pages))
+
+
+class IngestionPipeline:
+    """Staged PDF ingestion: download (cached) → text extraction → segmentation/chunking → batched embedding
+    → store write.
+
+    Downloads run in a thread pool, extraction and chunking in process pools, embedding and writing in the
+    calling process. Stages are connected by bounded queues, so a slow stage applies backpressure upstream.
+    PDFs and their extracted text go through the `PDFCache`, so re-ingesting a document needs no network I/O.
+    """
+
+    def __init__(self, document_processor, download_workers: int = DOWNLOAD_WORKERS,
+                 extract_workers: int = EXTRACT_WORKERS, chunk_workers: int = CHUNK_WORKERS,
+                 queue_size: int = QUEUE_SIZE, embed_batch_chunks: int = 512,
+                 pdf_cache: Optional[PDFCache] = None):
+        """Initialize the pipeline and its worker pools."""
+        self.document_processor = document_processor
+        self.pdf_cache = pdf_cache or document_processor.pdf_cache
+        self.queue_size = queue_size
+        self.embed_batch_chunks = embed_batch_chunks
+        self.workers = {"download": download_workers, "extract": extract_workers, "chunk": chunk_workers}
+
+        context = multiprocessing.get_context("spawn")      # Avoid forking a process holding torch threads
+        self.download_pool = ThreadPoolExecutor(max_workers=download_workers)
+        self.extract_pool = ProcessPoolExecutor(max_workers=extract_workers, mp_context=context)
+        self.chunk_pool = ProcessPoolExecutor(
+            max_workers=chunk_workers, mp_context=context, initializer=init_chunk_worker,
+            initargs=(document_processor.segmentation_mode, document_processor.chunk_size,
+                      document_processor.chunk_overlap)
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self) -> None:
+        """Shut down the worker pools."""
+        for pool in (self.download_pool, self.extract_pool, self.chunk_pool):
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def run_stage(self, name: str, func: Callable, executor: Executor, inbox: queue.Queue, outbox: queue.Queue,
+                  errors: Dict[str, str], cancelled: threading.Event) -> None:
+        """Feed `(url, payload)` items from `inbox` to `executor` and push `(url, result)` items to `outbox`.
+
+        The end of stream marker is always passed on. Once the executor rejects a task (e.g. a broken process
+        pool), the remaining items are recorded as errors; once the run is cancelled, they are dropped.
+        """
+        in_flight = {}
+        max_in_flight = 2 * self.workers[name]
+        failure = None
+
+        def drain(done):
+            for future in done:
+                url = in_flight.pop(future)
+                try:
+                    outbox.put((url, future.result()))
+                except Exception as e:
+                    logging.error(f"[{name}] Error processing {url}: {e}")
+                    errors[url] = f"{name}: {e}"
+
+        try:
+            while True:
+                item = inbox.get()
+                if item is _STOP:
+                    break
+                url, payload = item
+                if cancelled.is_set():
+                    continue
+                if failure is not None:
+                    errors[url] = f"{name}: {failure}"
+                    continue
+                if len(in_flight) >= max_in_flight:
+                    drain(wait(in_flight, return_when=FIRST_COMPLETED).done)
+                try:
+                    in_flight[executor.submit(func, payload)] = url
+                except Exception as e:
+                    logging.error(f"[{name}] Cannot submit {url}: {e}")
+                    failure = e
+                    errors[url] = f"{name}: {e}"
+
+            drain(wait(in_flight).done)
+        finally:
+            outbox.put(_STOP)
+
+    def download(self, url: str, metadata: Dict) -> Tuple[str, str]:
+        """Fetch a PDF through the cache, skipping the download when its page text is already cached."""
+        pages_path = self.pdf_cache.pages_path(metadata)
+        if self.pdf_cache.touch(pages_path):
+            return self.pdf_cache.pdf_path(metadata), pages_path
+        return self.pdf_cache.fetch(url, metadata), pages_path
+
+    @staticmethod
+    def feed(urls: List[str], outbox: queue.Queue, cancelled: threading.Event) -> None:
+        """Push the URLs to download into the first stage, then the end of stream marker."""
+        for url in urls:
+            if cancelled.is_set():
+                break
+            outbox.put((url, url))
+        outbox.put(_STOP)
+
+    def run(self, urls: List[str], write: Callable[[List[Dict]], None]) -> Dict:
+        """Ingest `urls`, calling `write` with each batch of embedded chunks, and return run statistics."""
+        start = time.perf_counter()
+        metadata = {url: self.document_processor.get_document_metadata(url) for url in urls}
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in range(4)]
+        to_download, downloaded, extracted, chunked = queues
+        errors: Dict[str, str] = {}
+        stats = {"documents": 0, "chunks": 0}
+        cancelled = threading.Event()
+
+        stages = [
+            threading.Thread(target=self.run_stage, daemon=True, args=(
+                "download", lambda url: self.download(url, metadata[url]), self.download_pool,
+                to_download, downloaded, errors, cancelled)),
+            threading.Thread(target=self.run_stage, daemon=True, args=(
+                "extract", extract_pages, self.extract_pool, downloaded, extracted, errors, cancelled)),
+            threading.Thread(target=self.run_stage, daemon=True, args=(
+                "chunk", chunk_pages, self.chunk_pool, extracted, chunked, errors, cancelled)),
+        ]
+        for stage in stages:
+            stage.start()
+
+        threading.Thread(target=self.feed, args=(urls, to_download, cancelled), daemon=True).start()
+
+        pending: List[Dict] = []
+        item = None
+        try:
+            while True:                                 # Embedding and store writing stay in this process
+                item = chunked.get()
+                if item is _STOP:
+                    break
+                url, chunk_texts = item
+                pending.extend(self.document_processor.create_chunk(text, chunk_index, metadata[url])
+                               for chunk_index, text in enumerate(chunk_texts, 1))
+                stats["documents"] += 1
+                if len(pending) >= self.embed_batch_chunks:
+                    stats["chunks"] += self.flush(pending, write)
+                    pending = []
+            stats["chunks"] += self.flush(pending, write)
+        finally:
+            if item is not _STOP:                       # Failed: stop the stages and unblock their queues
+                cancelled.set()
+                while item is not _STOP:
+                    item = chunked.get()
+            for stage in stages:
+                stage.join()
+
+        self.pdf_cache.evict()              # Account for the page text written by the extraction workers
+        stats["errors"] = errors
+        stats["seconds"] = time.perf_counter() - start
+        return stats
+
+    def flush(self, chunks: List[Dict], write: Callable[[List[Dict]], None]) -> int:
+        """Embed a batch of chunks and hand it to the store writer."""
+        if chunks:
+            write(self.document_processor.embed_chunks(chunks))
+        return len(chunks)
@@ -1,46 +1,43 @@
-import gc
-from typing import List
-
-import chromadb
-import streamlit as st
+from typing import Dict, List, Optional
 
+from ..processing.manifest import IngestionManifest
+from ..processing.pipeline import IngestionPipeline
 from ..processing.preprocessor import DocumentProcessor
-from ..utilities import save_processed_pdfs
-from ..utilities.helper import VECTOR_STORE_FILE
-
-
-def create_batches(urls: List[str], batch_size_percentage: int) -> List[List[str]]:
-    """Split URLs into batches based on a percentage size."""
-    batch_size = max(1, len(urls) * batch_size_percentage // 100)
-    return [urls[i:i + batch_size] for i in range(0, len(urls), batch_size)]
-
-def handle_document_loading(new_pdfs: List[str], document_processor: DocumentProcessor, processed_pdfs: List[str], debug: bool = False):
-    """Manage loading and processing of new documents in batches."""
-    batches = create_batches(new_pdfs, 25)
-    progress_bar = st.progress(0)
-
-    for i, batch in enumerate(batches, 1):
-        st.write(f"Processing batch {i} / {len(batches)}: {batch}")
-        process_pdfs_batch(batch, document_processor, processed_pdfs, debug)
-        progress_bar.progress(i / len(batches))
-
-def process_pdfs_batch(batch: List[str], document_processing: DocumentProcessor, processed_pdfs: List[str], debug: bool = False):
-    """Process a batch of PDFs and update the vector store."""
-    client = chromadb.PersistentClient(path=VECTOR_STORE_FILE)
-    collection = client.get_or_create_collection(name="arxiv_papers_collection")
-
-    for pdf in batch:
-        document = document_processing.load_and_split([pdf])
-        for chunk in document:
-            collection.add(chunk["id"], chunk["embeddings"], chunk["metadata"])
-
-        if debug:
-            st.write("## Document schema:")
-            st.json([{key: type(value).__name__ for key, value in chunk.items()} for chunk in document])
-            st.write("## Document chunks: (3 firsts)")
-            st.json(document[:3])
-
-    processed_pdfs.extend(batch)
-    save_processed_pdfs(processed_pdfs)
-    st.write(f"#### Total collection count (vector store): `{collection.count()}`")
-    gc.collect()
+from ..processing.store_writer import StoreWriter
+from ..retrieval import BM25Index
+from ..utilities.helper import COLLECTION_NAME, bump_collection_version, collection_bm25_file
+from ..vector_store import open_store
+
+
+def ingest_batch(batch: List[str], document_processing: DocumentProcessor, pipeline: IngestionPipeline,
+                 collection_name: str = COLLECTION_NAME, manifest: Optional[IngestionManifest] = None) -> Dict:
+    """Ingest a batch of PDFs into the vector store and the BM25 index, and return the pipeline statistics.
+
+    Runs without any Streamlit call, so that it can be used by the background worker. Papers are recorded in
+    the ingestion manifest as soon as their chunks are written, failures at the end of the batch.
+    """
+    collection = open_store(collection_name)
+    bm25_index = BM25Index.load(collection_bm25_file(collection_name))
+    if not len(bm25_index) and collection.count():          # Back-fill chunks ingested before the sparse index
+        bm25_index = BM25Index.from_collection(collection)
+    writer = StoreWriter(collection, bm25_index)
+    manifest = manifest or IngestionManifest(collection_name)
+    metadata = {url: document_processing.get_document_metadata(url) for url in batch}
+    written = set()
+
+    def write(chunks):
+        writer.write(chunks)
+        manifest.record_chunks(chunks, metadata, document_processing.embedding_model_name,
+                               document_processing.chunker_version)
+        written.update(chunk["metadata"].get("pdf_link") for chunk in chunks)
+
+    stats = pipeline.run(batch, write)
+    manifest.record([metadata[url] for url in batch if url not in written and url not in stats["errors"]],
+                    chunk_counts={}, embedding_model=document_processing.embedding_model_name,
+                    chunker_version=document_processing.chunker_version)       # PDFs without any text
+    manifest.record([metadata[url] for url in stats["errors"]], status="failed", errors=stats["errors"])
+    collection.persist()                                        # FAISS index files are saved once per batch
+    bm25_index.save(collection_bm25_file(collection_name))     # Sparse index follows the vector store, batch by batch
+    bump_collection_version()
+    stats["collection_count"] = collection.count()
+    return stats
@@ -0,0 +1,141 @@
+import queue
+import threading
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from .preprocessor import CHUNK_METADATA_FIELDS, paper_id
+from .store_writer import StoreWriter
+from ..utilities.model_registry import get_embedding_model
+
+DEFAULT_PAGE_SIZE = 1000
+
+_STOP = object()        # End of stream marker passed between the reader, the encoder and the writer
+
+
+class Reembedder:
+    """Copy the chunks of a collection into another one, encoding their stored text with another model.
+
+    Nothing is downloaded or re-chunked: pages of chunks are read by a thread, encoded in the calling process
+    (or on a pool of encoding processes, one per device) and upserted by a writer thread, bounded queues letting
+    the three steps overlap. Chunks written before deterministic ids (random ids, text and paper metadata in the
+    chunk metadata) are converted to the current layout on the way. Without `embedding_model`, the stored
+    embeddings are copied as they are (e.g. to move a collection to another vector store backend).
+    """
+
+    def __init__(self, source, target, embedding_model: Optional[str], page_size: int = DEFAULT_PAGE_SIZE,
+                 batch_size: int = 64, normalize_embeddings: bool = False, devices: Optional[List[str]] = None,
+                 queue_size: int = 4):
+        """Initialize the copy, `devices` (e.g. `["cuda:0", "cuda:1"]`) enabling the pool of encoding processes."""
+        self.source = source
+        self.writer = StoreWriter(target)
+        self.embedding_model = get_embedding_model(embedding_model) if embedding_model else None
+        self.page_size = page_size
+        self.batch_size = batch_size
+        self.normalize_embeddings = normalize_embeddings
+        self.devices = devices
+        self.queue_size = queue_size
+
+    @staticmethod
+    def convert(doc_id: str, document: Optional[str], metadata: Dict, embedding=None) -> Dict:
+        """Turn a stored chunk into a chunk to write, converting the chunks of the original layout."""
+        if "arxiv_id" in metadata or "id" not in metadata:
+            return {"id": doc_id, "document": document or metadata.get("text", ""), "embeddings": embedding,
+                    "metadata": {key: value for key, value in metadata.items() if key != "text"}}
+        arxiv_id = paper_id(metadata)
+        return {
+            "id": f"{arxiv_id}_chunk_{metadata['chunk_index']}",
+            "document": document or metadata.get("text", ""),
+            "embeddings": embedding,
+            "metadata": {"arxiv_id": arxiv_id, "chunk_index": metadata["chunk_index"],
+                         **{key: metadata[key] for key in CHUNK_METADATA_FIELDS if metadata.get(key) is not None}},
+        }
+
+    def read(self, offset: int, arxiv_ids: Optional[List[str]], outbox: queue.Queue, stop: threading.Event) -> None:
+        """Push the pages of source chunks (with the offset following each page), then the end of stream marker."""
+        try:
+            where = {"arxiv_id": {"$in": arxiv_ids}} if arxiv_ids is not None else None
+            include = ["documents", "metadatas"] + (["embeddings"] if self.embedding_model is None else [])
+            while not stop.is_set():
+                page = self.source.get(where=where, limit=self.page_size, offset=offset, include=include)
+                if not page["ids"]:
+                    break
+                offset += len(page["ids"])
+                chunks = {}                             # Chunks of the original layout may be duplicated
+                embeddings = page["embeddings"] if self.embedding_model is None else [None] * len(page["ids"])
+                for doc_id, document, metadata, embedding in zip(page["ids"], page["documents"], page["metadatas"],
+                                                                 embeddings):
+                    chunk = self.convert(doc_id, document, metadata, embedding)
+                    chunks[chunk["id"]] = chunk
+                outbox.put((offset, list(chunks.values())))
+        except Exception as e:
+            outbox.put(e)
+        outbox.put(_STOP)
+
+    def write(self, inbox: queue.Queue, progress: Callable[[int], bool], stop: threading.Event,
+              errors: List[Exception]) -> None:
+        """Upsert the encoded pages in order, reporting the offset reached after each of them."""
+        while True:
+            item = inbox.get()
+            if item is _STOP:
+                return
+            if stop.is_set():
+                continue                                # Drain the queue so that the encoder never blocks
+            offset, chunks = item
+            try:
+                self.writer.upsert(chunks)
+                if not progress(offset):
+                    stop.set()
+            except Exception as e:
+                errors.append(e)
+                stop.set()
+
+    def encode(self, texts: List[str], pool: Optional[Dict]) -> np.ndarray:
+        """Encode chunk texts, on the process pool if there is one."""
+        if pool is not None:
+            return self.embedding_model.encode_multi_process(texts, pool, batch_size=self.batch_size,
+                                                             normalize_embeddings=self.normalize_embeddings)
+        return self.embedding_model.encode(texts, batch_size=self.batch_size, convert_to_numpy=True,
+                                           normalize_embeddings=self.normalize_embeddings, show_progress_bar=False)
+
+    def run(self, offset: int = 0, progress: Callable[[int], bool] = lambda offset: True,
+            arxiv_ids: Optional[List[str]] = None) -> bool:
+        """Copy the source chunks from `offset` (or the chunks of `arxiv_ids` only); return whether it completed.
+
+        `progress` is called with the new offset once a page is written; returning False stops the copy there,
+        so that it can be resumed from the last reported offset.
+        """
+        pages, encoded = queue.Queue(maxsize=self.queue_size), queue.Queue(maxsize=self.queue_size)
+        stop, errors = threading.Event(), []
+        reader = threading.Thread(target=self.read, args=(offset, arxiv_ids, pages, stop), daemon=True)
+        writer = threading.Thread(target=self.write, args=(encoded, progress, stop, errors), daemon=True)
+        encoding = self.embedding_model is not None
+        pool = self.embedding_model.start_multi_process_pool(self.devices) if encoding and self.devices else None
+        reader.start()
+        writer.start()
+        try:
+            while True:
+                item = pages.get()
+                if item is _STOP:
+                    break
+                if isinstance(item, Exception):
+                    errors.append(item)
+                    break
+                if stop.is_set():
+                    continue
+                page_offset, chunks = item
+                if encoding:
+                    embeddings = self.encode([chunk["document"] for chunk in chunks], pool)
+                    for chunk, embedding in zip(chunks, embeddings):
+                        chunk["embeddings"] = embedding
+                encoded.put((page_offset, chunks))
+        finally:
+            if errors:
+                stop.set()
+            encoded.put(_STOP)
+            writer.join()
+            if pool is not None:
+                self.embedding_model.stop_multi_process_pool(pool)
+        if errors:
+            raise errors[0]
+        return not stop.is_set()
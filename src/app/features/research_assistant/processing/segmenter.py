@@ -0,0 +1,69 @@
+import logging
+from typing import Iterable, Iterator, List
+
+from ..utilities.model_registry import get_spacy_pipeline
+
+SPACY_MODEL = "en_core_web_sm"
+SEGMENTATION_MODES = ("senter", "sentencizer", "full")
+
+
+def load_sentence_pipeline(mode: str = "senter", model_name: str = SPACY_MODEL):
+    """Load a spaCy pipeline restricted to what sentence boundaries need.
+
+    - `senter`: the trained pipeline with only its statistical sentence recognizer enabled.
+    - `sentencizer`: a blank English pipeline with the rule-based, punctuation driven sentencizer.
+    - `full`: the full trained pipeline (tagger, parser, NER...), sentences come from the dependency parse.
+    """
+    if mode not in SEGMENTATION_MODES:
+        raise ValueError(f"Unknown segmentation mode '{mode}', expected one of {SEGMENTATION_MODES}.")
+    import spacy
+
+    if mode == "sentencizer":
+        nlp = spacy.blank("en")
+        nlp.add_pipe("sentencizer")
+        return nlp
+    try:
+        if mode == "full":
+            return spacy.load(model_name)
+        nlp = spacy.load(model_name, exclude=["tok2vec", "tagger", "parser", "attribute_ruler", "lemmatizer", "ner"])
+        nlp.enable_pipe("senter")
+        return nlp
+    except OSError:
+        logging.error(f"{model_name} model not found. Run 'python -m spacy download {model_name}'.")
+        raise
+
+
+class SentenceSegmenter:
+    """Stream texts through a sentence-only spaCy pipeline."""
+
+    def __init__(self, mode: str = "senter", batch_size: int = 32, n_process: int = 1, nlp=None):
+        """Initialize the segmenter with a segmentation mode and the `nlp.pipe` settings."""
+        self.mode = mode
+        self.batch_size = batch_size
+        self.n_process = n_process
+        self.nlp = nlp if nlp is not None else get_spacy_pipeline(mode)
+
+    def bounded_texts(self, texts: Iterable[str]) -> Iterator[str]:
+        """Yield texts, cutting the ones longer than `nlp.max_length` on paragraph or whitespace boundaries."""
+        max_length = self.nlp.max_length
+        for text in texts:
+            while len(text) > max_length:
+                cut = text.rfind("\n\n", 0, max_length)
+                if cut <= 0:
+                    cut = text.rfind(" ", 0, max_length)
+                if cut <= 0:
+                    cut = max_length
+                yield text[:cut]
+                text = text[cut:]
+            if text.strip():
+                yield text
+
+    def sentences(self, texts: Iterable[str]) -> Iterator[str]:
+        """Yield the sentences of a stream of texts (e.g. the pages of a paper)."""
+        for doc in self.nlp.pipe(self.bounded_texts(texts), batch_size=self.batch_size, n_process=self.n_process):
+            for sent in doc.sents:
+                yield sent.text
+
+    def split(self, texts: Iterable[str]) -> List[str]:
+        """Segment texts into sentences, then sentences into paragraphs."""
+        return [para for sentence in self.sentences(texts) for para in sentence.split("\n\n")]
@@ -1,11 +1,37 @@
+from collections import Counter
+
 import streamlit as st
 
-from ..processing.preprocessing import handle_document_loading
-from ..utilities.helper import load_processed_pdfs, display_files
+from ..jobs import INGEST_JOB, JobStore, ensure_worker
+from ..processing.collections import active_collection
+from ..processing.manifest import IngestionManifest
+from ..processing.pdf_cache import PDFCache
+from ..processing.preprocessor import load_document_metadata
+from ..utilities.helper import display_files
+
 
+@st.fragment(run_every=3)
+def display_jobs(limit: int = 5):
+    """Poll the background jobs table and show the progress of the latest ingestion jobs."""
+    store = JobStore()
+    jobs = store.recent(limit)
+    if any(job["status"] == "queued" for job in jobs):
+        ensure_worker(store)            # Restart the worker if it exited or crashed
+    for job in jobs:
+        text = f"Job `{job['id']}` · **{job['status']}** · {job['done_items']}/{job['total_items']} PDF(s)"
+        if job["message"]:
+            text += f" · {job['message']}"
+        st.progress(job["progress"], text=text)
+        if job["status"] in ("queued", "running"):
+            if st.button("Cancel", key=f"cancel_job_{job['id']}"):
+                store.cancel(job["id"])
+        elif job["status"] == "failed":
+            st.error(job["error"])
 
-def store_management(debug, arxiv, document_processor):
-    """ Manages the store process: fetches new PDFs, displays them, and handles vectorization if necessary."""
+
+def store_management(debug, arxiv):
+    """ Manages the store process: fetches new PDFs, displays them, and handles vectorization if necessary.
+    Vectorization runs as a background job, the single writer of the collection."""
 
     col1, _ = st.columns([3, 3])        # Search and update ARXIV database
     with col1:
@@ -18,18 +44,39 @@ def store_management(debug, arxiv, document_processor):
 
     col1, col2 = st.columns([3, 2])     # Handle PDF documents
     with col1:
-        pdf_urls = st.session_state.get('data', {}).get('pdf_link', [])[:300]
-        processed_pdfs = load_processed_pdfs()
-
-        new_pdfs = [url for url in pdf_urls if url not in processed_pdfs]
-        already_processed = [url for url in pdf_urls if url in processed_pdfs]
+        active = active_collection()
+        backend = active["backend"] if active["backend"] == "chroma" else f"{active['backend']} {active['index_type']}"
+        if active["quantization"] != "none":
+            backend += f" {active['quantization']}"
+        st.caption(f"Collection `{active['name']}` · `{active['embedding_model']}` · `{active['chunker_version']}` "
+                   f"· `{backend}`")
+        manifest = IngestionManifest(active["name"])
+        retry_failed = st.checkbox("Retry failed PDFs", value=False) if manifest.counts().get("failed") else False
+        pending = manifest.pending(active["embedding_model"], active["chunker_version"], retry_failed=retry_failed,
+                                   limit=300)
+        new_pdfs = [document["pdf_link"] for document in pending]
+        already_processed = manifest.ingested_links(limit=300)
 
+        if pending:
+            reasons = Counter(document["reason"] for document in pending)
+            st.caption(" · ".join(f"{count} {reason}" for reason, count in reasons.items()))
         display_files(new_pdfs, already_processed)
 
     with col2:              # Vectorize documents
         if new_pdfs:
-            if st.button("Vectorize Documents"):
-                print("\n === Document splitting & vectorization ===\n")
-                handle_document_loading(new_pdfs, document_processor, processed_pdfs, debug)
+            if st.button("Prefetch PDFs"):
+                with st.spinner("Downloading PDFs into the local cache..."):
+                    metadata = load_document_metadata(new_pdfs)
+                    errors = PDFCache().prefetch(new_pdfs, metadata)
+                st.write(f"`{len(new_pdfs) - len(errors)}` PDF(s) cached, `{len(errors)}` error(s).")
+            store = JobStore()
+            running = store.active(active["name"])
+            if st.button("Vectorize Documents", disabled=bool(running),
+                         help="An ingestion job is already queued or running." if running else None):
+                job_id = store.submit(INGEST_JOB, active["name"], {"urls": new_pdfs, "batch_size": 20},
+                                      total_items=len(new_pdfs))
+                ensure_worker(store)
+                st.toast(f"Ingestion job {job_id} queued.")
         else:
-            st.info("Vector store already up to date")
\ No newline at end of file
+            st.info("Vector store already up to date")
+        display_jobs()
\ No newline at end of file
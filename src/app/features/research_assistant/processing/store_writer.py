@@ -0,0 +1,59 @@
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from ..retrieval import BM25Index
+from ..vector_store import VectorStore
+
+DEFAULT_BATCH_SIZE = 5000
+
+
+class StoreWriter:
+    """Bulk, idempotent writer of embedded chunks into a collection of the vector store and the BM25 index.
+
+    Chunks are upserted in batches bounded by the store's maximum batch size, with their text as the chunk
+    `document`. Ids are deterministic (`<arxiv id>_chunk_<n>`), so re-ingesting a paper replaces its chunks;
+    chunks left over from a longer previous version of the paper are deleted.
+    """
+
+    def __init__(self, collection: VectorStore, bm25_index: Optional[BM25Index] = None,
+                 batch_size: int = DEFAULT_BATCH_SIZE):
+        """Initialize the writer, capping the batch size to what the store accepts."""
+        self.collection = collection
+        self.bm25_index = bm25_index
+        self.batch_size = min(batch_size, collection.max_batch_size)
+
+    def stale_ids(self, chunks: List[Dict]) -> List[str]:
+        """Ids stored for the papers of `chunks` beyond their new number of chunks."""
+        last_index: Dict[str, int] = {}
+        for chunk in chunks:
+            arxiv_id = chunk["metadata"]["arxiv_id"]
+            last_index[arxiv_id] = max(last_index.get(arxiv_id, 0), chunk["metadata"]["chunk_index"])
+        stored = self.collection.get(where={"arxiv_id": {"$in": list(last_index)}}, include=["metadatas"])
+        return [doc_id for doc_id, metadata in zip(stored["ids"], stored["metadatas"])
+                if metadata["chunk_index"] > last_index[metadata["arxiv_id"]]]
+
+    def write(self, chunks: List[Dict]) -> None:
+        """Upsert a list of embedded chunks (whole papers) in as few calls as possible."""
+        if not chunks:
+            return
+        stale = self.stale_ids(chunks)
+        if stale:
+            self.collection.delete(ids=stale)
+        self.upsert(chunks)
+
+        if self.bm25_index is not None:
+            for doc_id in stale:
+                self.bm25_index.remove(doc_id)
+            self.bm25_index.add([chunk["id"] for chunk in chunks], [chunk["document"] for chunk in chunks])
+
+    def upsert(self, chunks: List[Dict]) -> None:
+        """Upsert chunks in batches, without touching the other chunks of their papers or the BM25 index."""
+        for start in range(0, len(chunks), self.batch_size):
+            batch = chunks[start:start + self.batch_size]
+            self.collection.upsert(
+                ids=[chunk["id"] for chunk in batch],
+                embeddings=np.asarray([chunk["embeddings"] for chunk in batch], dtype=np.float32).tolist(),
+                metadatas=[chunk["metadata"] for chunk in batch],
+                documents=[chunk["document"] for chunk in batch],
+            )
@@ -0,0 +1,130 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from ..utilities.helper import ANSWER_CACHE_FILE
+
+CREATE_TABLE_QUERY = """
+CREATE TABLE IF NOT EXISTS answer_cache (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    usr_level TEXT NOT NULL,
+    embedding_model TEXT NOT NULL DEFAULT 'sentence-transformers/all-MiniLM-L6-v2',
+    question TEXT NOT NULL,
+    embedding BLOB NOT NULL,
+    doc_ids TEXT NOT NULL,
+    answer TEXT NOT NULL,
+    latency REAL NOT NULL,
+    tokens INTEGER NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL
+)
+"""
+
+
+class SemanticAnswerCache:
+    """Persistent cache of LLM answers, matched on question similarity and retrieved documents overlap.
+
+    A cached answer is reused when a new question at the same expertise level is within `max_distance`
+    (cosine) of the cached one and their retrieved documents overlap by at least `min_doc_overlap` (Jaccard).
+    Questions are only compared with those embedded by the same `embedding_model`. Setting the
+    `ANSWER_CACHE_DISABLED` environment variable turns the cache off.
+    """
+
+    def __init__(self, db_path: str = ANSWER_CACHE_FILE, max_distance: float = 0.05,
+                 min_doc_overlap: float = 0.6, max_entries: int = 5000,
+                 embedding_model: str = "sentence-transformers/all-MiniLM-L6-v2"):
+        """Initialize the cache database and its matching thresholds."""
+        self.db_path = db_path
+        self.embedding_model = embedding_model
+        self.max_distance = max_distance
+        self.min_doc_overlap = min_doc_overlap
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        with self.conn:
+            self.conn.execute(CREATE_TABLE_QUERY)
+            if "embedding_model" not in [row[1] for row in self.conn.execute("PRAGMA table_info(answer_cache)")]:
+                self.conn.execute("ALTER TABLE answer_cache ADD COLUMN embedding_model TEXT NOT NULL "
+                                  "DEFAULT 'sentence-transformers/all-MiniLM-L6-v2'")     # Model of the older rows
+            self.conn.execute("CREATE INDEX IF NOT EXISTS answer_cache_level ON answer_cache (usr_level)")
+        self.matrices: Dict[str, tuple] = {}        # usr_level -> (row ids, normalized embeddings, doc id sets)
+
+    @property
+    def enabled(self) -> bool:
+        """Kill switch, checked on every call."""
+        return not os.getenv("ANSWER_CACHE_DISABLED")
+
+    @staticmethod
+    def normalize(embedding) -> np.ndarray:
+        """Flatten an embedding to a unit float32 vector."""
+        vector = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        return vector / (np.linalg.norm(vector) or 1.0)
+
+    def level_matrix(self, usr_level: str) -> tuple:
+        """Load (once) the cached embeddings of an expertise level as a matrix."""
+        if usr_level not in self.matrices:
+            rows = self.conn.execute("SELECT id, embedding, doc_ids FROM answer_cache "
+                                     "WHERE usr_level = ? AND embedding_model = ?",
+                                     (usr_level, self.embedding_model)).fetchall()
+            ids = [row[0] for row in rows]
+            matrix = np.stack([np.frombuffer(row[1], dtype=np.float32) for row in rows]) if rows else None
+            self.matrices[usr_level] = (ids, matrix, [set(json.loads(row[2])) for row in rows])
+        return self.matrices[usr_level]
+
+    def lookup(self, embedding, usr_level: str, doc_ids: List[str]) -> Optional[str]:
+        """Return a cached answer for a similar question with overlapping documents, or None."""
+        if not self.enabled:
+            return None
+        with self.lock:
+            ids, matrix, doc_sets = self.level_matrix(usr_level)
+            if matrix is None:
+                return None
+            distances = 1.0 - matrix @ self.normalize(embedding)
+            docs = set(doc_ids)
+            for index in np.argsort(distances):
+                if distances[index] > self.max_distance:
+                    break
+                union = docs | doc_sets[index]
+                if union and len(docs & doc_sets[index]) / len(union) >= self.min_doc_overlap:
+                    with self.conn:
+                        self.conn.execute("UPDATE answer_cache SET hits = hits + 1, last_used = ? WHERE id = ?",
+                                          (time.time(), ids[index]))
+                    return self.conn.execute("SELECT answer FROM answer_cache WHERE id = ?",
+                                             (ids[index],)).fetchone()[0]
+        return None
+
+    def store(self, question: str, embedding, usr_level: str, doc_ids: List[str], answer: str,
+              latency: float, tokens: int) -> None:
+        """Cache an answer with the latency and tokens its generation cost, evicting the least used entries."""
+        if not self.enabled:
+            return
+        now = time.time()
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO answer_cache (usr_level, embedding_model, question, embedding, doc_ids, answer, latency, "
+                "tokens, created, last_used) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (usr_level, self.embedding_model, question, self.normalize(embedding).tobytes(),
+                 json.dumps(list(doc_ids)), answer, latency, tokens, now, now))
+            self.conn.execute(
+                "DELETE FROM answer_cache WHERE id NOT IN "
+                "(SELECT id FROM answer_cache ORDER BY last_used DESC LIMIT ?)", (self.max_entries,))
+            self.matrices.clear()
+
+    def clear(self) -> None:
+        """Remove every cached answer."""
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM answer_cache")
+            self.matrices.clear()
+
+    def stats(self) -> Dict[str, float]:
+        """Return the number of entries and hits, with the latency and tokens the hits saved."""
+        entries, hits, saved_seconds, saved_tokens = self.conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(hits), 0), COALESCE(SUM(hits * latency), 0), "
+            "COALESCE(SUM(hits * tokens), 0) FROM answer_cache").fetchone()
+        return {"entries": entries, "hits": hits, "saved_seconds": saved_seconds, "saved_tokens": saved_tokens}
@@ -0,0 +1,82 @@
+import re
+from typing import Any, Callable, Dict, List, Sequence
+
+import numpy as np
+
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9\[(])")
+
+
+class ContextCompressor:
+    """Turn retrieved chunks into compact, per-paper context blocks for the prompt.
+
+    Chunks of the same paper are merged and their overlapping sentences kept once. Sentences are then
+    selected greedily by cosine similarity to the question until the token budget is spent, and rendered
+    in reading order under a short source header.
+    """
+
+    def __init__(self, embedding_model, count_tokens: Callable[[List[str]], List[int]],
+                 min_sentence_chars: int = 20, batch_size: int = 64):
+        """Initialize the compressor with the embedding model and a batched token counter."""
+        self.embedding_model = embedding_model
+        self.count_tokens = count_tokens
+        self.min_sentence_chars = min_sentence_chars
+        self.batch_size = batch_size
+
+    @staticmethod
+    def paper_key(metadata: Dict[str, Any]) -> str:
+        """Identify the paper a chunk comes from."""
+        return metadata.get("arxiv_id") or metadata.get("pdf_link") or metadata.get("title", "")
+
+    @staticmethod
+    def header(number: int, metadata: Dict[str, Any]) -> str:
+        """Source line of a context block."""
+        details = ", ".join(str(metadata[key]) for key in ("author", "published") if metadata.get(key))
+        return f"[{number}] {metadata.get('title', 'Unknown title')}" + (f" ({details})" if details else "")
+
+    def split(self, text: str) -> List[str]:
+        """Split a chunk into sentences, dropping fragments too short to carry information."""
+        sentences = (" ".join(sentence.split()) for sentence in SENTENCE_BOUNDARY.split(text or ""))
+        return [sentence for sentence in sentences if len(sentence) >= self.min_sentence_chars]
+
+    def collect(self, texts: Sequence[str], metadatas: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Group chunks by paper in rank order, with the unique sentences of their chunks in reading order."""
+        papers: Dict[str, Dict[str, Any]] = {}
+        for text, metadata in zip(texts, metadatas):
+            paper = papers.setdefault(self.paper_key(metadata), {"metadata": metadata, "sentences": {}})
+            chunk_index = metadata.get("chunk_index", 0)
+            for position, sentence in enumerate(self.split(text)):
+                key = sentence.lower()
+                if key not in paper["sentences"]:                # Sentences repeated by chunk overlaps
+                    paper["sentences"][key] = ((chunk_index, position), sentence)
+        return list(papers.values())
+
+    def compress(self, query_embedding, texts: Sequence[str], metadatas: Sequence[Dict[str, Any]],
+                 budget: int) -> List[str]:
+        """Render the retrieved chunks as context blocks fitting in `budget` tokens (one block per paper)."""
+        papers = self.collect(texts, metadatas)
+        sentences = [(paper_number, order, sentence)
+                     for paper_number, paper in enumerate(papers)
+                     for order, sentence in paper["sentences"].values()]
+        if not sentences or budget <= 0:
+            return []
+
+        embeddings = self.embedding_model.encode([sentence for _, _, sentence in sentences],
+                                                 batch_size=self.batch_size, normalize_embeddings=True)
+        query = np.asarray(query_embedding, dtype=np.float32).reshape(-1)
+        scores = np.asarray(embeddings) @ (query / (np.linalg.norm(query) or 1.0))
+        sentence_tokens = self.count_tokens([sentence for _, _, sentence in sentences])
+        headers = [self.header(number + 1, paper["metadata"]) for number, paper in enumerate(papers)]
+        header_tokens = self.count_tokens(headers)
+
+        selected: Dict[int, List] = {}
+        used = 0
+        for index in np.argsort(-scores):
+            paper_number, order, sentence = sentences[index]
+            cost = sentence_tokens[index] + (0 if paper_number in selected else header_tokens[paper_number] + 1)
+            if used + cost > budget:
+                continue
+            selected.setdefault(paper_number, []).append((order, sentence))
+            used += cost
+
+        return [headers[paper_number] + "\n" + " ".join(sentence for _, sentence in sorted(selected[paper_number]))
+                for paper_number in sorted(selected)]
@@ -1,7 +1,7 @@
 import json
 import os
 from datetime import datetime
-from typing import Any
+from typing import Any, Callable
 
 import streamlit as st
 
@@ -40,12 +40,18 @@ def display_columns():
         add_empty_lines(2)
         st.session_state.user_expertise = st.selectbox("Expertise level",
                                                        ["Beginner", "Intermediate", "Advanced", "Expert"])
+        st.session_state.rerank = st.toggle("Rerank", value=False,
+                                            help="Rerank retrieved chunks with a cross-encoder and diversify papers.")
     with col3:
         add_empty_lines(2)
         st.session_state.temperature = st.slider("Temperature", 0.0, 1.0, 0.1, step=0.1)
+        st.session_state.use_answer_cache = st.toggle("Answer cache", value=False,
+                                                      help="Reuse answers to similar questions (temperature 0 only).")
     with col4:
         add_empty_lines(2)
         st.session_state.max_tokens = st.slider("Max Tokens", 50, 500, 320)
+        st.session_state.stream = st.toggle("Stream tokens", value=True,
+                                            help="Display the answer token by token, generated in a single call.")
 
     with col5:
         add_empty_lines(2)
@@ -114,8 +120,8 @@ def save_conversation():
 
 
 
-def user_interface(qasystem: Any) -> None:
-    """Main function that handles the user interface."""
+def user_interface(load_qa_system: Callable[[], Any]) -> None:
+    """Main function that handles the user interface, the QA system is loaded on the first question."""
     initialize_session_state()
     display_columns()
 
@@ -134,6 +140,7 @@ def user_interface(qasystem: Any) -> None:
     if st.button("Submit") and user_input != "":
         st.session_state.input_text = ""
 
+        qasystem = load_qa_system()
         with st.spinner("Llama is thinking..."):
 
                 first_question = user_input
@@ -141,7 +148,10 @@ def user_interface(qasystem: Any) -> None:
                     usr_question=first_question,
                     usr_level=st.session_state.user_expertise,
                     temperature=st.session_state.temperature,
-                    max_tokens=st.session_state.max_tokens
+                    max_tokens=st.session_state.max_tokens,
+                    use_answer_cache=st.session_state.get("use_answer_cache", False),
+                    stream=st.session_state.get("stream", False),
+                    rerank=st.session_state.get("rerank", False)
                 )
                 st.session_state.messages.append({"role": "user", "content": user_input})
                 st.session_state.messages.append({"role": "system", "content": llm_response})
@@ -0,0 +1,185 @@
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+RETRY_STATUSES = (429, 502, 503, 504)       # Rate limited, gateway errors, model loading
+
+
+class InferenceError(RuntimeError):
+    """A generation that failed: error status, error event or network failure."""
+
+
+class InferenceClient:
+    """HTTP client for the inference endpoint, built on a persistent connection pool.
+
+    Calls use connect/read timeouts, retry with jittered exponential backoff on 429/502/503/504 responses and
+    on failures to connect (not on read timeouts: the generation may be running, a retry would start it again),
+    and go through a concurrency limiter shared by every client of the process (so by every Streamlit session).
+    Each call records its latency, retries and status in `metrics`.
+    """
+
+    _limiter: Optional[threading.BoundedSemaphore] = None
+    _max_concurrency: Optional[int] = None
+    _limiter_lock = threading.Lock()
+
+    def __init__(self, base_url: str, connect_timeout: float = 5.0, read_timeout: float = 120.0,
+                 max_retries: int = 4, backoff: float = 1.0, max_backoff: float = 30.0,
+                 max_concurrency: int = 4, pool_size: int = 8, metrics_size: int = 1000):
+        """Initialize the pooled session, the timeouts and the retry policy."""
+        self.base_url = base_url
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.pool_size = pool_size
+        self.limiter = self.shared_limiter(max_concurrency)
+        self.metrics: deque = deque(maxlen=metrics_size)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.async_session = None
+
+    @classmethod
+    def shared_limiter(cls, max_concurrency: int) -> threading.BoundedSemaphore:
+        """Return the process-wide limiter of in-flight calls, created by the first client."""
+        with cls._limiter_lock:
+            if cls._limiter is None:
+                cls._limiter, cls._max_concurrency = threading.BoundedSemaphore(max_concurrency), max_concurrency
+            elif max_concurrency != cls._max_concurrency:
+                print(f"WARNING: Ignoring max_concurrency={max_concurrency}, the inference calls of the process are "
+                      f"already limited to {cls._max_concurrency}.")
+            return cls._limiter
+
+    def retry_delay(self, attempt: int, response=None) -> float:
+        """Seconds to wait before the next attempt: the server's hint if any, else full-jitter backoff."""
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after and retry_after.replace(".", "", 1).isdigit():
+                return min(float(retry_after), self.max_backoff)
+            if response.status_code == 503:         # Hugging Face reports the loading time of a cold model
+                try:
+                    estimated_time = float(response.json().get("estimated_time", 0))
+                except (ValueError, AttributeError):
+                    estimated_time = 0
+                if estimated_time:
+                    return min(estimated_time, self.max_backoff)
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def record(self, start: float, retries: int, status: Optional[int], stream: bool = False) -> None:
+        """Store the metrics of one call."""
+        self.metrics.append({"latency": time.perf_counter() - start, "retries": retries,
+                             "status": status, "stream": stream, "time": time.time()})
+
+    @contextmanager
+    def post(self, data: Dict[str, Any], headers: Optional[Dict[str, str]] = None,
+             stream: bool = False) -> Iterator[requests.Response]:
+        """POST a payload to the endpoint and yield the response.
+
+        The concurrency slot is held until the block exits, so that a streamed body is read within it.
+        Raises `requests.RequestException` on a read timeout, or when the retries are exhausted on connection errors.
+        """
+        start = time.perf_counter()
+        retries, status = 0, None
+        with self.limiter:
+            try:
+                while True:
+                    try:
+                        response = self.session.post(self.base_url, headers=headers, json=data,
+                                                     timeout=self.timeout, stream=stream)
+                    except requests.ConnectionError:        # Including connect timeouts, not read ones
+                        if retries >= self.max_retries:
+                            raise
+                        time.sleep(self.retry_delay(retries))
+                        retries += 1
+                        continue
+                    status = response.status_code
+                    if status in RETRY_STATUSES and retries < self.max_retries:
+                        delay = self.retry_delay(retries, response)
+                        response.close()
+                        print(f"WARNING: Inference endpoint returned {status}, retrying in {delay:.1f}s.")
+                        time.sleep(delay)
+                        retries += 1
+                        continue
+                    break
+                with response:
+                    yield response
+            finally:
+                self.record(start, retries, status, stream)
+
+    async def apost(self, data: Dict[str, Any], headers: Optional[Dict[str, str]] = None):
+        """Asyncio variant of `post`, on a pooled `httpx.AsyncClient`; returns the read `httpx.Response`.
+
+        It shares the process-wide limiter with the sync calls (a cancelled call gives its slot back once the
+        acquiring thread gets it). The async pool is bound to the event loop of its first call.
+        """
+        import httpx
+
+        if self.async_session is None:
+            self.async_session = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.timeout[1], connect=self.timeout[0]),
+                limits=httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size),
+            )
+        start = time.perf_counter()
+        retries, status = 0, None
+        acquire = asyncio.ensure_future(asyncio.to_thread(self.limiter.acquire))
+        try:
+            await asyncio.shield(acquire)
+        except asyncio.CancelledError:
+            acquire.add_done_callback(lambda _: self.limiter.release())
+            raise
+        try:
+            while True:
+                try:
+                    response = await self.async_session.post(self.base_url, headers=headers, json=data)
+                except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout):
+                    if retries >= self.max_retries:
+                        raise
+                    await asyncio.sleep(self.retry_delay(retries))
+                    retries += 1
+                    continue
+                status = response.status_code
+                if status in RETRY_STATUSES and retries < self.max_retries:
+                    await asyncio.sleep(self.retry_delay(retries, response))
+                    retries += 1
+                    continue
+                return response
+        finally:
+            self.limiter.release()
+            self.record(start, retries, status)
+
+    def stats(self) -> Dict[str, Any]:
+        """Summarize the recorded calls: count, errors, retries and latency percentiles."""
+        latencies = sorted(metric["latency"] for metric in self.metrics)
+        if not latencies:
+            return {"calls": 0}
+
+        def percentile(p: float) -> float:
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))], 3)
+
+        return {
+            "calls": len(latencies),
+            "errors": sum(metric["status"] != 200 for metric in self.metrics),
+            "retries": sum(metric["retries"] for metric in self.metrics),
+            "latency_p50": percentile(0.5),
+            "latency_p95": percentile(0.95),
+            "latency_max": round(latencies[-1], 3),
+        }
+
+    def close(self) -> None:
+        """Close the sync connection pool (the async one is closed with `aclose`)."""
+        self.session.close()
+
+    async def aclose(self) -> None:
+        """Close the async connection pool."""
+        if self.async_session is not None:
+            await self.async_session.aclose()
+            self.async_session = None
@@ -0,0 +1,104 @@
+from typing import Any, Dict, List, Sequence
+
+from ..retrieval import LRUCache
+
+QUESTION_SEPARATOR = "\n_____________________________\n"
+CONTEXT_HEADER = "Context (excerpts from arXiv papers):"
+
+
+class PromptBuilder:
+    """Assemble the model prompt under a hard token budget.
+
+    Sections are packed greedily in priority order: the instruction and the current question (always kept,
+    the question being truncated if it alone overflows), then the retrieved context blocks in rank order
+    (already compressed to their token share), then the conversation turns from the newest to the oldest.
+    Token counts of the history are cached on the message dicts themselves, so each message is tokenized
+    once in its lifetime and assembling a prompt only tokenizes the new messages.
+    """
+
+    def __init__(self, tokenizer, cache_size: int = 256):
+        """Initialize the builder with the model tokenizer and a cache for the counts of other texts."""
+        self.tokenizer = tokenizer
+        self.counts = LRUCache(max_size=cache_size)       # Instructions, questions, chunks
+
+    def count(self, text: str) -> int:
+        """Number of tokens of a prompt fragment (without special tokens), cached by text."""
+        tokens = self.counts.get(text)
+        if tokens is None:
+            tokens = self.count_uncached(text)
+            self.counts.put(text, tokens)
+        return tokens
+
+    def count_uncached(self, text: str) -> int:
+        """Number of tokens of a text that is counted only once (no need to cache it)."""
+        return len(self.tokenizer(text, add_special_tokens=False)["input_ids"])
+
+    def count_batch(self, texts: List[str]) -> List[int]:
+        """Number of tokens of each text, tokenized in one batch."""
+        if not texts:
+            return []
+        return [len(input_ids) for input_ids in self.tokenizer(texts, add_special_tokens=False)["input_ids"]]
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """Keep the first `max_tokens` tokens of a text."""
+        input_ids = self.tokenizer(text, add_special_tokens=False)["input_ids"][:max(max_tokens, 0)]
+        return self.tokenizer.decode(input_ids)
+
+    @staticmethod
+    def message_line(message: Dict[str, Any]) -> str:
+        """Render a conversation message as a prompt line."""
+        role = "user" if message["role"] == "user" else "system"
+        return f"{role}: {message['content']}"
+
+    def message_tokens(self, message: Dict[str, Any]) -> int:
+        """Token count of a message line, computed on first use and stored in the message.
+
+        The text cache is checked first, so an answer counted when it was generated is not tokenized again.
+        """
+        if message.get("tokens") is None:
+            message["tokens"] = self.count(self.message_line(message))
+        return message["tokens"]
+
+    def build(self, instruction: str, question: str, budget: int,
+              history: Sequence[Dict[str, Any]] = (), documents: Sequence[str] = ()) -> Dict[str, Any]:
+        """Pack the prompt sections into `budget` tokens and return the prompt with its token count.
+
+        The returned dict holds the prompt (`inputs`), its `tokens` and how many history turns and
+        documents were kept or dropped. Raises `ValueError` if the instruction alone does not fit in `budget`.
+        """
+        fixed = 1 + self.count(instruction) + self.count(f"\nuser:\n{QUESTION_SEPARATOR}\nsystem:")   # 1 for BOS
+        if fixed > budget:
+            raise ValueError(f"The prompt instruction alone ({fixed} tokens) exceeds the budget of {budget} tokens.")
+
+        question_block = f"\nuser:\n{question}{QUESTION_SEPARATOR}\nsystem:"
+        used = 1 + self.count(instruction) + self.count(question_block)         # 1 for the BOS token
+        if used > budget:                       # The question alone overflows: keep its beginning
+            overflow = used - budget
+            question = self.truncate(question, self.count_uncached(question) - overflow)
+            question_block = f"\nuser:\n{question}{QUESTION_SEPARATOR}\nsystem:"
+            used = 1 + self.count(instruction) + self.count(question_block)
+
+        kept_documents: List[str] = []
+        for document in documents:
+            tokens = self.count(document) + 1 + (0 if kept_documents else self.count(CONTEXT_HEADER) + 1)
+            if used + tokens <= budget:
+                kept_documents.append(document)
+                used += tokens
+
+        turns: List[str] = []
+        for message in reversed(history):       # Newest turns first, stop at the first one that does not fit
+            tokens = self.message_tokens(message) + 1
+            if used + tokens > budget:
+                break
+            turns.append(self.message_line(message))
+            used += tokens
+        turns.reverse()
+
+        sections = [instruction, *([CONTEXT_HEADER, *kept_documents] if kept_documents else []), *turns]
+        return {
+            "inputs": "\n".join(sections) + question_block,
+            "tokens": used,
+            "history_turns": len(turns),
+            "dropped_turns": len(history) - len(turns),
+            "documents": len(kept_documents),
+        }
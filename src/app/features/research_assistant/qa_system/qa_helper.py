@@ -1,20 +1,55 @@
-import chromadb
+import copy
+import os
+
+import numpy as np
 import streamlit as st
-from sentence_transformers import SentenceTransformer
-from transformers import AutoTokenizer
+
+from ..retrieval import (BM25Index, LRUCache, cross_encoder_scores, maximal_marginal_relevance, normalize_query,
+                         reciprocal_rank_fusion)
+from ..utilities.helper import COLLECTION_NAME, collection_bm25_file, collection_version
+from ..utilities.model_registry import get_cross_encoder, get_embedding_model, get_tokenizer
+from ..vector_store import open_store
+
+RERANKER_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
 
 
 class QA_helper:
-    def __init__(self, embedding_model, debug=False, vector_store_file="VECTOR_STORE_FILE"):
+    def __init__(self, embedding_model, debug=False, vector_store_file="VECTOR_STORE_FILE",
+                 retrieval_mode="hybrid", dense_weight=1.0, sparse_weight=1.0, rrf_k=60, candidates_factor=4,
+                 bm25_index_file=None, embedding_cache_size=2048, retrieval_cache_size=512,
+                 cache_ttl=3600, rerank=False, rerank_candidates=50, reranker_model=RERANKER_MODEL,
+                 rerank_batch_size=32, mmr_lambda=0.5, collection_name=COLLECTION_NAME, rescore_factor=None):
         """
-        Initializes the QA_helper class with a ChromaDB client and an embedding model.
+        Initializes the QA_helper class with the vector store (Chroma or FAISS collections) and an embedding model.
+        `retrieval_mode` is "dense" (embeddings only) or "hybrid" (BM25 + embeddings, fused by weighted RRF).
+        Query embeddings and retrieval results are kept in LRU caches, results being keyed on the collection version.
+        With `rerank`, `rerank_candidates` first-stage results are rescored by a cross-encoder, then diversified
+        across papers by maximal marginal relevance (`mmr_lambda` = 1 keeps the reranker order).
+        `collection_name` must have been embedded with `embedding_model` (see `processing.collections`).
+        Quantized FAISS collections search their compact index for `rescore_factor` candidates per result and
+        rescore them with the full-precision vectors (default per quantization, 0 keeps the approximate order).
         """
         self.vector_store_file = vector_store_file
-        self.client = chromadb.PersistentClient(path=self.vector_store_file)
-        self.collection = self.client.get_or_create_collection(name="arxiv_papers_collection")
-        self.embedding_model = SentenceTransformer(embedding_model)
+        self.rescore_factor = rescore_factor
+        self.stores = {}
+        self.collection_name = collection_name
+        self.collection = self.store(collection_name)
+        self.embedding_model = get_embedding_model(embedding_model)       # Shared with the DocumentProcessor
         self.debug = debug
-        self.tokenizer = AutoTokenizer.from_pretrained("meta-llama/Llama-2-7b-chat-hf")
+        self.tokenizer = get_tokenizer("meta-llama/Llama-2-7b-chat-hf")
+        self.retrieval_mode = retrieval_mode
+        self.fusion_weights = {"dense": dense_weight, "sparse": sparse_weight}
+        self.rrf_k = rrf_k
+        self.candidates_factor = candidates_factor
+        self.bm25_index_file = bm25_index_file or collection_bm25_file(collection_name)
+        self.bm25_index, self.bm25_mtime = None, None
+        self.embedding_cache = LRUCache(max_size=embedding_cache_size, ttl=cache_ttl)
+        self.retrieval_cache = LRUCache(max_size=retrieval_cache_size, ttl=cache_ttl)
+        self.rerank = rerank
+        self.rerank_candidates = rerank_candidates
+        self.reranker_model = reranker_model
+        self.rerank_batch_size = rerank_batch_size
+        self.mmr_lambda = mmr_lambda
 
     INSTRUCTION = """    
 Instructions:
@@ -58,58 +93,175 @@ Instructions:
             "Expert": "provide a highly technical, in-depth, and nuanced answer for the following query, using advanced terminology and concepts:\n"
     }
 
-    def retrieve_documents(self, collection_name: str, query: str, top_k: int = 5):
+    def load_bm25_index(self) -> BM25Index:
         """
-        Retrieves relevant documents from a ChromaDB collection.
+        Returns the sparse index, reloading it when the ingestion has saved a newer version.
         """
-        collection = self.client.get_collection(collection_name)
-        query_embedding = self.embedding_model.encode([query])
-        results = collection.query(query_embeddings=query_embedding, n_results=top_k)
+        mtime = os.path.getmtime(self.bm25_index_file) if os.path.exists(self.bm25_index_file) else None
+        if self.bm25_index is None or mtime != self.bm25_mtime:
+            self.bm25_index, self.bm25_mtime = BM25Index.load(self.bm25_index_file), mtime
+            if not len(self.bm25_index) and self.collection.count():     # Index built before BM25 existed
+                self.bm25_index = BM25Index.from_collection(self.collection)
+                self.bm25_index.save(self.bm25_index_file)
+                self.bm25_mtime = os.path.getmtime(self.bm25_index_file)
+        return self.bm25_index
 
-        if self.debug:
-            st.write("## Question Embedding:\n", query_embedding)
+    def store(self, collection_name: str):
+        """
+        Returns the collection of the vector store (opened read-only once, whatever its backend).
+        """
+        if collection_name not in self.stores:
+            self.stores[collection_name] = open_store(collection_name, read_only=True,
+                                                      chroma_path=self.vector_store_file,
+                                                      rescore_factor=self.rescore_factor)
+        return self.stores[collection_name]
 
-        return results
+    def embed_query(self, query: str):
+        """
+        Encodes a query, reusing the cached embedding of the same normalized query.
+        """
+        return self.embed_queries([query])
 
+    def embed_queries(self, queries):
+        """
+        Encodes queries in one batch, reusing the cached embeddings of the same normalized queries.
+        """
+        keys = [normalize_query(query) for query in queries]
+        embeddings = {key: self.embedding_cache.get(key) for key in keys}
+        missing = {key: query for key, query in zip(keys, queries) if embeddings[key] is None}
+        if missing:
+            for key, embedding in zip(missing, self.embedding_model.encode(list(missing.values()))):
+                embeddings[key] = embedding.reshape(1, -1)
+                self.embedding_cache.put(key, embeddings[key])
+        return np.vstack([embeddings[key] for key in keys])
 
-    def count_tokens(self, text: str) -> int:
+    def cache_stats(self):
         """
-        Counts the number of tokens in a given text.
+        Returns the hit/miss counters of the query embedding and retrieval caches.
         """
-        tokens = self.tokenizer(text)["input_ids"]
-        return len(tokens)
+        return {"embeddings": self.embedding_cache.stats(), "retrieval": self.retrieval_cache.stats()}
+
+    def retrieve_documents(self, collection_name: str, query: str, top_k: int = 5, mode: str = None,
+                           rerank: bool = None):
+        """
+        Retrieves relevant documents from a collection of the vector store.
+        """
+        return self.retrieve_batch(collection_name, [query], top_k=top_k, mode=mode, rerank=rerank)[0]
+
+    def retrieve_batch(self, collection_name: str, queries, top_k: int = 5, mode: str = None, rerank: bool = None):
+        """
+        Retrieves the documents of several queries, their embeddings being computed and searched in one batch.
+        """
+        mode = mode or self.retrieval_mode
+        rerank = self.rerank if rerank is None else rerank
+        rerank_key = (self.rerank_candidates, self.reranker_model, self.mmr_lambda) if rerank else None
+        version = collection_version()
+        keys = [(collection_name, normalize_query(query), top_k, mode, rerank_key, version) for query in queries]
+        results = [self.retrieval_cache.get(key) for key in keys]
+        missing = [index for index, result in enumerate(results) if result is None]
+        if missing:
+            found = self.query_collection(collection_name, [queries[index] for index in missing], top_k, mode,
+                                          rerank)
+            for index, result in zip(missing, found):
+                results[index] = result
+                self.retrieval_cache.put(keys[index], result)
 
-    #(text)["input_ids"]
+        if self.debug:
+            st.write("## Retrieval caches:\n", self.cache_stats())
+        return copy.deepcopy(results)          # Callers may reshape the results
 
-    def calculate_tokens(self, input):
+    def query_collection(self, collection_name: str, queries, top_k: int, mode: str, rerank: bool = False):
         """
-        Calculates the total number of tokens in the input data.
+        Runs the dense retrieval of queries as one batched search, then the sparse retrieval (hybrid mode) and the
+        optional reranking stage of each query; returns one result per query.
         """
-        total = 0
-        total += self.count_tokens(input["inputs"])
-        return total
+        collection = self.store(collection_name)
+        query_embeddings = self.embed_queries(queries)
+        first_stage_k = max(top_k, self.rerank_candidates) if rerank else top_k
+        n_candidates = first_stage_k if mode == "dense" else first_stage_k * self.candidates_factor
+        batch = collection.query(query_embeddings=query_embeddings, n_results=n_candidates,
+                                 include=["metadatas", "documents", "distances"])
+
+        if self.debug:
+            st.write("## Question Embedding:\n", query_embeddings)
 
-    def trim_conversation_history(self, max_length=4):
+        results = []
+        for index, query in enumerate(queries):
+            result = {key: [batch[key][index]] for key in ("ids", "metadatas", "documents", "distances")}
+            if mode == "hybrid":
+                result = self.fuse_results(collection, query, result, first_stage_k)
+            if rerank:
+                result = self.rerank_results(collection, query, result, top_k)
+            results.append(result)
+        return results
+
+    @staticmethod
+    def chunk_texts(documents, metadatas):
         """
-        Trim the conversation history to avoid excessive memory usage.
+        Returns the texts of retrieved chunks, read from the metadata for chunks written before documents were used.
         """
-        if len(st.session_state.messages) > max_length:
-            st.session_state.messages = st.session_state.messages[-max_length:]
+        documents = documents or [None] * len(metadatas)
+        return [document or (metadata or {}).get("text", "") for document, metadata in zip(documents, metadatas)]
 
-        conversation_history = "\n".join(
-            [f"User: {msg['content']}" if msg["role"] == "user" else f"System: {msg['content']}"
-             for msg in st.session_state.messages]
-        )
-        history = f"{conversation_history}"
+    def rerank_results(self, collection, query: str, candidates, top_k: int):
+        """
+        Rescores the candidates with the cross-encoder (batched), then picks top_k of them by MMR across papers.
+        """
+        ids, metadatas, documents = candidates["ids"][0], candidates["metadatas"][0], candidates["documents"][0]
+        if not ids:
+            return candidates
+        passages = self.chunk_texts(documents, metadatas)
+        cross_encoder = get_cross_encoder(self.reranker_model)
+        relevance = cross_encoder_scores(cross_encoder, query, passages, batch_size=self.rerank_batch_size)
 
-        st.session_state.tokens_count.empty()
+        stored = collection.get(ids=ids, include=["embeddings"])
+        embeddings = dict(zip(stored["ids"], stored["embeddings"]))
+        papers = [metadata.get("pdf_link") or doc_id for doc_id, metadata in zip(ids, metadatas)]
+        selected = maximal_marginal_relevance(relevance, np.array([embeddings[doc_id] for doc_id in ids]),
+                                              papers, top_k, mmr_lambda=self.mmr_lambda)
+        if self.debug:
+            st.write("## Reranking (cross-encoder scores):\n",
+                     [(ids[index], float(relevance[index])) for index in selected])
+        return {
+            "ids": [[ids[index] for index in selected]],
+            "metadatas": [[metadatas[index] for index in selected]],
+            "documents": [[documents[index] for index in selected]],
+            "scores": [[float(relevance[index]) for index in selected]],
+        }
 
-        st.session_state.total_tokens += self.count_tokens(history)  # Update total tokens count
-        with st.session_state.tokens_count:
-            st.write(f"`{st.session_state.get('total_tokens', 0)}` tokens")
-        progress_value = min(st.session_state.total_tokens / 4096, 1.0)
-        st.session_state.tokens_bar.progress(progress_value)
+    def fuse_results(self, collection, query: str, dense_results, top_k: int):
+        """
+        Fuses the dense results with BM25 matches (reciprocal rank fusion), keeping Chroma's result layout.
+        """
+        sparse_hits = self.load_bm25_index().search(query, top_k=top_k * self.candidates_factor)
+        rankings = {"dense": dense_results["ids"][0], "sparse": [doc_id for doc_id, _ in sparse_hits]}
+        fused = reciprocal_rank_fusion(rankings, self.fusion_weights, k=self.rrf_k)[:top_k]
 
+        metadatas = dict(zip(dense_results["ids"][0], dense_results["metadatas"][0]))
+        documents = dict(zip(dense_results["ids"][0], dense_results["documents"][0]))
+        missing = [doc_id for doc_id, _ in fused if doc_id not in metadatas]
+        if missing:                                                 # Sparse-only hits
+            fetched = collection.get(ids=missing, include=["metadatas", "documents"])
+            metadatas.update(zip(fetched["ids"], fetched["metadatas"]))
+            documents.update(zip(fetched["ids"], fetched["documents"]))
+
+        fused = [(doc_id, score) for doc_id, score in fused if doc_id in metadatas]
+        if self.debug:
+            st.write("## Hybrid retrieval (RRF scores):\n", fused)
+        return {
+            "ids": [[doc_id for doc_id, _ in fused]],
+            "metadatas": [[metadatas[doc_id] for doc_id, _ in fused]],
+            "documents": [[documents[doc_id] for doc_id, _ in fused]],
+            "scores": [[score for _, score in fused]],
+        }
+
+
+    def count_tokens(self, text: str) -> int:
+        """
+        Counts the number of tokens in a given text.
+        """
+        tokens = self.tokenizer(text)["input_ids"]
+        return len(tokens)
 
     @staticmethod
     def add_context(usr_level: str) -> str:
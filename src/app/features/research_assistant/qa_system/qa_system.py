@@ -1,10 +1,16 @@
-from typing import Dict, List, Any
+import json
+import time
+from typing import Dict, Iterator, List, Any, Optional, Sequence, Tuple
 
 import requests
 import streamlit as st
-from langchain_huggingface import HuggingFaceEndpoint
 
+from .answer_cache import SemanticAnswerCache
+from .context_compressor import ContextCompressor
+from .inference_client import InferenceClient, InferenceError
+from .prompt_builder import PromptBuilder
 from .qa_helper import QA_helper
+from ..utilities.helper import COLLECTION_NAME
 
 
 class QASystem:
@@ -13,59 +19,153 @@ class QASystem:
                  model_name: str = "meta-llama/Llama-2-7b-chat-hf",
                  embedding_model: str = "sentence-transformers/all-MiniLM-L6-v2",
                  vector_store_file: str = "VECTOR_STORE_FILE",
+                 base_url: Optional[str] = None,
+                 max_context_tokens: int = 4096,
+                 connect_timeout: float = 5.0,
+                 read_timeout: float = 120.0,
+                 max_concurrency: int = 4,
+                 context_share: float = 0.5,
+                 collection_name: str = COLLECTION_NAME,
                  debug: bool = False) -> None:
         """
         Initialize the Q&A system with LLM, embeddings, memory, and vector store.
         """
+        from langchain_huggingface import HuggingFaceEndpoint
+
         self.api_key: str = api_key
         self.llm = HuggingFaceEndpoint(repo_id=model_name, huggingfacehub_api_token=api_key)
         self.debug: bool = debug
-        self.base_url: str = f"https://api-inference.huggingface.co/models/meta-llama/Llama-2-7b-chat-hf"
+        self.base_url: str = base_url or f"https://api-inference.huggingface.co/models/meta-llama/Llama-2-7b-chat-hf"
+        self.max_context_tokens: int = max_context_tokens
+        self.client = InferenceClient(self.base_url, connect_timeout=connect_timeout, read_timeout=read_timeout,
+                                      max_concurrency=max_concurrency)
         self.conversation_memory: List[Dict[str, str]] = []
-        self.helper = QA_helper(embedding_model=embedding_model, debug=self.debug, vector_store_file=vector_store_file)
+        self.helper = QA_helper(embedding_model=embedding_model, debug=self.debug, vector_store_file=vector_store_file,
+                                collection_name=collection_name)
+        self.answer_cache = SemanticAnswerCache(embedding_model=embedding_model)
+        self.prompt_builder = PromptBuilder(self.helper.tokenizer)
+        self.context_share: float = context_share
+        self.compressor = ContextCompressor(self.helper.embedding_model, self.prompt_builder.count_batch)
 
 
     def query(self, headers: Dict[str, str], data: Dict[str, Any]) -> str:
         """
         Send a query to the Hugging Face API and retrieve the response.
+        Raises `InferenceError` on an error status or a network failure.
         """
-        response = requests.post(self.base_url, headers=headers, json=data)
-        if response.status_code == 200:
-            response = response.json()
-            if self.debug:
-                st.write(f"### Model feedback:\n")
-                st.json(response)
-            return response[0].get("generated_text", "Aucune réponse trouvée.")
-        else:
-            return f"Erreur: {response.status_code}"
+        try:
+            with self.client.post(data, headers=headers) as response:
+                if response.status_code != 200:
+                    raise InferenceError(f"HTTP {response.status_code}")
+                response = response.json()
+        except requests.RequestException as e:
+            print(f"ERROR: Inference call failed: {e}")
+            raise InferenceError(type(e).__name__) from e
+        if self.debug:
+            st.write(f"### Model feedback:\n")
+            st.json(response)
+        return response[0].get("generated_text", "Aucune réponse trouvée.")
 
 
+    @staticmethod
+    def stream_payload(input: Dict[str, Any], max_new_tokens: int) -> Dict[str, Any]:
+        """
+        Build the text-generation streaming request from a model input, with a single generation budget.
+        """
+        options = input["options"]
+        parameters = {
+            "max_new_tokens": int(max_new_tokens),
+            "top_k": options["top_k"],
+            "top_p": options["top_p"],
+            "repetition_penalty": options["repetition_penalty"],
+            "return_full_text": False,
+            "do_sample": options["temperature"] > 0,        # Greedy decoding at temperature 0
+        }
+        if options["temperature"] > 0:
+            parameters["temperature"] = options["temperature"]
+        return {"inputs": input["inputs"], "parameters": parameters, "stream": True}
+
+    def stream_tokens(self, headers: Dict[str, str], data: Dict[str, Any]) -> Iterator[str]:
+        """
+        Send a streaming query and yield the generated tokens as the server-sent events arrive.
+        The stream ends at `[DONE]`, undecodable events are skipped; an error status, error event or network
+        failure raises `InferenceError` (after the tokens already received).
+        """
+        try:
+            with self.client.post(data, headers=headers, stream=True) as response:
+                if response.status_code != 200:
+                    raise InferenceError(f"HTTP {response.status_code}")
+                event_type = None
+                for line in response.iter_lines(decode_unicode=True):
+                    if not line:                        # A blank line ends an event
+                        event_type = None
+                        continue
+                    if line.startswith("event:"):
+                        event_type = line[len("event:"):].strip()
+                        continue
+                    if not line.startswith("data:"):
+                        continue
+                    payload = line[len("data:"):].strip()
+                    if payload == "[DONE]":
+                        break
+                    try:
+                        event = json.loads(payload)
+                    except ValueError:
+                        event = None
+                    if event_type == "error" or (isinstance(event, dict) and "error" in event):
+                        message = event.get("error") if isinstance(event, dict) else None
+                        raise InferenceError(message or payload)
+                    if not isinstance(event, dict):
+                        print(f"WARNING: Skipping an undecodable stream event: {payload[:200]!r}")
+                        continue
+                    token = event.get("token") or {}
+                    if token.get("text") and not token.get("special"):
+                        yield token["text"]
+        except requests.RequestException as e:
+            raise InferenceError(type(e).__name__) from e
+
+    def stream_response(self, input: Dict[str, Any], headers: Dict[str, str],
+                        max_new_tokens: int) -> Tuple[str, bool]:
+        """
+        Generate the whole answer in a single token stream, rendering it in the chat bubble as it arrives.
+        Returns the answer and whether the stream failed (the error being shown, the answer cut where it stopped).
+        """
+        response_placeholder = st.empty()
+        final_answer, failed = "", False
+        try:
+            for token in self.stream_tokens(headers, self.stream_payload(input, max_new_tokens)):
+                final_answer += token
+                response_placeholder.markdown(f"<div class='system-bubble'>{final_answer}</div>",
+                                              unsafe_allow_html=True)
+        except InferenceError as e:
+            print(f"ERROR: Inference stream failed: {e}")
+            st.error(f"Erreur de génération : {e}")
+            failed = True
+        response_placeholder.empty()
+        return final_answer.replace("Answer:", "").strip(), failed
+
     def generate_augmented_response(self,
                                     query: str,
                                     retrieved_docs: Dict[str, Any],
                                     usr_level: str = "Intermediate",
                                     temperature: float = 0.0,
-                                    max_tokens: int = 500) -> Dict[str, Any]:
+                                    max_tokens: int = 500,
+                                    history: Sequence[Dict[str, str]] = ()) -> Tuple[Dict[str, Any], Dict[str, Any]]:
         """
-        Generate a structured response object using the retrieved documents.
+        Generate a structured response object using the retrieved documents, with a prompt packed into the
+        context window minus `max_tokens` reserved for the answer. The retrieved chunks are deduplicated and
+        compressed to `context_share` of that budget. Returns the model input and the prompt report.
         """
         context: str = self.helper.add_context(usr_level)
-        query: str = f"{query}"
-        query += "\nsystem:"
-
-        response_docs = [{
-            "document_number": i + 1,
-            "title": metadata.get('title', 'Titre inconnu'),
-            "author": metadata.get('author', 'Auteur inconnu'),
-            "published": metadata.get('published', 'Date de publication non disponible'),
-            "summary": metadata.get('summary', 'Résumé non disponible')[:300],
-            "pdf_link": metadata.get('pdf_link', 'Lien PDF non disponible'),
-            "text": metadata.get('text', 'Texte non disponible')
-        } for i, metadata in enumerate(retrieved_docs.get('metadatas', [[]])[0][:5])]
+        budget = self.max_context_tokens - int(max_tokens)
+        metadatas = retrieved_docs.get('metadatas', [[]])[0]
+        texts = self.helper.chunk_texts(retrieved_docs.get('documents', [None])[0], metadatas)
+        documents = self.compressor.compress(self.helper.embed_query(query), texts, metadatas,
+                                             budget=int(self.context_share * budget))
+        prompt = self.prompt_builder.build(context, query, budget=budget, history=history, documents=documents)
 
         input: Dict[str, Any] = {
-            "inputs": f"{context}\n{query}",
-            "documents": response_docs,
+            "inputs": prompt["inputs"],
             "options": {
                 "use_cache": False,
                 "temperature": float(temperature),
@@ -84,25 +184,26 @@ class QASystem:
         if self.debug:
             st.write(f"### Prompt context:\n{context}")
             st.write(f"### User query:\n {query}")
+            st.write(f"### Prompt budget:\n", {key: value for key, value in prompt.items() if key != "inputs"})
             st.write(f"### Retrieval Query Result:\n")
             st.json(retrieved_docs)
-            st.write(f"### Response documents (Retrieval result reshaped):\n")
-            st.json(response_docs)
+            st.write(f"### Context documents (deduplicated & compressed):\n")
+            st.json(documents)
             st.write(f"### Model input:\n")
             st.json(input)
-        return input
+        return input, prompt
 
 
-    def extend_response(self, initial_feedback: str, input: Dict[str, Any], headers: Dict[str, str]) -> str:
+    def extend_response(self, initial_feedback: str, input: Dict[str, Any],
+                        headers: Dict[str, str]) -> Tuple[str, bool]:
         """
         Extend the response by querying until the answer stabilizes or the max iterations are reached.
+        Returns the answer and whether an extension query failed (the error being shown, the answer cut there).
         """
         initial_input = input["inputs"]    # Update the input with the previous exchanges
-        attachments = input["documents"]
         options = input["options"]
         new_input = {
             "inputs": initial_feedback,
-            "documents": attachments,
             "options": options
         }
 
@@ -111,8 +212,14 @@ class QASystem:
         response_placeholder = st.empty()
         final_answer = initial_feedback.replace(initial_input, "").replace("Answer:", "").strip()
 
+        failed = False
         for _ in range(max_iterations):                         # Loop to extend the response
-            new_feedback = self.query(headers, new_input)
+            try:
+                new_feedback = self.query(headers, new_input)
+            except InferenceError as e:
+                st.error(f"Erreur de génération : {e}")
+                failed = True
+                break
             if not new_feedback:
                 print("WARNING: Received empty feedback from query.")
                 break
@@ -132,79 +239,100 @@ class QASystem:
             response_placeholder.markdown(f"<div class='system-bubble'>{final_answer}</div>", unsafe_allow_html=True)
 
         response_placeholder.empty()    # Clear the real-time response placeholder
-        return final_answer.strip()
+        return final_answer.strip(), failed
 
 
     def ask_question(self, usr_question: str, usr_level: str = "Intermediate",
-                     temperature: float = 0.0, max_tokens: int = 500) -> str:
+                     temperature: float = 0.0, max_tokens: int = 500, use_answer_cache: bool = False,
+                     stream: bool = False, max_iterations: int = 8, rerank: bool = False) -> str:
         """
         Process the user's question using retrieval-augmented generation (RAG).
+        With `use_answer_cache` (and a zero temperature, outside a conversation), answers to similar questions are
+        served from the cache, and only complete answers are stored.
+        With `stream`, the answer is generated in one token stream of up to `max_iterations * max_tokens` tokens
+        instead of the query and extension loop.
+        With `rerank`, the retrieved chunks are reranked by a cross-encoder and diversified across papers (MMR).
         """
         st.session_state.total_tokens = 0
         st.session_state.tokens_count.empty()
         try:
-            conversation_history = "\n".join(
-                [f"user: {msg['content']}" if msg["role"] == "user" else f"system: {msg['content']}"
-                 for msg in st.session_state.messages]
-            )
-            query_with_history = f"{conversation_history}\nuser:\n{usr_question}\n_____________________________\n"
-            retrieved_docs = self.helper.retrieve_documents("arxiv_papers_collection", usr_question)
-            input = self.generate_augmented_response(query=query_with_history,
-                                                     retrieved_docs=retrieved_docs,
-                                                     usr_level=usr_level,
-                                                     temperature=temperature,
-                                                     max_tokens=max_tokens)
+            retrieved_docs = self.helper.retrieve_documents(self.helper.collection_name, usr_question, rerank=rerank)
+
+            # Follow-up questions depend on the conversation, which neither retrieval nor the cache key sees
+            use_answer_cache = use_answer_cache and float(temperature) == 0.0 and not st.session_state.messages
+            if use_answer_cache:
+                question_embedding = self.helper.embed_query(usr_question)
+                doc_ids = retrieved_docs.get("ids", [[]])[0]
+                cached_answer = self.answer_cache.lookup(question_embedding, usr_level, doc_ids)
+                if cached_answer is not None:
+                    print("\nINFO: -- Answer served from the semantic cache.\n")
+                    if self.debug:
+                        st.write("### Answer cache:\n", self.answer_cache.stats())
+                    return cached_answer
+
+            input, prompt = self.generate_augmented_response(query=usr_question,
+                                                             retrieved_docs=retrieved_docs,
+                                                             usr_level=usr_level,
+                                                             temperature=temperature,
+                                                             max_tokens=max_tokens,
+                                                             history=st.session_state.messages)
 
             # -- Tokens input count
-            st.session_state.total_tokens = self.helper.calculate_tokens(input=input)
+            st.session_state.total_tokens = prompt["tokens"]
             with st.session_state.tokens_count:
                 st.write(f"`{st.session_state.get('total_tokens', 0)}` tokens")
 
-            progress_value = min(st.session_state.total_tokens / 4096, 1.0)
+            progress_value = min(st.session_state.total_tokens / self.max_context_tokens, 1.0)
             st.session_state.tokens_bar.progress(progress_value)
+            if prompt["dropped_turns"]:
+                print(f"INFO: -- {prompt['dropped_turns']} oldest conversation turn(s) left out of the token budget.")
+
+            # Display the context, user question, and parameters
+            print(f"Context & User question:\n--------------------------\n {input['inputs']}\n")
+            print(f"Parameters:\n---------------------------------------\n"
+                  f"- Temperature: {temperature}\n"
+                  f"- Max tokens per answer: {max_tokens}\n"
+                  f"- Explanation: {usr_level}\n"
+                  f"- Total tokens: {st.session_state.total_tokens}\n")
+
+            headers = {
+                "Authorization": f"Bearer {self.api_key}",
+                "Content-Type": "application/json"
+            }
 
-            if st.session_state.total_tokens > 2000:
-                #st.info("Context will exceed the 4096 tokens limit, conversation memory trimmed.\n"
-                self.helper.trim_conversation_history()
+            generation_start = time.perf_counter()
+            if stream:
+                budget = min(max_iterations * int(max_tokens),
+                             self.max_context_tokens - st.session_state.total_tokens)
+                final_answer, failed = self.stream_response(input, headers, max_new_tokens=max(budget, 1))
             else:
-
-                print(f"Context & User question:\n--------------------------\n {input['inputs']}\n")   # Display the context, user question, and parameters
-                print(f"Parameters:\n---------------------------------------\n"
-                      f"- Temperature: {temperature}\n"
-                      f"- Max tokens per answer: {max_tokens}\n"
-                      f"- Explanation: {usr_level}\n"
-                      f"- Total tokens: {st.session_state.total_tokens}\n")
-
-                headers = {
-                    "Authorization": f"Bearer {self.api_key}",
-                    "Content-Type": "application/json"
-                }
-
                 feedback = self.query(headers, input)                                                       # Send the query to the model
                 answer = feedback.replace(input["inputs"], "").replace("Answer:", "")    # Extract the answer from the feedback
-                final_answer = self.extend_response(feedback, input, headers)                               # Extend the answer if needed
-
+                final_answer, failed = self.extend_response(feedback, input, headers)    # Extend the answer if needed
                 print(f"\nInitial answer:\n----------------------------------------------------\n{answer}")
-                print(f"\nReturning final_answer:\n----------------------------------------------------\n{final_answer}")
 
-                st.session_state.response_placeholder = None
+            if self.debug:
+                st.write("### Inference client:\n", self.client.stats())
+            print(f"\nReturning final_answer:\n----------------------------------------------------\n{final_answer}")
 
-                # -- Tokens output count
-                st.session_state.tokens_count.empty()
+            st.session_state.response_placeholder = None
 
-                st.session_state.total_tokens += self.helper.count_tokens(final_answer)
-                with st.session_state.tokens_count:
-                    st.write(f"`{st.session_state.get('total_tokens', 0)}` tokens")
+            # -- Tokens output count (cached for the answer's turn in the next prompts)
+            st.session_state.tokens_count.empty()
 
-                progress_value = min(st.session_state.total_tokens / 4096, 1.0)
-                st.session_state.tokens_bar.progress(progress_value)
+            st.session_state.total_tokens += self.prompt_builder.message_tokens({"role": "system",
+                                                                                 "content": final_answer})
+            if use_answer_cache and final_answer and not failed:
+                self.answer_cache.store(usr_question, question_embedding, usr_level, doc_ids, final_answer,
+                                        latency=time.perf_counter() - generation_start,
+                                        tokens=st.session_state.total_tokens)
+            with st.session_state.tokens_count:
+                st.write(f"`{st.session_state.get('total_tokens', 0)}` tokens")
 
-                if st.session_state.total_tokens > 2000:                                                 # Check if the response exceeds the token limit
-                    #st.info("Request exceeds the 4096 tokens limit, conversation memory was trimmed.\n"
-                    #        "Note: you can also save or download a discussion before exceeding the context window size limit. (see tokens numbers above)")
-                    self.helper.trim_conversation_history()
+            progress_value = min(st.session_state.total_tokens / self.max_context_tokens, 1.0)
+            st.session_state.tokens_bar.progress(progress_value)
 
-                return final_answer if final_answer else "No valid answer found"
+            return final_answer if final_answer else "No valid answer found"
 
         except Exception as e:
             st.error(f"Erreur système : {str(e)}")
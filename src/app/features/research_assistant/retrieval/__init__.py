@@ -0,0 +1,6 @@
+from .bm25_index import BM25Index, reciprocal_rank_fusion
+from .cache import LRUCache, normalize_query
+from .rerank import cross_encoder_scores, maximal_marginal_relevance
+
+__all__ = ["BM25Index", "reciprocal_rank_fusion", "LRUCache", "normalize_query",
+           "cross_encoder_scores", "maximal_marginal_relevance"]
@@ -0,0 +1,117 @@
+import math
+import os
+import pickle
+import re
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Tuple
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[-_.][a-z0-9]+)*")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase a text and split it into alphanumeric terms (keeping `ms-marco`, `v1.2` style terms whole)."""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class BM25Index:
+    """Incremental Okapi BM25 index over chunk texts, persisted with pickle."""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        """Initialize an empty index with the BM25 parameters."""
+        self.k1 = k1
+        self.b = b
+        self.doc_ids: List[str] = []
+        self.doc_lengths: List[int] = []
+        self.doc_terms: List[Tuple[str, ...]] = []
+        self.id_to_index: Dict[str, int] = {}
+        self.postings: Dict[str, Dict[int, int]] = defaultdict(dict)
+        self.total_length = 0
+
+    def __len__(self) -> int:
+        return len(self.id_to_index)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self.id_to_index
+
+    def remove(self, doc_id: str) -> None:
+        """Remove a document from the index (its slot is left empty)."""
+        index = self.id_to_index.pop(doc_id, None)
+        if index is None:
+            return
+        for term in self.doc_terms[index]:
+            self.postings[term].pop(index, None)
+        self.total_length -= self.doc_lengths[index]
+        self.doc_lengths[index] = 0
+        self.doc_terms[index] = ()
+
+    def add(self, doc_ids: Iterable[str], texts: Iterable[str]) -> None:
+        """Add (or replace) documents in the index."""
+        for doc_id, text in zip(doc_ids, texts):
+            if doc_id in self.id_to_index:
+                self.remove(doc_id)
+            terms = Counter(tokenize(text))
+            index = len(self.doc_ids)
+            self.doc_ids.append(doc_id)
+            self.doc_lengths.append(sum(terms.values()))
+            self.doc_terms.append(tuple(terms))
+            self.id_to_index[doc_id] = index
+            self.total_length += self.doc_lengths[index]
+            for term, frequency in terms.items():
+                self.postings[term][index] = frequency
+
+    def search(self, query: str, top_k: int = 10) -> List[Tuple[str, float]]:
+        """Return the `top_k` (doc_id, score) pairs for a query, best first."""
+        n_docs = len(self)
+        if not n_docs:
+            return []
+        average_length = self.total_length / n_docs
+        scores: Dict[int, float] = defaultdict(float)
+
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for index, frequency in postings.items():
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[index] / average_length)
+                scores[index] += idf * frequency * (self.k1 + 1) / (frequency + norm)
+
+        best = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:top_k]
+        return [(self.doc_ids[index], score) for index, score in best]
+
+    def save(self, path: str) -> None:
+        """Atomically persist the index to `path`."""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        """Load an index from `path`, or return an empty one if there is none."""
+        if not os.path.exists(path):
+            return cls()
+        with open(path, "rb") as f:
+            return pickle.load(f)
+
+    @classmethod
+    def from_collection(cls, collection, page_size: int = 5000) -> "BM25Index":
+        """Build an index over all the chunk texts (documents) stored in a Chroma collection."""
+        index = cls()
+        for offset in range(0, collection.count(), page_size):
+            page = collection.get(include=["documents", "metadatas"], limit=page_size, offset=offset)
+            index.add(page["ids"], [document or metadata.get("text", "")      # Chunks written before documents
+                                    for document, metadata in zip(page["documents"], page["metadatas"])])
+        return index
+
+
+def reciprocal_rank_fusion(rankings: Dict[str, List[str]], weights: Dict[str, float] = None,
+                           k: int = 60) -> List[Tuple[str, float]]:
+    """Fuse several ranked id lists with weighted reciprocal rank fusion, best first."""
+    weights = weights or {}
+    scores: Dict[str, float] = defaultdict(float)
+    for name, ranking in rankings.items():
+        weight = weights.get(name, 1.0)
+        for rank, doc_id in enumerate(ranking, 1):
+            scores[doc_id] += weight / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
@@ -0,0 +1,62 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+_MISSING = object()
+
+
+def normalize_query(text: str) -> str:
+    """Normalize a query for cache keys: lowercase, single spaces, no trailing punctuation."""
+    return " ".join(text.lower().split()).rstrip(" ?!.")
+
+
+class LRUCache:
+    """Thread-safe LRU cache with a size limit, an optional time-to-live and hit/miss counters."""
+
+    def __init__(self, max_size: int = 1024, ttl: Optional[float] = None):
+        """Initialize the cache with its maximum number of entries and TTL in seconds (None: no expiry)."""
+        self.max_size = max_size
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.hits = self.misses = self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value of a key, or `default` if it is missing or expired."""
+        with self.lock:
+            value, expires = self.entries.get(key, (_MISSING, None))
+            if value is not _MISSING and expires is not None and expires < time.monotonic():
+                del self.entries[key]
+                value = _MISSING
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Store a value, evicting the least recently used entries beyond `max_size`."""
+        with self.lock:
+            expires = time.monotonic() + self.ttl if self.ttl is not None else None
+            self.entries[key] = (value, expires)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Remove all entries (counters are kept)."""
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the size and hit/miss counters of the cache."""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self.entries), "max_size": self.max_size,
+                "hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
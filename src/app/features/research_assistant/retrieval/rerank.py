@@ -0,0 +1,44 @@
+from typing import List, Sequence
+
+import numpy as np
+
+
+def cross_encoder_scores(cross_encoder, query: str, passages: Sequence[str], batch_size: int = 32) -> np.ndarray:
+    """Score (query, passage) pairs with a cross-encoder, in batches."""
+    if not passages:
+        return np.zeros(0, dtype=np.float32)
+    pairs = [(query, passage) for passage in passages]
+    return np.asarray(cross_encoder.predict(pairs, batch_size=batch_size, show_progress_bar=False),
+                      dtype=np.float32).reshape(-1)
+
+
+def maximal_marginal_relevance(relevance: Sequence[float], embeddings: np.ndarray, groups: Sequence[str],
+                               top_k: int, mmr_lambda: float = 0.5) -> List[int]:
+    """Select `top_k` candidates trading relevance against redundancy with the already selected ones.
+
+    Relevance is min-max scaled to [0, 1]. The redundancy of a candidate is its highest cosine similarity
+    to a selected one, candidates of an already selected group (paper) counting as fully redundant.
+    `mmr_lambda` = 1 keeps the relevance order, lower values diversify more.
+    """
+    relevance = np.asarray(relevance, dtype=np.float32)
+    n = len(relevance)
+    if n == 0:
+        return []
+    spread = relevance.max() - relevance.min()
+    relevance = (relevance - relevance.min()) / spread if spread > 0 else np.ones(n, dtype=np.float32)
+
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    embeddings = embeddings / np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+    similarity = embeddings @ embeddings.T
+    groups = np.asarray(groups, dtype=object)
+    similarity[groups[:, None] == groups[None, :]] = 1.0
+
+    selected = [int(np.argmax(relevance))]
+    redundancy = similarity[selected[0]].copy()
+    while len(selected) < min(top_k, n):
+        scores = mmr_lambda * relevance - (1 - mmr_lambda) * redundancy
+        scores[selected] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        redundancy = np.maximum(redundancy, similarity[best])
+    return selected
@@ -1,32 +1,54 @@
-from typing import Tuple
+from typing import Callable, Tuple
 
 import streamlit as st
 
+from .processing.collections import active_collection
 from .processing.preprocessor import DocumentProcessor
 from .qa_system import QASystem, user_interface
 from .utilities.helper import VECTOR_STORE_FILE
 
 MODEL_NAME = "meta-llama/Llama-2-7b-chat-hf"
-EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
 
-@st.cache_resource
-def models_loading(hg_api_key: str, debug: bool = False) -> Tuple[DocumentProcessor, QASystem]:
-    """Load and cache document processor and QA system models."""
+@st.cache_resource(show_spinner="Loading document processing models...", max_entries=1)
+def cached_document_processor(debug: bool, embedding_model: str, chunk_size: int, chunk_overlap: int,
+                            segmentation_mode: str) -> DocumentProcessor:
+    """Load and cache the document processor of a collection configuration."""
+    return DocumentProcessor(
+        debug=debug,
+        embedding_model=embedding_model,
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        segmentation_mode=segmentation_mode
+    )
+
+def get_document_processor(debug: bool = False) -> DocumentProcessor:
+    """Return the document processor of the active collection, only loaded when vectorization needs it."""
+    active = active_collection()
+    return cached_document_processor(debug, active["embedding_model"], active["chunk_size"], active["chunk_overlap"],
+                                     active["segmentation_mode"])
+
+@st.cache_resource(show_spinner="Loading QA system...", max_entries=1)
+def cached_qa_system(hg_api_key: str, debug: bool, collection_name: str, embedding_model: str) -> QASystem:
+    """Load and cache the QA system of a collection, a migration switching the collection loads a new one."""
     print("\n === Hugging Face logging ===\n")
-    return (
-        DocumentProcessor(
-            debug=debug,
-            embedding_model=EMBEDDING_MODEL
-        ),
-        QASystem(
-            api_key=hg_api_key,
-            debug=debug,
-            model_name=MODEL_NAME,
-            embedding_model=EMBEDDING_MODEL,
-            vector_store_file=VECTOR_STORE_FILE
-        )
+    return QASystem(
+        api_key=hg_api_key,
+        debug=debug,
+        model_name=MODEL_NAME,
+        embedding_model=embedding_model,
+        vector_store_file=VECTOR_STORE_FILE,
+        collection_name=collection_name
     )
 
-def run_assistance(qa_system: QASystem, debug: bool = False) -> None:
+def get_qa_system(hg_api_key: str, debug: bool = False) -> QASystem:
+    """Return the QA system of the active collection, only loaded when the first question is asked."""
+    active = active_collection()
+    return cached_qa_system(hg_api_key, debug, active["name"], active["embedding_model"])
+
+def models_loading(hg_api_key: str, debug: bool = False) -> Tuple[DocumentProcessor, QASystem]:
+    """Load and cache document processor and QA system models."""
+    return get_document_processor(debug), get_qa_system(hg_api_key, debug)
+
+def run_assistance(load_qa_system: Callable[[], QASystem], debug: bool = False) -> None:
     """Main logic for the research assistant app as User Interface and QA system."""
-    user_interface(qa_system)
\ No newline at end of file
+    user_interface(load_qa_system)
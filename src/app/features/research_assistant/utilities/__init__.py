@@ -1,3 +1,6 @@
-from .helper import load_processed_pdfs, save_processed_pdfs, display_files
+from .helper import load_processed_pdfs, display_files
+from .model_registry import get_embedding_model, get_cross_encoder, get_tokenizer, get_spacy_pipeline, \
+    memory_report
 
-__all__ = ["load_processed_pdfs", "save_processed_pdfs", "display_files"]
\ No newline at end of file
+__all__ = ["load_processed_pdfs", "display_files",
+           "get_embedding_model", "get_cross_encoder", "get_tokenizer", "get_spacy_pipeline", "memory_report"]
\ No newline at end of file
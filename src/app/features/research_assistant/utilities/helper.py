@@ -1,14 +1,25 @@
 import os
 import pickle
+import time
 from typing import List
 
 import streamlit as st
 
 PROCESSED_PDFS_FILE = "src/app/features/research_assistant/checkpoints/processed_pdfs.pkl"
 VECTOR_STORE_FILE = "src/app/features/research_assistant/checkpoints/.chromadb"
+FAISS_STORE_DIR = "src/app/features/research_assistant/checkpoints/.faiss"
+BM25_INDEX_FILE = "src/app/features/research_assistant/checkpoints/bm25_index.pkl"
+COLLECTION_VERSION_FILE = "src/app/features/research_assistant/checkpoints/collection_version"
+ACTIVE_COLLECTION_FILE = "src/app/features/research_assistant/checkpoints/active_collection.json"
+ANSWER_CACHE_FILE = "database/answer_cache.db"
+PDF_CACHE_DIR = "src/app/features/research_assistant/checkpoints/.pdf_cache"
+COLLECTION_NAME = "arxiv_papers_collection"
+ARXIV_DB_FILE = "./database/arxiv_data.db"
+JOBS_DB_FILE = "database/jobs.db"
+JOBS_WORKER_LOG = "database/.jobs_worker.log"
 
 def load_processed_pdfs() -> List[str]:
-    """Load processed PDFs from a pickle file, handle errors gracefully."""
+    """Load the legacy list of processed PDFs (imported once into the ingestion manifest), handle errors gracefully."""
     pdf_links = []
     if os.path.exists(PROCESSED_PDFS_FILE):
         try:
@@ -18,14 +29,29 @@ def load_processed_pdfs() -> List[str]:
             st.error(f"Error loading processed PDFs: {e}")
     return pdf_links
 
-def save_processed_pdfs(processed_pdfs: List[str]) -> None:
-    """Save the list of processed PDFs to a pickle file, with error handling."""
+
+def collection_version() -> str:
+    """Return the version stamp of the vector store, changed every time documents are added."""
     try:
-        with open(PROCESSED_PDFS_FILE, "wb") as f:
-            pickle.dump(processed_pdfs, f)
-        st.success("Batch saved successfully.")
-    except Exception as e:
-        st.error(f"Error saving batch: {e}")
+        with open(COLLECTION_VERSION_FILE, "r") as f:
+            return f.read().strip()
+    except OSError:
+        return "0"
+
+
+def bump_collection_version() -> None:
+    """Mark the vector store as changed, invalidating the retrieval caches keyed on its version."""
+    tmp_file = f"{COLLECTION_VERSION_FILE}.{os.getpid()}.tmp"
+    with open(tmp_file, "w") as f:
+        f.write(str(time.time_ns()))
+    os.replace(tmp_file, COLLECTION_VERSION_FILE)       # Atomic: readers never see an empty stamp
+
+
+def collection_bm25_file(collection_name: str) -> str:
+    """Path of the sparse index of a collection (the original collection keeps the original file)."""
+    if collection_name == COLLECTION_NAME:
+        return BM25_INDEX_FILE
+    return os.path.join(os.path.dirname(BM25_INDEX_FILE), f"bm25_{collection_name}.pkl")
 
 
 def display_files(new_pdfs: list, already_processed: list) -> None:
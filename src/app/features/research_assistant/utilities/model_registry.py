@@ -0,0 +1,99 @@
+import os
+import threading
+from typing import Any, Callable, Dict, List, Tuple
+
+_registry_lock = threading.Lock()
+_key_locks: Dict[Tuple, threading.Lock] = {}
+_models: Dict[Tuple, Any] = {}
+_memory: Dict[Tuple, Dict[str, float]] = {}
+
+
+def resident_memory() -> int:
+    """Return the resident set size of the current process in bytes (0 if it cannot be read)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        try:
+            import resource
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        except ImportError:
+            return 0
+
+
+def parameters_memory(model: Any) -> int:
+    """Return the size in bytes of the parameters and buffers of a torch model (0 for other objects)."""
+    if not hasattr(model, "parameters") and hasattr(model, "model"):       # CrossEncoder wraps its torch model
+        model = model.model
+    if not hasattr(model, "parameters"):
+        return 0
+    tensors = list(model.parameters()) + list(getattr(model, "buffers", lambda: [])())
+    return sum(tensor.numel() * tensor.element_size() for tensor in tensors)
+
+
+def get_model(kind: str, name: str, loader: Callable[[], Any], **config) -> Any:
+    """Return the shared instance of a model, loading it on first use.
+
+    Instances are keyed by kind, name and config. Loading holds a per-key lock, so concurrent callers
+    wait for the single load of the same model without blocking the loads of other models.
+    """
+    key = (kind, name, tuple(sorted(config.items())))
+    if key in _models:
+        return _models[key]
+
+    with _registry_lock:
+        key_lock = _key_locks.setdefault(key, threading.Lock())
+    with key_lock:
+        if key not in _models:
+            rss_before = resident_memory()
+            model = loader()
+            _memory[key] = {
+                "rss_mb": (resident_memory() - rss_before) / 1024 ** 2,
+                "parameters_mb": parameters_memory(model) / 1024 ** 2,
+            }
+            _models[key] = model
+    return _models[key]
+
+
+def get_embedding_model(name: str, **config):
+    """Shared SentenceTransformer embedding model."""
+    def load():
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer(name, **config)
+
+    return get_model("embedding", name, load, **config)
+
+
+def get_cross_encoder(name: str, **config):
+    """Shared sentence-transformers CrossEncoder (reranking model)."""
+    def load():
+        from sentence_transformers import CrossEncoder
+        return CrossEncoder(name, **config)
+
+    return get_model("cross_encoder", name, load, **config)
+
+
+def get_tokenizer(name: str, **config):
+    """Shared Hugging Face tokenizer, loaded without its model weights."""
+    def load():
+        from transformers import AutoTokenizer
+        return AutoTokenizer.from_pretrained(name, **config)
+
+    return get_model("tokenizer", name, load, **config)
+
+
+def get_spacy_pipeline(mode: str = "senter", model_name: str = "en_core_web_sm"):
+    """Shared spaCy pipeline restricted to sentence segmentation (see `load_sentence_pipeline`)."""
+    def load():
+        from ..processing.segmenter import load_sentence_pipeline
+        return load_sentence_pipeline(mode, model_name)
+
+    return get_model("spacy", model_name, load, mode=mode)
+
+
+def memory_report() -> List[Dict[str, Any]]:
+    """Describe the loaded models with the resident memory measured at their load."""
+    return [
+        {"kind": kind, "name": name, "config": dict(config), **_memory.get((kind, name, config), {})}
+        for kind, name, config in list(_models)
+    ]
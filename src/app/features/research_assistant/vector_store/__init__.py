@@ -0,0 +1,4 @@
+from .base import ChromaStore, VectorStore
+from .registry import BACKENDS, open_store, store_backend
+
+__all__ = ["VectorStore", "ChromaStore", "BACKENDS", "open_store", "store_backend"]
@@ -0,0 +1,81 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Sequence
+
+DEFAULT_MAX_BATCH_SIZE = 5000
+
+
+class VectorStore(ABC):
+    """A collection of embedded chunks, with the subset of the Chroma collection API used by the app.
+
+    Results keep Chroma's layout: `get` returns flat lists under "ids", "metadatas", "documents" (and
+    "embeddings"), `query` one list per query embedding under "ids", "metadatas", "documents" and "distances".
+    `where` filters are `{field: value}` or `{field: {"$in": [...]}}`.
+    """
+
+    name: str = ""
+    metadata: Dict[str, Any] = {}
+    max_batch_size: int = DEFAULT_MAX_BATCH_SIZE
+
+    @abstractmethod
+    def count(self) -> int:
+        """Number of chunks in the collection."""
+
+    @abstractmethod
+    def upsert(self, ids: List[str], embeddings: List[List[float]], metadatas: List[Dict],
+               documents: List[str]) -> None:
+        """Insert chunks, replacing those with the same ids."""
+
+    @abstractmethod
+    def delete(self, ids: Optional[List[str]] = None, where: Optional[Dict] = None) -> None:
+        """Delete chunks by id or by metadata filter."""
+
+    @abstractmethod
+    def get(self, ids: Optional[List[str]] = None, where: Optional[Dict] = None, limit: Optional[int] = None,
+            offset: Optional[int] = None, include: Sequence[str] = ("metadatas", "documents")) -> Dict[str, Any]:
+        """Read chunks by id or metadata filter, in insertion order."""
+
+    @abstractmethod
+    def query(self, query_embeddings, n_results: int = 10,
+              include: Sequence[str] = ("metadatas", "documents", "distances")) -> Dict[str, Any]:
+        """Nearest chunks of one or several query embeddings, searched in one batch."""
+
+    def persist(self) -> None:
+        """Make the writes of this process visible to the readers of the other processes."""
+
+
+class ChromaStore(VectorStore):
+    """A Chroma collection (the Chroma client persists every write by itself)."""
+
+    def __init__(self, collection, max_batch_size: int = DEFAULT_MAX_BATCH_SIZE):
+        """Wrap a Chroma collection."""
+        self.collection = collection
+        self.name = collection.name
+        self.metadata = collection.metadata or {}
+        self.max_batch_size = max_batch_size
+
+    @classmethod
+    def open(cls, path: str, name: str, metadata: Optional[Dict] = None, create: bool = True) -> "ChromaStore":
+        """Open a collection of the persistent Chroma client at `path`, `metadata` being only set on creation."""
+        import chromadb
+
+        client = chromadb.PersistentClient(path=path)
+        if create:
+            collection = client.get_or_create_collection(name=name, metadata=metadata or None)
+        else:
+            collection = client.get_collection(name)
+        return cls(collection, max_batch_size=min(DEFAULT_MAX_BATCH_SIZE, client.get_max_batch_size()))
+
+    def count(self) -> int:
+        return self.collection.count()
+
+    def upsert(self, ids, embeddings, metadatas, documents) -> None:
+        self.collection.upsert(ids=ids, embeddings=embeddings, metadatas=metadatas, documents=documents)
+
+    def delete(self, ids=None, where=None) -> None:
+        self.collection.delete(ids=ids, where=where)
+
+    def get(self, ids=None, where=None, limit=None, offset=None, include=("metadatas", "documents")):
+        return self.collection.get(ids=ids, where=where, limit=limit, offset=offset, include=list(include))
+
+    def query(self, query_embeddings, n_results=10, include=("metadatas", "documents", "distances")):
+        return self.collection.query(query_embeddings=query_embeddings, n_results=n_results, include=list(include))
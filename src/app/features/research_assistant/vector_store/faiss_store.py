@@ -0,0 +1,428 @@
+import glob
+import json
+import math
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .base import DEFAULT_MAX_BATCH_SIZE, VectorStore
+
+INDEX_TYPES = ("flat", "ivf", "hnsw")
+QUANTIZATIONS = ("none", "float16", "int8", "binary")
+RESCORE_FACTORS = {"none": 1, "float16": 2, "int8": 4, "binary": 20}    # Candidates rescored per result
+MIN_CALIBRATION = 1000                  # Vectors needed to calibrate int8 ranges and binary thresholds
+SIDECAR_FILE = "chunks.db"
+SQL_BATCH_SIZE = 500                    # Ids per `IN (...)`, below the SQLite variable limit
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunks (
+    row INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL UNIQUE,
+    arxiv_id TEXT,
+    document TEXT,
+    metadata TEXT NOT NULL,
+    embedding BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS chunks_arxiv_id ON chunks (arxiv_id);
+CREATE TABLE IF NOT EXISTS store_info (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+"""
+
+
+def _batches(items: Sequence, size: int = SQL_BATCH_SIZE) -> Iterator[Sequence]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _nlist(total: int) -> int:
+    """Number of IVF lists for `total` vectors."""
+    return max(1, min(65536, int(math.sqrt(total))))
+
+
+def _vectors(blobs: List[bytes]) -> np.ndarray:
+    return np.frombuffer(b"".join(blobs), dtype=np.float32).reshape(len(blobs), -1)
+
+
+def _where_sql(where: Optional[Dict]) -> Tuple[str, List]:
+    """SQL condition of a Chroma `where` filter on the sidecar (`{field: value}` or `{field: {"$in": [...]}}`)."""
+    clauses, params = [], []
+    for field, condition in (where or {}).items():
+        column = "arxiv_id" if field == "arxiv_id" else f"json_extract(metadata, '$.{field}')"
+        if isinstance(condition, dict):
+            operator, value = next(iter(condition.items()))
+            if operator == "$in":
+                clauses.append(f"{column} IN ({','.join('?' * len(value))})" if value else "0")
+                params.extend(value)
+            elif operator in ("$eq", "$ne"):
+                clauses.append(f"{column} {'=' if operator == '$eq' else '!='} ?")
+                params.append(value)
+            else:
+                raise ValueError(f"Unsupported where operator: {operator}")
+        else:
+            clauses.append(f"{column} = ?")
+            params.append(condition)
+    return " AND ".join(clauses) or "1", params
+
+
+class FaissStore(VectorStore):
+    """A collection kept as FAISS index files and a SQLite sidecar holding the chunks and their vectors.
+
+    The sidecar is the source of truth: an index row id is a sidecar row, an upserted chunk gets a new row and
+    deleted rows stay in the index as tombstones, filtered out of the results (over-fetching when needed) until
+    the index is rebuilt. Writers keep the index in memory and `persist()` saves it as a new generation file, made
+    current (with its counters and calibration) in one sidecar transaction. It is rebuilt when tombstones pile up,
+    and retrained as the collection grows when it needs training (IVF, int8, binary), a float32 flat index
+    standing in until there are enough vectors. Read-only stores memory-map the file, which FAISS only supports
+    for IVF lists (other indexes are loaded in memory), and follow the current generation.
+
+    With `quantization`, the index holds float16, int8 (ranges calibrated on a sample) or binary codes (bits set
+    above the per-dimension median, searched by Hamming distance) while the sidecar keeps float32 vectors: each
+    query searches `rescore_factor` candidates per result in the compact index and rescores them exactly
+    (0 keeps the compact distances, Hamming ones for binary codes).
+    """
+
+    def __init__(self, path: str, name: str, metadata: Optional[Dict] = None, index_type: str = "hnsw",
+                 quantization: str = "none", read_only: bool = False, create: bool = True, mmap: bool = True,
+                 nprobe: int = 64, hnsw_m: int = 32, ef_construction: int = 200, ef_search: int = 128,
+                 rescore_factor: Optional[int] = None, rebuild_ratio: float = 0.2,
+                 max_batch_size: int = DEFAULT_MAX_BATCH_SIZE):
+        """Open the store of collection `name` under `path`; `metadata`, `index_type` and `quantization` are only
+        set on creation."""
+        import faiss
+
+        self.faiss = faiss
+        self.name = name
+        self.directory = os.path.join(path, name)
+        if (read_only or not create) and not os.path.exists(os.path.join(self.directory, SIDECAR_FILE)):
+            raise ValueError(f"Collection {name} does not exist.")
+        os.makedirs(self.directory, exist_ok=True)
+        self.read_only = read_only
+        self.mmap = mmap
+        self.nprobe = nprobe
+        self.hnsw_m = hnsw_m
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self.rebuild_ratio = rebuild_ratio
+        self.max_batch_size = max_batch_size
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(os.path.join(self.directory, SIDECAR_FILE), check_same_thread=False)
+        if not read_only:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.executescript(SCHEMA)
+            with self.conn:
+                self.conn.executemany("INSERT OR IGNORE INTO store_info VALUES (?, ?)",
+                                      [("metadata", json.dumps(metadata or {})), ("index_type", index_type),
+                                       ("quantization", quantization)])
+        self.metadata = json.loads(self.info("metadata"))
+        self.index_type = self.info("index_type")
+        self.quantization = self.info("quantization", "none")
+        if self.index_type not in INDEX_TYPES:
+            raise ValueError(f"Unknown FAISS index type: {self.index_type} (expected one of {INDEX_TYPES})")
+        if self.quantization not in QUANTIZATIONS:
+            raise ValueError(f"Unknown quantization: {self.quantization} (expected one of {QUANTIZATIONS})")
+        self.rescore_factor = RESCORE_FACTORS[self.quantization] if rescore_factor is None else rescore_factor
+        self.index = None
+        self.generation = None          # Index file loaded, 0 being the `index.faiss` of the first stores
+        self.indexed_row = 0            # Last sidecar row in the index
+        self.dead = 0                   # Index entries whose row was deleted or replaced
+        self.trained_on = 0             # Vectors in the index when it was trained, 0 for the float32 stand-in
+        self.thresholds = None          # Per-dimension thresholds of binary codes
+
+    def info(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        row = self.conn.execute("SELECT value FROM store_info WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_info(self, **values) -> None:
+        self.conn.executemany("INSERT OR REPLACE INTO store_info VALUES (?, ?)",
+                              [(key, str(value)) for key, value in values.items()])
+
+    @property
+    def dim(self) -> Optional[int]:
+        dim = self.info("dim")
+        return int(dim) if dim else None
+
+    @property
+    def needs_training(self) -> bool:
+        return self.index_type == "ivf" or self.quantization in ("int8", "binary")
+
+    @property
+    def quantized(self) -> bool:
+        """Whether the index holds quantized codes (not the float32 stand-in of an untrained index)."""
+        return self.quantization != "none" and (self.trained_on > 0 or not self.needs_training)
+
+    def index_file(self, generation: int) -> str:
+        return os.path.join(self.directory, f"index.{generation}.faiss" if generation else "index.faiss")
+
+    def count(self) -> int:
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    # -- Writes
+
+    def upsert(self, ids, embeddings, metadatas, documents) -> None:
+        if self.read_only:
+            raise RuntimeError(f"Collection {self.name} was opened read-only.")
+        if not ids:
+            return
+        vectors = np.ascontiguousarray(np.asarray(embeddings, dtype=np.float32).reshape(len(ids), -1))
+        with self.lock, self.conn:
+            if self.dim is None:
+                if self.quantization == "binary" and vectors.shape[1] % 8:
+                    raise ValueError(f"Binary codes need a dimension multiple of 8 (got {vectors.shape[1]}).")
+                self.set_info(dim=vectors.shape[1])
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match the collection ({self.dim}).")
+            self.load()
+            self.remove(ids)
+            self.conn.executemany(
+                "INSERT INTO chunks (id, arxiv_id, document, metadata, embedding) VALUES (?, ?, ?, ?, ?)",
+                [(doc_id, (metadata or {}).get("arxiv_id"), document, json.dumps(metadata or {}), vector.tobytes())
+                 for doc_id, metadata, document, vector in zip(ids, metadatas, documents, vectors)]
+            )
+            self.catch_up()
+
+    def delete(self, ids=None, where=None) -> None:
+        if self.read_only:
+            raise RuntimeError(f"Collection {self.name} was opened read-only.")
+        with self.lock, self.conn:
+            self.load()
+            if ids is None:
+                condition, params = _where_sql(where)
+                ids = [row[0] for row in self.conn.execute(f"SELECT id FROM chunks WHERE {condition}", params)]
+            self.remove(list(ids))
+
+    def remove(self, ids: List[str]) -> None:
+        """Delete sidecar rows, their index entries becoming tombstones."""
+        for batch in _batches(ids):
+            marks = ",".join("?" * len(batch))
+            self.dead += self.conn.execute(f"SELECT COUNT(*) FROM chunks WHERE id IN ({marks}) AND row <= ?",
+                                           (*batch, self.indexed_row)).fetchone()[0]
+            self.conn.execute(f"DELETE FROM chunks WHERE id IN ({marks})", batch)
+
+    def rows(self, after: int = 0, page_size: int = 10000) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """Pages of (row ids, vectors) of the sidecar rows after `after`."""
+        while True:
+            page = self.conn.execute("SELECT row, embedding FROM chunks WHERE row > ? ORDER BY row LIMIT ?",
+                                     (after, page_size)).fetchall()
+            if not page:
+                return
+            after = page[-1][0]
+            yield np.array([row for row, _ in page], dtype=np.int64), _vectors([blob for _, blob in page])
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        """Vectors as the index takes them: packed bits for binary codes, float32 otherwise."""
+        if isinstance(self.index, self.faiss.IndexBinary):
+            return np.packbits(vectors > self.thresholds, axis=1)
+        return vectors
+
+    def catch_up(self) -> None:
+        """Add the sidecar rows written after the last indexed row to the in-memory index."""
+        if self.index is None:
+            self.build()
+            return
+        for rows, vectors in self.rows(self.indexed_row):
+            self.index.add_with_ids(self.encode(vectors), rows)
+            self.indexed_row = int(rows[-1])
+
+    def trainable(self, total: int) -> bool:
+        """Whether `total` vectors are enough to train the index (IVF lists, int8 ranges, binary thresholds)."""
+        needed = 39 * _nlist(total) if self.index_type == "ivf" else 0
+        return total >= max(needed, MIN_CALIBRATION if self.quantization in ("int8", "binary") else 0)
+
+    def make_index(self, dim: int, nlist: int):
+        """Empty index of the store's type and quantization."""
+        faiss = self.faiss
+        if self.quantization == "binary":
+            if self.index_type == "ivf":
+                return faiss.IndexBinaryIVF(faiss.IndexBinaryFlat(dim), dim, nlist)
+            if self.index_type == "hnsw":
+                index = faiss.IndexBinaryHNSW(dim, self.hnsw_m)
+                index.hnsw.efConstruction = self.ef_construction
+                return faiss.IndexBinaryIDMap(index)
+            return faiss.IndexBinaryIDMap(faiss.IndexBinaryFlat(dim))
+
+        qtype = {"float16": faiss.ScalarQuantizer.QT_fp16, "int8": faiss.ScalarQuantizer.QT_8bit}.get(self.quantization)
+        if self.index_type == "ivf":
+            quantizer = faiss.IndexFlatL2(dim)
+            index = faiss.IndexIVFFlat(quantizer, dim, nlist) if qtype is None else \
+                faiss.IndexIVFScalarQuantizer(quantizer, dim, nlist, qtype)
+            storage = index
+        elif self.index_type == "hnsw":
+            index = faiss.IndexHNSWFlat(dim, self.hnsw_m) if qtype is None else \
+                faiss.IndexHNSWSQ(dim, qtype, self.hnsw_m)
+            index.hnsw.efConstruction = self.ef_construction
+            storage = faiss.downcast_index(index.storage)
+        else:
+            index = storage = faiss.IndexFlatL2(dim) if qtype is None else faiss.IndexScalarQuantizer(dim, qtype)
+        if self.quantization == "int8":           # Ranges ignore the 0.1% most extreme values of each dimension
+            storage.sq.rangestat = faiss.ScalarQuantizer.RS_quantiles
+            storage.sq.rangestat_arg = 0.001
+        return index if self.index_type == "ivf" else faiss.IndexIDMap(index)
+
+    def build(self) -> None:
+        """Build the index from the sidecar, training it on a sample of the vectors when it needs training."""
+        total = self.count()
+        nlist = _nlist(total)
+        if self.needs_training and not self.trainable(total):
+            index, trained_on = self.faiss.IndexIDMap(self.faiss.IndexFlatL2(self.dim)), 0
+        else:
+            index, trained_on = self.make_index(self.dim, nlist), total
+            if self.needs_training:
+                sample = _vectors([blob for blob, in self.conn.execute(
+                    "SELECT embedding FROM chunks ORDER BY random() LIMIT ?", (min(total, max(256 * nlist, 20000)),))])
+                if self.quantization == "binary":
+                    self.thresholds = np.median(sample, axis=0).astype(np.float32)
+                    sample = np.packbits(sample > self.thresholds, axis=1)
+                index.train(sample)
+        self.index, self.indexed_row, self.dead, self.trained_on = index, 0, 0, trained_on
+        self.catch_up()
+
+    def needs_rebuild(self) -> bool:
+        if self.index is None or self.dead > self.rebuild_ratio * max(1, self.index.ntotal):
+            return True
+        if not self.needs_training:
+            return False
+        if not self.trained_on:
+            return self.trainable(self.index.ntotal)
+        return self.index.ntotal >= 4 * self.trained_on         # IVF lists and calibration follow the growth
+
+    def persist(self) -> None:
+        if self.read_only or self.dim is None:
+            return
+        with self.lock:
+            with self.conn:
+                self.load()
+                if self.needs_rebuild():
+                    self.build()
+                generation = int(self.info("generation", "0")) + 1
+                if isinstance(self.index, self.faiss.IndexBinary):
+                    self.faiss.write_index_binary(self.index, self.index_file(generation))
+                else:
+                    self.faiss.write_index(self.index, self.index_file(generation))
+                thresholds = json.dumps(self.thresholds.tolist() if self.thresholds is not None else None)
+                self.set_info(generation=generation, indexed_row=self.indexed_row, dead=self.dead,
+                              trained_on=self.trained_on, thresholds=thresholds)
+                self.generation = generation
+            for index_file in glob.glob(os.path.join(self.directory, "index*.faiss")):
+                if index_file != self.index_file(generation):
+                    os.remove(index_file)           # Readers keep the files they opened or mapped
+
+    # -- Reads
+
+    def load(self) -> None:
+        """Load the current index file if another one is loaded; writers also add the rows written since (or build
+        the index from the sidecar when none was persisted)."""
+        if self.index is not None and not self.read_only:
+            return
+        while True:
+            state = dict(self.conn.execute("SELECT key, value FROM store_info WHERE key IN "
+                                           "('generation', 'indexed_row', 'dead', 'trained_on', 'thresholds')"))
+            generation = int(state.get("generation", "0"))
+            if self.index is not None and generation == self.generation:
+                return
+            index_file = self.index_file(generation)
+            if not os.path.exists(index_file) and not generation:
+                break                               # Nothing persisted yet: writers build from the sidecar
+            flags = self.faiss.IO_FLAG_MMAP | self.faiss.IO_FLAG_READ_ONLY if self.read_only and self.mmap else 0
+            try:
+                if self.quantization == "binary" and int(state.get("trained_on", "0")):
+                    index = self.faiss.read_index_binary(index_file, flags)
+                else:
+                    index = self.faiss.read_index(index_file, flags)
+            except RuntimeError:
+                if os.path.exists(index_file):
+                    raise
+                continue                            # Replaced by a writer in the meantime
+            thresholds = json.loads(state.get("thresholds", "null"))
+            self.index, self.generation = index, generation
+            self.indexed_row, self.dead = int(state.get("indexed_row", "0")), int(state.get("dead", "0"))
+            self.trained_on = int(state.get("trained_on", "0"))
+            self.thresholds = np.array(thresholds, dtype=np.float32) if thresholds is not None else None
+            break
+        if not self.read_only and self.dim is not None:
+            self.catch_up()
+
+    def fetch(self, rows: List[int], include: Sequence[str]) -> Dict[int, Tuple]:
+        """Sidecar records of index row ids, missing for tombstones."""
+        columns = "row, id, document, metadata" + (", embedding" if "embeddings" in include else "")
+        records = {}
+        for batch in _batches(rows):
+            for record in self.conn.execute(f"SELECT {columns} FROM chunks WHERE row IN ({','.join('?' * len(batch))})",
+                                            batch):
+                records[record[0]] = record[1:]
+        return records
+
+    @staticmethod
+    def result(records: List[Tuple], include: Sequence[str]) -> Dict[str, Any]:
+        result = {"ids": [record[0] for record in records]}
+        if "documents" in include:
+            result["documents"] = [record[1] for record in records]
+        if "metadatas" in include:
+            result["metadatas"] = [json.loads(record[2]) for record in records]
+        if "embeddings" in include:
+            result["embeddings"] = [np.frombuffer(record[3], dtype=np.float32) for record in records]
+        return result
+
+    def get(self, ids=None, where=None, limit=None, offset=None, include=("metadatas", "documents")):
+        columns = "id, document, metadata" + (", embedding" if "embeddings" in include else "")
+        condition, params = _where_sql(where)
+        with self.lock:
+            if ids is not None:
+                records = []
+                for batch in _batches(list(ids)):
+                    records += self.conn.execute(f"SELECT {columns} FROM chunks WHERE {condition} AND id IN "
+                                                 f"({','.join('?' * len(batch))}) ORDER BY row", (*params, *batch))
+                records = records[offset or 0:][:limit] if limit is not None else records[offset or 0:]
+            else:
+                records = self.conn.execute(f"SELECT {columns} FROM chunks WHERE {condition} ORDER BY row "
+                                            "LIMIT ? OFFSET ?", (*params, -1 if limit is None else limit,
+                                                                 offset or 0)).fetchall()
+        return self.result(records, include)
+
+    def search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        faiss, index = self.faiss, self.index
+        if isinstance(index, (faiss.IndexIVF, faiss.IndexBinaryIVF)):
+            index.nprobe = self.nprobe
+        else:                                       # Loaded indexes wrap a base `Index` proxy
+            binary = isinstance(index, faiss.IndexBinary)
+            inner = faiss.downcast_IndexBinary(index.index) if binary else faiss.downcast_index(index.index)
+            if hasattr(inner, "hnsw"):
+                inner.hnsw.efSearch = max(self.ef_search, k)
+        return index.search(self.encode(queries), k)
+
+    def query(self, query_embeddings, n_results=10, include=("metadatas", "documents", "distances")):
+        queries = np.ascontiguousarray(np.asarray(query_embeddings, dtype=np.float32))
+        queries = queries.reshape(1, -1) if queries.ndim == 1 else queries
+        with self.lock:
+            self.load()
+            total = self.index.ntotal if self.index is not None else 0
+            rescore = self.quantized and self.rescore_factor > 0
+            candidates = n_results * self.rescore_factor if rescore else n_results
+            k = min(total, candidates + min(self.dead, candidates))
+            fetched = [*include, "embeddings"] if rescore else include
+            while True:
+                distances, rows = self.search(queries, k) if k else (np.empty((len(queries), 0)),) * 2
+                records = self.fetch(sorted({int(row) for row in rows.ravel() if row >= 0}), fetched)
+                hits = [[(row, distance) for row, distance in zip(query_rows, query_distances) if row in records]
+                        for query_rows, query_distances in zip(rows.tolist(), distances.tolist())]
+                if k >= total or all(len(query_hits) >= candidates for query_hits in hits):
+                    break
+                k = min(total, 2 * k)                  # Too many tombstones in the results: fetch more
+        if rescore:
+            for index, query_hits in enumerate(hits):   # Exact distances of the candidates, from the sidecar
+                if not query_hits:
+                    continue
+                vectors = _vectors([records[row][3] for row, _ in query_hits[:candidates]])
+                exact = ((vectors - queries[index]) ** 2).sum(axis=1)
+                hits[index] = sorted(zip((row for row, _ in query_hits), exact.tolist()), key=lambda hit: hit[1])
+        result = {key: [] for key in ("ids", *include)}
+        for query_hits in hits:
+            query_hits = query_hits[:n_results]
+            query_result = self.result([records[row] for row, _ in query_hits], include)
+            for key, values in query_result.items():
+                result[key].append(values)
+            if "distances" in include:
+                result["distances"].append([distance for _, distance in query_hits])
+        return result
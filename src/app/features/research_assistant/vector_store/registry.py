@@ -0,0 +1,35 @@
+import os
+from typing import Dict, Optional
+
+from .base import ChromaStore, VectorStore
+from ..utilities.helper import FAISS_STORE_DIR, VECTOR_STORE_FILE
+
+BACKENDS = ("chroma", "faiss")
+
+
+def store_backend(name: str) -> str:
+    """Backend holding an existing collection: FAISS if it has a store directory, Chroma otherwise."""
+    return "faiss" if os.path.isdir(os.path.join(FAISS_STORE_DIR, name)) else "chroma"
+
+
+def open_store(name: str, backend: Optional[str] = None, metadata: Optional[Dict] = None, index_type: str = "hnsw",
+               quantization: str = "none", create: bool = True, read_only: bool = False,
+               chroma_path: str = VECTOR_STORE_FILE, **options) -> VectorStore:
+    """Open a collection of the vector store, `metadata`, `index_type` and `quantization` (FAISS) being only set
+    on creation.
+
+    Without `backend`, the backend of the existing collection is used (Chroma for a new one). Read-only FAISS
+    stores are memory-mapped and follow the index files saved by the writers. `options` (`nprobe`, `ef_search`,
+    `rescore_factor`...) tune the FAISS searches.
+    """
+    backend = backend or store_backend(name)
+    if backend == "chroma":
+        if quantization != "none":
+            raise ValueError("Quantized embeddings need the FAISS backend.")
+        return ChromaStore.open(chroma_path, name, metadata=metadata, create=create)
+    if backend == "faiss":
+        from .faiss_store import FaissStore
+
+        return FaissStore(FAISS_STORE_DIR, name, metadata=metadata, index_type=index_type, quantization=quantization,
+                          read_only=read_only, create=create, **options)
+    raise ValueError(f"Unknown vector store backend: {backend} (expected one of {BACKENDS})")
@@ -3,7 +3,7 @@ import streamlit as st
 from src.app.features.research_assistant import store_management
 
 
-def page_1(debug, arxiv, document_processor):
+def page_1(debug, arxiv):
     st.markdown('<div class="header">Database_</div>', unsafe_allow_html=True)
     st.text("")
 
@@ -18,11 +18,12 @@ def page_1(debug, arxiv, document_processor):
         st.text("")
 
     st.write("___")
-    store_management(debug, arxiv, document_processor)
+    store_management(debug, arxiv)
 
     st.write("---")
 
     st.write("## ArXiv papers database_")
     st.write("Cette table contient les métadonnées des papiers de recherches extraits de le base de données ArXiv.")
     st.write("")
-    st.dataframe(st.session_state['data'])
+    if not arxiv.database_search(db_name="./database/arxiv_data.db"):       # Full-text search, or the whole table
+        st.dataframe(st.session_state['data'])
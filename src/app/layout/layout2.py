@@ -1,6 +1,6 @@
 import streamlit as st
 
-def page_2(debug, agent, qa_system):
+def page_2(debug, agent, load_qa_system):
     st.markdown('<div class="header">Ask a question_</div>', unsafe_allow_html=True)
     st.text("")
 
@@ -17,6 +17,6 @@ For a personalized response, adjust the settings of the **Llama-2-7b-chat-hf** m
     st.write(text)
     st.write("___")
 
-    agent.run_assistance(debug=debug, qa_system=qa_system)
+    agent.run_assistance(debug=debug, load_qa_system=load_qa_system)
 
 
@@ -2,13 +2,12 @@ import gc
 import os
 
 import streamlit as st
-from huggingface_hub import HfApi
 
-from .components import initialize_hg_api_key, load_data
+from .components import check_hg_api_key, initialize_hg_api_key, load_data
 from .features import arxiv_data_manager as arxiv
 from .features import research_assistant as agent
 
-global update_message, debug, document_processor, qa_system
+global update_message, debug
 
 def load_css():
     """Load custom CSS styles for the Streamlit app."""
@@ -55,32 +54,26 @@ def main_layout():
 """
         )
     logo_url = "https://huggingface.co/front/assets/huggingface_logo.svg"    # Hugging Face API connexion test
-    api = HfApi()
     hg_api_key = initialize_hg_api_key()
-    try:
-        result = api.whoami(hg_api_key)
-        if result is not None:
-            st.sidebar.markdown(
-                f'<p style="color:silver; font-size:16px;">'
-                f'<img src="{logo_url}" width="30" style="vertical-align:middle; margin-right:12px;"/>'
-                f'API Connected!</p>',
-                unsafe_allow_html=True
-            )
-        else:
-            st.sidebar.markdown(
-                f'<p style="color:red; font-size:16px;">'
-                f'<img src="{logo_url}" width="30" style="vertical-align:middle; margin-right:10px;"/>'
-                f'Invalid API key ❌</p>',
-                unsafe_allow_html=True
-            )
-    except Exception as e:
+    api_error = check_hg_api_key(hg_api_key)
+    if api_error is None:
+        st.sidebar.markdown(
+            f'<p style="color:silver; font-size:16px;">'
+            f'<img src="{logo_url}" width="30" style="vertical-align:middle; margin-right:12px;"/>'
+            f'API Connected!</p>',
+            unsafe_allow_html=True
+        )
+    else:
         st.sidebar.markdown(
             f'<p style="color:red; font-size:16px;">'
             f'<img src="{logo_url}" width="30" style="vertical-align:middle; margin-right:10px;"/>'
-            f'Error: {e} ❌</p>',
+            f'{api_error} ❌</p>',
             unsafe_allow_html=True
         )
-    document_processor, qa_system = agent.models_loading(hg_api_key, debug)    # Load models
+    load_qa_system = lambda: agent.get_qa_system(hg_api_key, debug)     # Models are loaded on demand
+    if debug:
+        st.sidebar.write("Models memory (MB):")
+        st.sidebar.dataframe(agent.memory_report(), hide_index=True)
 
     print("\n")
     # -- LAYOUT -- ##
@@ -103,11 +96,11 @@ def main_layout():
     if page == "Overview_":
         page_0()
     elif page == "Database_":
-        page_1(debug, arxiv, document_processor)
+        page_1(debug, arxiv)
     elif page == "Ask questions_":
-        page_2(debug, agent, qa_system)
+        page_2(debug, agent, load_qa_system)
     elif page == "Latest chats_":
-        page_3(debug, qa_system)
+        page_3(debug)
 
     st.sidebar.markdown("&nbsp;")
     gc.collect()
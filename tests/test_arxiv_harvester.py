@@ -0,0 +1,218 @@
+import threading
+import time
+import urllib.error
+import urllib.parse
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.app.features.arxiv_data_manager.arxiv_client import ArxivAPIClient
+from src.app.features.arxiv_data_manager.arxiv_db import ArxivDataLoader
+from src.app.features.arxiv_data_manager.arxiv_harvester import ArxivHarvester
+from src.app.features.arxiv_data_manager.search_and_update import write_batches
+
+TOTAL = 450
+NEWEST = datetime(2024, 6, 1, tzinfo=timezone.utc)
+
+
+def updated(index):
+    """`updated` date of the entry `index`, newest first."""
+    return (NEWEST - timedelta(hours=index)).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def feed(start, max_results):
+    entries = "".join(f"""
+  <entry>
+    <id>http://arxiv.org/abs/2401.{index:05d}v1</id>
+    <updated>{updated(index)}</updated>
+    <published>{updated(index)}</published>
+    <title>Paper {index}</title>
+    <summary>Abstract {index}</summary>
+    <author><name>Author {index}</name></author>
+    <author><name>Coauthor {index}</name></author>
+    <link title="pdf" href="http://arxiv.org/pdf/2401.{index:05d}v1" rel="related" type="application/pdf"/>
+    <arxiv:primary_category xmlns:arxiv="http://arxiv.org/schemas/atom" term="quant-ph"/>
+    <category term="quant-ph"/>
+  </entry>""" for index in range(start, min(start + max_results, TOTAL)))
+    return f"""<?xml version="1.0" encoding="UTF-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom" xmlns:opensearch="http://a9.com/-/spec/opensearch/1.1/">
+  <opensearch:totalResults>{TOTAL}</opensearch:totalResults>{entries}
+</feed>""".encode()
+
+
+class ArxivStandIn(BaseHTTPRequestHandler):
+    """Stand-in for the arXiv API; `failures[start]` lists the failures to serve before that page."""
+
+    def do_GET(self):
+        params = urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query)
+        start, max_results = int(params["start"][0]), int(params["max_results"][0])
+        with self.server.lock:
+            self.server.requests.append((time.monotonic(), start, params["sortBy"][0]))
+            failures = self.server.failures.get(start, [])
+            failure = failures.pop(0) if failures else None
+        if failure == "disconnect":
+            self.close_connection = True
+            return
+        if failure is not None:
+            self.send_error(failure)
+            return
+        body = feed(start, max_results)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/atom+xml")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ArxivStandIn)
+    server.lock, server.requests, server.failures = threading.Lock(), [], {}
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def harvester(server, tmp_path):
+    client = ArxivAPIClient(base_url=f"http://127.0.0.1:{server.server_port}/api/query", timeout=5)
+    return ArxivHarvester(client=client, request_interval=0.0, workers=4, max_retries=2, backoff=0.01,
+                          cursor_file=str(tmp_path / "cursor.json"))
+
+
+def ids(entries):
+    return sorted(int(entry["id"].rsplit(".", 1)[1][:5]) for entry in entries)
+
+
+def test_harvest_yields_every_entry(harvester):
+    entries = list(harvester.harvest(max_results=100, total_results_limit=1000))
+    assert ids(entries) == list(range(TOTAL))
+    assert entries[0]["authors"] == ["Author 0", "Coauthor 0"]
+    assert entries[0]["primary_category"] == "quant-ph"
+
+
+def test_rate_limit_spaces_concurrent_requests(harvester, server):
+    harvester.rate_limiter.interval = 0.3
+    list(harvester.harvest(max_results=100, total_results_limit=1000))
+    times = sorted(request[0] for request in server.requests)
+    assert len(times) == 5
+    assert times[-1] - times[0] >= 4 * 0.3 - 0.05       # Timestamps taken by the server threads jitter
+    assert min(b - a for a, b in zip(times, times[1:])) >= 0.2
+
+
+def test_retries_server_and_connection_errors(harvester, server):
+    server.failures = {100: [503, 500], 200: ["disconnect"]}
+    entries = list(harvester.harvest(max_results=100, total_results_limit=1000))
+    assert ids(entries) == list(range(TOTAL))
+    starts = [request[1] for request in server.requests]
+    assert starts.count(100) == 3 and starts.count(200) == 2
+
+
+def test_client_errors_are_not_retried(harvester, server):
+    server.failures = {300: [404]}
+    entries = list(harvester.harvest(max_results=100, total_results_limit=1000))
+    assert len(entries) == TOTAL - 100
+    assert [request[1] for request in server.requests].count(300) == 1
+
+
+def test_resume_fetches_only_the_failed_pages(harvester, server):
+    server.failures = {200: [503] * 3}                  # More failures than retries
+    first = list(harvester.harvest(max_results=100, total_results_limit=1000))
+    assert ids(first) == [index for index in range(TOTAL) if not 200 <= index < 300]
+    assert harvester.load_cursor("all:quantum|relevance|100|1000")["done"] == [0, 100, 300, 400]
+
+    server.requests.clear()
+    second = list(harvester.harvest(max_results=100, total_results_limit=1000))
+    assert ids(second) == list(range(200, 300))
+    assert [request[1] for request in server.requests] == [200]
+    assert harvester.load_cursor("all:quantum|relevance|100|1000") is None
+
+
+def test_checkpoint_after_storing_entries(harvester, server):
+    entries = harvester.harvest(max_results=100, total_results_limit=1000, auto_checkpoint=False)
+    stored = [next(entries) for _ in range(100)]
+    next(entries)                                       # Page 0 consumed, but not checkpointed yet
+    assert harvester.load_cursor("all:quantum|relevance|100|1000") is None
+    harvester.checkpoint()
+    assert harvester.load_cursor("all:quantum|relevance|100|1000")["done"] == [0]
+    entries.close()
+    assert len(stored) == 100
+
+
+def test_closing_a_harvest_early_stops_the_workers(harvester):
+    entries = harvester.harvest(max_results=10, total_results_limit=1000)
+    for _ in range(15):
+        next(entries)
+    started = time.monotonic()
+    entries.close()
+    assert time.monotonic() - started < 5
+
+
+def test_incremental_stops_at_older_entries(harvester, server):
+    entries = list(harvester.incremental(since=updated(150), max_results=100, total_results_limit=1000))
+    assert ids(entries) == list(range(150))
+    assert [(request[1], request[2]) for request in server.requests] == [(0, "lastUpdatedDate"),
+                                                                        (100, "lastUpdatedDate")]
+
+
+def test_incremental_from_an_empty_database_reads_everything(harvester):
+    entries = list(harvester.incremental(since=None, max_results=100, total_results_limit=1000))
+    assert ids(entries) == list(range(TOTAL))
+
+
+def sync(harvester, loader, total_results_limit):
+    """Run an incremental sync as `search_and_update` does, returning the ids stored by it."""
+    entries = harvester.incremental(max_results=100, total_results_limit=total_results_limit,
+                                    **loader.sync_state("all:quantum"))
+    stored = []
+
+    def checkpoint():
+        loader.save_sync_state("all:quantum", **harvester.sync)
+
+    def recorded(entries):
+        for entry in entries:
+            stored.append(entry)
+            yield entry
+
+    try:
+        for _ in write_batches(loader, recorded(entries), 100, checkpoint):
+            pass
+    except urllib.error.HTTPError:
+        pass
+    return ids(stored)
+
+
+@pytest.fixture
+def loader(tmp_path):
+    with ArxivDataLoader(db_name=str(tmp_path / "arxiv.db")) as loader:
+        yield loader
+
+
+def test_incremental_sync_cut_by_the_limit_resumes_below(harvester, loader):
+    assert sync(harvester, loader, total_results_limit=200) == list(range(200))
+    assert loader.sync_state("all:quantum") == {"since": None, "newest": updated(0), "start": 200}
+    assert sync(harvester, loader, total_results_limit=200) == list(range(200, 400))
+    assert sync(harvester, loader, total_results_limit=200) == list(range(400, TOTAL))
+    assert loader.sync_state("all:quantum") == {"since": updated(0), "newest": None, "start": 0}
+    assert sync(harvester, loader, total_results_limit=200) == []
+    assert loader.conn.execute("SELECT COUNT(*) FROM arxiv_entries").fetchone()[0] == TOTAL
+
+
+def test_incremental_sync_cut_by_a_failed_page_picks_up_the_gap(harvester, loader, server):
+    server.failures = {200: [503] * 3}                  # More failures than retries
+    first = sync(harvester, loader, total_results_limit=1000)
+    assert first == list(range(200))
+    assert loader.sync_state("all:quantum")["since"] is None       # The high-water mark does not move
+
+    server.requests.clear()
+    second = sync(harvester, loader, total_results_limit=1000)
+    assert second == list(range(100, TOTAL))            # From the last page checkpointed after its write
+    assert [request[1] for request in server.requests] == [100, 200, 300, 400]
+    assert loader.sync_state("all:quantum") == {"since": updated(0), "newest": None, "start": 0}
+    assert loader.conn.execute("SELECT COUNT(*) FROM arxiv_entries").fetchone()[0] == TOTAL
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from src.app.features.research_assistant.vector_store.faiss_store import INDEX_TYPES, FaissStore
+
+SIZE, DIM = 2000, 16                # Enough vectors to train IVF lists and calibrate int8 and binary codes
+
+
+@pytest.fixture(scope="module")
+def vectors():
+    return np.random.default_rng(0).random((SIZE, DIM), dtype=np.float32)
+
+
+def exact(vectors, query, n):
+    distances = ((vectors - query) ** 2).sum(axis=1)
+    order = np.argsort(distances)[:n]
+    return [f"chunk_{i}" for i in order], distances[order]
+
+
+@pytest.mark.parametrize("quantization", ["float16", "int8", "binary"])
+@pytest.mark.parametrize("index_type", INDEX_TYPES)
+def test_quantized_stores_rescore_exact_distances(tmp_path, vectors, index_type, quantization):
+    store = FaissStore(str(tmp_path), "papers", index_type=index_type, quantization=quantization)
+    store.upsert([f"chunk_{i}" for i in range(SIZE)], vectors, [{}] * SIZE, [""] * SIZE)
+    store.persist()
+
+    reader = FaissStore(str(tmp_path), "papers", read_only=True)
+    queries = vectors[:5] + 0.01
+    result = reader.query(queries, n_results=5, include=["distances"])
+    assert reader.quantized
+    for query, ids, distances in zip(queries, result["ids"], result["distances"]):
+        expected_ids, expected_distances = exact(vectors, query, 5)
+        assert ids[0] == expected_ids[0]
+        np.testing.assert_allclose(distances, ((vectors[[int(i[6:]) for i in ids]] - query) ** 2).sum(axis=1),
+                                   rtol=1e-5)
+        assert distances == sorted(distances)
+        assert distances[0] == pytest.approx(expected_distances[0], rel=1e-5)
+
+
+def test_unquantized_store_is_not_rescored(tmp_path, vectors):
+    store = FaissStore(str(tmp_path), "papers", index_type="flat")
+    store.upsert([f"chunk_{i}" for i in range(100)], vectors[:100], [{}] * 100, [""] * 100)
+    assert not store.quantized
+    assert store.query(vectors[:1], n_results=1)["ids"] == [["chunk_0"]]
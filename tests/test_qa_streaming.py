@@ -0,0 +1,86 @@
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+from src.app.features.research_assistant.qa_system.inference_client import InferenceClient, InferenceError
+from src.app.features.research_assistant.qa_system.qa_system import QASystem
+
+
+def token(text, special=False):
+    return f'data: {{"token": {{"id": 1, "text": "{text}", "special": {str(special).lower()}}}}}'
+
+
+class SSEStandIn(BaseHTTPRequestHandler):
+    """Stand-in for a text-generation endpoint, answering with the status and lines of `server.response`."""
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        status, lines = self.server.response
+        self.send_response(status)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        for line in lines:
+            self.wfile.write(f"{line}\n".encode())
+            self.wfile.flush()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = HTTPServer(("127.0.0.1", 0), SSEStandIn)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def stream(server):
+    system = QASystem.__new__(QASystem)     # Only the inference client is needed to stream
+    system.client = InferenceClient(f"http://127.0.0.1:{server.server_port}/generate", max_retries=0)
+
+    def stream(status, lines):
+        """Tokens received and the message of the error raised, if any."""
+        server.response = status, lines
+        tokens = []
+        try:
+            for token in system.stream_tokens({}, {"inputs": "question", "stream": True}):
+                tokens.append(token)
+        except InferenceError as e:
+            return tokens, str(e)
+        return tokens, None
+
+    yield stream
+    system.client.close()
+
+
+def test_tokens_until_done(stream):
+    lines = [token("Hello"), "", token(" world"), "", token("</s>", special=True), "", "data: [DONE]", "",
+             token("ignored"), ""]
+    assert stream(200, lines) == (["Hello", " world"], None)
+
+
+def test_undecodable_events_are_skipped(stream):
+    lines = [token("Hello"), "", 'data: {"token": {"text": "par', "", "data: not json", "", ": keep-alive", "",
+             token(" world"), "", "data: [DONE]", ""]
+    assert stream(200, lines) == (["Hello", " world"], None)
+
+
+def test_error_event_ends_the_stream(stream):
+    lines = [token("Hello"), "", 'data: {"error": "Model is overloaded", "error_type": "overloaded"}', "",
+             token(" world"), ""]
+    assert stream(200, lines) == (["Hello"], "Model is overloaded")
+
+
+def test_named_error_event_with_a_text_payload(stream):
+    lines = [token("Hello"), "", "event: error", "data: Input validation error", "", token(" world"), ""]
+    assert stream(200, lines) == (["Hello"], "Input validation error")
+
+
+def test_http_error_status(stream):
+    assert stream(422, []) == ([], "HTTP 422")
+